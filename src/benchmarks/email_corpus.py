@@ -0,0 +1,209 @@
+import os
+import random
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+from extract_msg.ole_writer import OleWriter
+
+WORDS = (
+    "the project schedule framing lot permit inspection budget crew delivery "
+    "estimate invoice change order drywall roofing phase closing walkthrough "
+    "concrete plumbing electrical punch list warranty subdivision plan"
+).split()
+# Windows FILETIME epoch, for .msg timestamps
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class CorpusCase:
+    """One shape of email: how many files to write and what each contains."""
+
+    name: str
+    count: int
+    body_bytes: int = 2_000
+    links: int = 0
+    recipients: int = 3
+    attachments: int = 0
+    attachment_bytes: int = 0
+
+
+# Each case stresses one part of the parse path
+CASES = [
+    CorpusCase("small", count=200),
+    CorpusCase("large_body", count=20, body_bytes=2_000_000),
+    CorpusCase("long_links", count=100, body_bytes=20_000, links=400),
+    CorpusCase("many_recipients", count=100, recipients=500),
+    CorpusCase("many_attachments", count=20, attachments=50, attachment_bytes=50_000),
+    CorpusCase("large_attachment", count=3, attachments=1, attachment_bytes=30_000_000),
+]
+FORMATS = ("eml", "msg")
+
+
+def _text(rng: random.Random, size: int, links: int) -> str:
+    """Paragraphs of filler words about size bytes long, with long URLs mixed in."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    for _ in range(links):
+        token = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=120))
+        url = f"https://tracking.example.com/c/{token}?utm_source=email"
+        words.insert(rng.randrange(len(words) + 1), url)
+    lines = [" ".join(words[i : i + 12]) for i in range(0, len(words), 12)]
+    paragraphs = ["\n".join(lines[i : i + 6]) for i in range(0, len(lines), 6)]
+    return "\n\n".join(paragraphs)
+
+
+def _email(case: CorpusCase, n: int, rng: random.Random) -> dict:
+    people = [
+        (f"Person {i}", f"person{i}@builder{i % 7}.example.com")
+        for i in range(case.recipients + 1)
+    ]
+    return {
+        "subject": f"{case.name} {n}: {rng.choice(WORDS)} {rng.choice(WORDS)}",
+        "body": _text(rng, case.body_bytes, case.links),
+        "sender": people[0],
+        "to": people[1:],
+        "sent": BASE_DATE + timedelta(minutes=n),
+        "message_id": f"<{case.name}.{n}@bench.example.com>",
+        "attachments": [
+            (f"file{i}.bin", rng.randbytes(case.attachment_bytes))
+            for i in range(case.attachments)
+        ],
+    }
+
+
+def write_eml(path: str, email: dict) -> None:
+    msg = EmailMessage()
+    msg["From"] = f"{email['sender'][0]} <{email['sender'][1]}>"
+    msg["To"] = ", ".join(f"{name} <{addr}>" for name, addr in email["to"])
+    msg["Subject"] = email["subject"]
+    msg["Date"] = format_datetime(email["sent"])
+    msg["Message-ID"] = email["message_id"]
+    msg.set_content(email["body"])
+    for name, data in email["attachments"]:
+        msg.add_attachment(
+            data, maintype="application", subtype="octet-stream", filename=name
+        )
+    with open(path, "wb") as f:
+        f.write(bytes(msg))
+
+
+def _properties(header: bytes, props: list[tuple[int, bytes]]) -> bytes:
+    """A __properties_version1.0 stream: header, then 16-byte property entries."""
+    out = [header]
+    for tag, value in props:
+        # Flags 6 = readable and writable
+        out.append(struct.pack("<II", tag, 6) + value.ljust(8, b"\0"))
+    return b"".join(out)
+
+
+def _add_strings(
+    writer: OleWriter,
+    storage: list[str],
+    strings: dict[int, str],
+    props: list[tuple[int, bytes]],
+) -> None:
+    for prop_id, value in strings.items():
+        data = value.encode("utf-16-le")
+        tag = prop_id << 16 | 0x001F
+        writer.addEntry([*storage, f"__substg1.0_{tag:08X}"], data)
+        props.append((tag, struct.pack("<I", len(data))))
+
+
+def write_msg(path: str, email: dict) -> None:
+    """Write an Outlook .msg (a compound file) with extract_msg's OLE writer."""
+    writer = OleWriter()
+    sender_name, sender_addr = email["sender"]
+    filetime = int((email["sent"] - FILETIME_EPOCH).total_seconds() * 10_000_000)
+    props = [
+        (0x00390040, struct.pack("<Q", filetime)),  # PR_CLIENT_SUBMIT_TIME
+        (0x0E060040, struct.pack("<Q", filetime)),  # PR_MESSAGE_DELIVERY_TIME
+    ]
+    _add_strings(
+        writer,
+        [],
+        {
+            0x001A: "IPM.Note",
+            0x0037: email["subject"],
+            0x1000: email["body"],
+            0x0C1A: sender_name,
+            0x0C1F: sender_addr,
+            0x5D01: sender_addr,
+            0x0E04: "; ".join(name for name, _ in email["to"]),
+            0x1035: email["message_id"],
+        },
+        props,
+    )
+    counts = (len(email["to"]), len(email["attachments"]))
+    header = struct.pack("<8xIIII8x", *counts, *counts)
+    writer.addEntry("__properties_version1.0", _properties(header, props))
+
+    writer.addEntry("__nameid_version1.0", storage=True)
+    for stream in ("00020102", "00030102", "00040102"):
+        writer.addEntry(["__nameid_version1.0", f"__substg1.0_{stream}"], b"")
+
+    for i, (name, addr) in enumerate(email["to"]):
+        storage = [f"__recip_version1.0_#{i:08X}"]
+        writer.addEntry(storage, storage=True)
+        recip_props = [(0x0C150003, struct.pack("<I", 1))]  # PR_RECIPIENT_TYPE: To
+        _add_strings(
+            writer, storage, {0x3001: name, 0x3003: addr, 0x39FE: addr}, recip_props
+        )
+        writer.addEntry(
+            [*storage, "__properties_version1.0"], _properties(b"\0" * 8, recip_props)
+        )
+
+    for i, (name, data) in enumerate(email["attachments"]):
+        storage = [f"__attach_version1.0_#{i:08X}"]
+        writer.addEntry(storage, storage=True)
+        attach_props = [
+            (0x37050003, struct.pack("<I", 1)),  # PR_ATTACH_METHOD: by value
+            (0x37010102, struct.pack("<I", len(data))),
+        ]
+        writer.addEntry([*storage, "__substg1.0_37010102"], data)
+        _add_strings(
+            writer,
+            storage,
+            {0x3704: name, 0x3707: name, 0x370E: "application/octet-stream"},
+            attach_props,
+        )
+        writer.addEntry(
+            [*storage, "__properties_version1.0"],
+            _properties(b"\0" * 8, attach_props),
+        )
+    writer.write(path)
+
+
+def generate_corpus(
+    corpus_dir: str, cases: list[CorpusCase] = CASES, seed: int = 0
+) -> dict[str, list[str]]:
+    """
+    Write every case in both formats under corpus_dir/<format>/<case>/.
+
+    Files already there are reused, so a corpus is generated once per machine;
+    delete the folder after changing CASES or the seed. The same seed always
+    gives the same files. Returns {"<format>/<case>": paths}.
+    """
+    writers = {"eml": write_eml, "msg": write_msg}
+    corpus = {}
+    for case in cases:
+        for fmt in FORMATS:
+            folder = os.path.join(corpus_dir, fmt, case.name)
+            os.makedirs(folder, exist_ok=True)
+            paths = []
+            for n in range(case.count):
+                path = os.path.join(folder, f"{n:05d}.{fmt}")
+                if not os.path.exists(path):
+                    rng = random.Random(f"{seed}-{case.name}-{n}")
+                    writers[fmt](f"{path}.tmp", _email(case, n, rng))
+                    os.replace(f"{path}.tmp", path)
+                paths.append(path)
+            corpus[f"{fmt}/{case.name}"] = paths
+    return corpus
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from dataclasses import replace
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from typing import Any, Callable
+
+import extract_msg
+from benchmarks.email_corpus import CASES, generate_corpus
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "email_bench_corpus")
+# Files per case parsed under tracemalloc, which is too slow for the timed runs
+MEMORY_SAMPLE = 3
+# Relative change in throughput or peak memory reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+_stage_seconds: dict[str, float] = defaultdict(float)
+
+
+def _timed(stage: str, fn: Callable) -> Callable:
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _stage_seconds[stage] += time.perf_counter() - start
+
+    return wrapper
+
+
+class _TimedBytesParser(BytesParser):
+    def parse(self, fp, headersonly=False):
+        start = time.perf_counter()
+        try:
+            return super().parse(fp, headersonly)
+        finally:
+            _stage_seconds["open"] += time.perf_counter() - start
+
+
+def _instrument(pe) -> None:
+    """Time parse_email's stages by wrapping the names it calls them through."""
+    extract_msg.Message = _timed("open", extract_msg.Message)
+    pe.BytesParser = _TimedBytesParser
+    pe.store_attachment = _timed("attachments", pe.store_attachment)
+    pe.clean_body = _timed("body_regex", pe.clean_body)
+    pe.reduce_body = _timed("reduce_body", pe.reduce_body)
+    pe.index_email = _timed("thread_index", pe.index_email)
+
+
+def _run_case(parse: Callable, paths: list[str], mode: str, repeat: int) -> dict:
+    size = sum(os.path.getsize(p) for p in paths)
+    best: tuple[float, dict[str, float]] | None = None
+    for _ in range(repeat):
+        _stage_seconds.clear()
+        start = time.perf_counter()
+        for path in paths:
+            result = parse(path, use_cache=False, mode=mode)
+            if "error" in result:
+                raise RuntimeError(f"{path}: {result['error']}")
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = (seconds, dict(_stage_seconds))
+    seconds, stages = best
+    stages["other"] = max(0.0, seconds - sum(stages.values()))
+
+    peak = 0
+    for path in paths[:MEMORY_SAMPLE]:
+        tracemalloc.start()
+        parse(path, use_cache=False, mode=mode)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "files": len(paths),
+        "bytes": size,
+        "seconds": round(seconds, 4),
+        "files_per_second": round(len(paths) / seconds, 2),
+        "mb_per_second": round(size / seconds / 1024 / 1024, 2),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "stages": {k: round(v, 4) for k, v in sorted(stages.items())},
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Lines describing each case's change from a baseline run; regressions marked."""
+    lines = []
+    for name, case in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            lines.append(f"  {name}: new case")
+            continue
+        speed = case["files_per_second"] / base["files_per_second"] - 1
+        memory = case["peak_memory_mb"] / max(base["peak_memory_mb"], 0.01) - 1
+        flag = (
+            "  REGRESSION"
+            if speed < -REGRESSION_THRESHOLD or memory > REGRESSION_THRESHOLD
+            else ""
+        )
+        lines.append(
+            f"  {name}: throughput {speed:+.0%}, peak memory {memory:+.0%}{flag}"
+        )
+    return lines
+
+
+def run_benchmark(
+    output_path: str,
+    corpus_dir: str = DEFAULT_CORPUS_DIR,
+    cases: list[str] | None = None,
+    scale: float = 1.0,
+    repeat: int = 3,
+    mode: str = "full",
+    baseline_path: str | None = None,
+) -> str:
+    """
+    Benchmark parse_email on a synthetic corpus and write the results as JSON.
+
+    Each case is parsed uncached `repeat` times and the fastest run is kept,
+    with time split into stages (open, attachments, body_regex, reduce_body,
+    thread_index, other). Peak memory is measured separately with tracemalloc
+    on a few files per case. Parse output goes to a throwaway local store.
+
+    Args:
+        output_path: JSON file to write
+        corpus_dir: Where the synthetic emails are generated (reused if present)
+        cases: Case names to run (default: all in email_corpus.CASES)
+        scale: Multiplier on each case's file count
+        repeat: Timed runs per case
+        mode: parse_email body mode, "full" or "new"
+        baseline_path: Earlier results to compare against
+    """
+    known = {c.name for c in CASES}
+    if cases and not set(cases) <= known:
+        return f"Error: cases must be from: {', '.join(sorted(known))}"
+    selected = [
+        replace(c, count=max(1, round(c.count * scale)))
+        for c in CASES
+        if not cases or c.name in cases
+    ]
+
+    start = time.perf_counter()
+    corpus = generate_corpus(corpus_dir, selected)
+    generated = time.perf_counter() - start
+
+    # Set before the first tools import, which reads it into module constants
+    os.environ["LOCAL_STORE_PATH"] = tempfile.mkdtemp(prefix="email_bench_store_")
+    import tools.parse_email as pe
+
+    _instrument(pe)
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "extract_msg": extract_msg.__version__,
+            "mode": mode,
+            "repeat": repeat,
+            "scale": scale,
+        },
+        "cases": {},
+    }
+    for name, paths in corpus.items():
+        results["cases"][name] = _run_case(pe.parse_email, paths, mode, repeat)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["meta"]["max_rss_mb"] = round(
+        max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    output = [f"Corpus ready in {generated:.1f}s at {corpus_dir}"]
+    for name, case in results["cases"].items():
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in case["stages"].items())
+        output.append(
+            f"  {name}: {case['files_per_second']} files/s, "
+            f"{case['mb_per_second']} MB/s, peak {case['peak_memory_mb']} MB ({stages})"
+        )
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        output.append(f"Compared with {baseline_path}:")
+        output.extend(compare(results, baseline))
+    output.append(f"Results written to {output_path}")
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", "-o", default="parse_email_bench.json")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--cases", nargs="*")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=("full", "new"), default="full")
+    parser.add_argument("--baseline", dest="baseline_path")
+    args = parser.parse_args()
+    print(
+        run_benchmark(
+            args.output,
+            args.corpus_dir,
+            args.cases,
+            args.scale,
+            args.repeat,
+            args.mode,
+            args.baseline_path,
+        )
+    )
@@ -1,7 +1,13 @@
 import sys
 import json
+import functools
+from typing import Any, Callable
+import anyio
 from mcp.server.fastmcp import FastMCP
 from tools.parse_email import parse_email
+from tools.parse_email_directory import parse_email_directory
+from tools.attachment_store import get_attachment
+from tools.email_threads import get_email_thread
 from tools.transcript_fetch import fetch_transcript
 
 EXCLUDED = set()
@@ -16,7 +22,17 @@ while i < len(sys.argv):
 mcp = FastMCP("Pluto Shared MCP Tools")
 
 
-@mcp.tool()
+def tool(fn: Callable[..., str]) -> Callable[..., Any]:
+    """Register a blocking tool to run on a worker thread so concurrent calls overlap."""
+
+    @functools.wraps(fn)
+    async def run(*args: Any, **kwargs: Any) -> str:
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+    return mcp.tool()(run)
+
+
+@tool
 def fetch_transcript_tool(join_url: str, output_path: str) -> str:
     """
     Downloads and saves a Microsoft Teams meeting transcript.
@@ -44,28 +60,128 @@ def fetch_transcript_tool(join_url: str, output_path: str) -> str:
         return f"Error: {str(e)}"
 
 
-@mcp.tool()
-def parse_email_file(file_path: str) -> str:
+@tool
+def parse_email_file(
+    file_path: str,
+    use_cache: bool = True,
+    mode: str = "full",
+    convert_attachments: bool = False,
+    match_crm: bool = False,
+) -> str:
     """
-    Parse a .msg email file and extract its contents.
+    Parse a .msg or .eml email file and extract its contents.
 
     Extracts sender, recipients (to/cc/bcc), subject, body, and attachments
-    from a Microsoft Outlook .msg file. Long URLs in the body are replaced
-    with [LINK]. Attachment content is returned as base64.
+    from a Microsoft Outlook .msg file or an RFC 822 .eml file. Long URLs in
+    the body are replaced with [LINK]. Attachments are saved to a local store
+    and returned as handles (name, extension, size, mimeType, hash); use
+    get_email_attachment to fetch or convert one. Attached (forwarded) emails
+    are parsed into an "embedded" result; attachments over the size limits
+    are listed with a "skipped" reason and no hash.
 
     Args:
-        file_path: Absolute path to the .msg file to parse.
+        file_path: Absolute path to the .msg or .eml file to parse.
+        use_cache: Return the cached result if this file was parsed before (default true).
+        mode: "full" (default) returns the whole body; "new" returns only what the
+              sender wrote, without quoted replies, forwards or signatures.
+        convert_attachments: Also convert PDF, Word, Excel, PowerPoint, HTML and CSV
+              attachments to Markdown. Each gets a "markdown" entry with an
+              excerpt and the path of the full text, so no separate
+              conversion call is needed.
+        match_crm: Also match every sender and recipient to HubSpot from a local
+              index. Adds "participants": role, address, email, contactId and
+              companyId (null when there is no match), so the email can be
+              logged to the right records without searching.
 
     Returns:
-        JSON string with keys: sentOn (epoch ms), from, to, cc, bcc, subject, body, attachments.
+        JSON string with keys: sentOn (epoch ms), from, to, cc, bcc, subject, body,
+        attachments, messageId, inReplyTo, references (and participants).
     """
     try:
-        result = parse_email(file_path)
+        result = parse_email(file_path, use_cache, mode, convert_attachments, match_crm)
         return json.dumps(result, default=str)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+@tool
+def parse_email_directory_tool(
+    dir_path: str,
+    output_path: str | None = None,
+    recursive: bool = False,
+    workers: int | None = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Parse every .msg, .eml and extensionless RFC 822 email file in a folder in
+    parallel and write the results to a JSONL file, one line per email in the
+    parse_email_file schema plus a "file" key. Files that fail to parse get a
+    line with an "error" key.
+
+    Args:
+        dir_path: Absolute path to the folder of email files.
+        output_path: Optional JSONL path (default: parsed_emails.jsonl in the folder).
+        recursive: Include subfolders.
+        workers: Number of worker processes (default: CPU count).
+        use_cache: Reuse cached results for files parsed before (default true).
+
+    Returns:
+        Summary with the number of emails parsed and failed, and the output path.
+    """
+    try:
+        return parse_email_directory(
+            dir_path, output_path, recursive, workers, use_cache
+        )
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@tool
+def get_email_thread_tool(
+    file_path: str | None = None, message_id: str | None = None, max_messages: int = 50
+) -> str:
+    """
+    Return the whole conversation an email belongs to, oldest first.
+
+    Threads are built from every email parsed so far (by Message-ID,
+    In-Reply-To, References and subject), so parse the emails in a chain first.
+    Paragraphs already shown earlier in the thread, such as quoted replies,
+    are removed from later messages.
+
+    Args:
+        file_path: Absolute path to a parsed .msg or .eml file in the thread.
+        message_id: Or the Message-ID of any message in the thread.
+        max_messages: Max messages to include (default 50; the most recent are kept).
+    """
+    try:
+        return get_email_thread(file_path, message_id, max_messages)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+@tool
+def get_email_attachment(
+    hash: str, output_path: str | None = None, convert: bool = False
+) -> str:
+    """
+    Fetch an attachment from a parsed email by the hash parse_email_file returned.
+
+    Args:
+        hash: The attachment's hash from parse_email_file.
+        output_path: Optional path to copy the attachment (or save its markdown) to.
+        convert: Convert a PDF, Word, Excel, PowerPoint, HTML or CSV attachment
+                 to Markdown instead of returning the file.
+
+    Returns:
+        The stored file path, the markdown text, or a confirmation message if
+        output_path was provided.
+    """
+    try:
+        return get_attachment(hash, output_path, convert)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
 # --- HubSpot tools (excludable with --exclude hubspot) ---
 
 if "hubspot" not in EXCLUDED:
@@ -78,6 +194,7 @@ if "hubspot" not in EXCLUDED:
     from tools.hubspot.create_company import create_company
     from tools.hubspot.update_company import update_company
     from tools.hubspot.get_company_projects import get_company_projects
+    from tools.hubspot.get_company_overview import get_company_overview
     from tools.hubspot.search_deals import search_projects
     from tools.hubspot.get_deal import get_project
     from tools.hubspot.create_deal import create_project
@@ -90,18 +207,29 @@ if "hubspot" not in EXCLUDED:
     from tools.hubspot.search_calls import search_calls
     from tools.hubspot.search_notes import search_notes
     from tools.hubspot.search_emails import search_emails
-
-    @mcp.tool()
+    from tools.hubspot.bulk_import import bulk_import
+    from tools.hubspot.export import export_objects
+    from tools.hubspot.pipeline_summary import pipeline_summary
+    from tools.hubspot.stage_velocity import stage_velocity
+    from tools.hubspot.changes_since import changes_since
+    from tools.hubspot.duplicates import find_duplicate_companies
+    from tools.hubspot.write_queue import get_write_queue, write_status
+    from tools.hubspot.prefetcher import prefetch_stats
+
+    # Resume sending writes queued before the last shutdown
+    get_write_queue()
+
+    @tool
     def hubspot_search_contacts(query: str, limit: int = 10) -> str:
         """Search HubSpot contacts by name or email."""
         return search_contacts(query, limit)
 
-    @mcp.tool()
+    @tool
     def hubspot_get_contact(contact_id: str) -> str:
         """Get a HubSpot contact by ID."""
         return get_contact(contact_id)
 
-    @mcp.tool()
+    @tool
     def hubspot_create_contact(
         email: str,
         firstname: str | None = None,
@@ -113,7 +241,7 @@ if "hubspot" not in EXCLUDED:
         """Create a HubSpot contact, optionally linked to a company."""
         return create_contact(email, firstname, lastname, phone, jobtitle, company_id)
 
-    @mcp.tool()
+    @tool
     def hubspot_update_contact(
         contact_id: str,
         email: str | None = None,
@@ -135,7 +263,7 @@ if "hubspot" not in EXCLUDED:
         """
         return update_contact(contact_id, email, firstname, lastname, phone, jobtitle)
 
-    @mcp.tool()
+    @tool
     def hubspot_search_companies(
         query: str | None = None, lead_status: str | None = None, limit: int = 10
     ) -> str:
@@ -150,7 +278,7 @@ if "hubspot" not in EXCLUDED:
         """
         return search_companies(query, lead_status, limit)
 
-    @mcp.tool()
+    @tool
     def hubspot_get_company(company_id: str) -> str:
         """
         Get a HubSpot company by ID.
@@ -159,7 +287,7 @@ if "hubspot" not in EXCLUDED:
         """
         return get_company(company_id)
 
-    @mcp.tool()
+    @tool
     def hubspot_create_company(
         name: str,
         domain: str | None = None,
@@ -170,9 +298,11 @@ if "hubspot" not in EXCLUDED:
         lead_status: str | None = None,
         product_types: list[str] | None = None,
         icp_tier: str | None = None,
+        allow_duplicate: bool = False,
     ) -> str:
         """
-        Create a new HubSpot company.
+        Create a new HubSpot company. Refuses if a company with the same domain
+        or a very similar name already exists, listing the matches.
 
         Args:
             name: Company name (required)
@@ -185,6 +315,7 @@ if "hubspot" not in EXCLUDED:
                          Active Customer, Revisit, or Uninterested
             product_types: List from: Single Family, Multi-Family, Condo (low-rise), Condo (high-rise)
             icp_tier: Ideal Customer Profile tier - must be: Tier 1, Tier 2, or Tier 3
+            allow_duplicate: Create anyway after confirming the matches are different companies
         """
         return create_company(
             name,
@@ -196,9 +327,10 @@ if "hubspot" not in EXCLUDED:
             lead_status,
             product_types,
             icp_tier,
+            allow_duplicate,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_update_company(
         company_id: str,
         name: str | None = None,
@@ -242,7 +374,7 @@ if "hubspot" not in EXCLUDED:
             icp_tier,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_get_company_projects(company_id: str) -> str:
         """
         Get all projects (deals) associated with a company.
@@ -253,10 +385,26 @@ if "hubspot" not in EXCLUDED:
         Returns:
             Formatted list of all projects linked to this company with details:
             name, stage, city, units, product type, launch date, map link.
+            Sorted by stage, then launch date.
         """
         return get_company_projects(company_id)
 
-    @mcp.tool()
+    @tool
+    def hubspot_company_overview(company_id: str, activity_limit: int = 5) -> str:
+        """
+        Get a full picture of a company in one call: company details, all projects,
+        contacts, and the most recent notes/calls/meetings/emails.
+
+        Prefer this over separate get_company, get_company_projects, and search
+        calls when preparing for a meeting or reviewing an account.
+
+        Args:
+            company_id: HubSpot company ID
+            activity_limit: Max recent activity entries (default 5)
+        """
+        return get_company_overview(company_id, activity_limit)
+
+    @tool
     def hubspot_search_projects(
         query: str | None = None,
         stage: str | None = None,
@@ -273,7 +421,7 @@ if "hubspot" not in EXCLUDED:
         """
         return search_projects(query, stage, limit)
 
-    @mcp.tool()
+    @tool
     def hubspot_get_project(project_id: str) -> str:
         """
         Get a real estate project by ID.
@@ -282,7 +430,7 @@ if "hubspot" not in EXCLUDED:
         """
         return get_project(project_id)
 
-    @mcp.tool()
+    @tool
     def hubspot_create_project(
         name: str,
         company_id: str,
@@ -319,7 +467,7 @@ if "hubspot" not in EXCLUDED:
             google_maps_link,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_update_project(
         project_id: str,
         name: str | None = None,
@@ -356,7 +504,7 @@ if "hubspot" not in EXCLUDED:
             google_maps_link,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_add_note(
         body: str,
         contact_id: str | None = None,
@@ -376,7 +524,7 @@ if "hubspot" not in EXCLUDED:
         """
         return add_note(body, contact_id, company_id, deal_id)
 
-    @mcp.tool()
+    @tool
     def hubspot_log_call(
         title: str,
         body: str | None = None,
@@ -420,7 +568,7 @@ if "hubspot" not in EXCLUDED:
             tz,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_log_meeting(
         title: str,
         body: str | None = None,
@@ -469,7 +617,7 @@ if "hubspot" not in EXCLUDED:
             attendee_ids,
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_list_users() -> str:
         """
         List all HubSpot users (owners) with their IDs.
@@ -479,7 +627,7 @@ if "hubspot" not in EXCLUDED:
         """
         return list_users()
 
-    @mcp.tool()
+    @tool
     def hubspot_search_meetings(
         contact_id: str | None = None,
         company_id: str | None = None,
@@ -507,7 +655,7 @@ if "hubspot" not in EXCLUDED:
             contact_id, company_id, deal_id, outcome, after_date, before_date, limit
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_search_calls(
         contact_id: str | None = None,
         company_id: str | None = None,
@@ -533,7 +681,7 @@ if "hubspot" not in EXCLUDED:
             contact_id, company_id, deal_id, after_date, before_date, limit
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_search_notes(
         contact_id: str | None = None,
         company_id: str | None = None,
@@ -559,7 +707,7 @@ if "hubspot" not in EXCLUDED:
             contact_id, company_id, deal_id, after_date, before_date, limit
         )
 
-    @mcp.tool()
+    @tool
     def hubspot_search_emails(
         contact_id: str | None = None,
         company_id: str | None = None,
@@ -567,6 +715,7 @@ if "hubspot" not in EXCLUDED:
         after_date: str | None = None,
         before_date: str | None = None,
         limit: int = 10,
+        mode: str = "full",
     ) -> str:
         """
         Search HubSpot emails by association, subject, or date range.
@@ -578,13 +727,157 @@ if "hubspot" not in EXCLUDED:
             after_date: Only emails after this date (YYYY-MM-DD)
             before_date: Only emails before this date (YYYY-MM-DD)
             limit: Max results (default 10)
+            mode: "full" (default) shows the whole body; "new" shows only each
+                  email's own text, without quoted replies, forwards or signatures
 
         At least one filter must be provided.
         """
         return search_emails(
-            contact_id, company_id, subject, after_date, before_date, limit
+            contact_id, company_id, subject, after_date, before_date, limit, mode
         )
 
+    @tool
+    def hubspot_bulk_import(
+        file_path: str,
+        object_type: str,
+        column_map: dict[str, str] | None = None,
+        restart: bool = False,
+    ) -> str:
+        """
+        Bulk import companies, contacts, or projects from a CSV or JSONL file.
+
+        Rows are streamed from disk, validated, and sent in batches of 100.
+        Progress is checkpointed in .local/, so rerunning the same file resumes
+        where a failed import stopped. Use this instead of per-record create
+        tools for lists of more than a handful of records.
+
+        Args:
+            file_path: Absolute path to a .csv or .jsonl file
+            object_type: companies, contacts, or deals
+            column_map: Optional mapping of file column -> HubSpot property name
+                        (e.g. {"Builder": "name"}). Columns already named after a
+                        property or alias (lead_status, icp_tier, stage, units) map
+                        automatically. A company_id column links contacts/projects.
+            restart: Ignore the saved checkpoint and start from the first row
+        """
+        return bulk_import(file_path, object_type, column_map, restart)
+
+    @tool
+    def hubspot_export(object_type: str, output_path: str | None = None) -> str:
+        """
+        Export every record of a HubSpot object type to a JSONL file on disk.
+
+        Use this instead of paging through search tools when you need all records
+        for analysis - it returns only the file path and row counts, not the data.
+
+        Args:
+            object_type: companies, contacts, deals, notes, calls, meetings, emails,
+                         or engagements (notes, calls, meetings and emails together)
+            output_path: Absolute path for the .jsonl file (default: .local/exports/)
+        """
+        return export_objects(object_type, output_path)
+
+    @tool
+    def hubspot_pipeline_summary(
+        upcoming_days: int = 90, include_closed: bool = False, refresh: bool = False
+    ) -> str:
+        """
+        Summarize the whole project pipeline: project counts, total units and next
+        launch dates grouped by stage, product type, city and owner, plus a list
+        of upcoming launches.
+
+        Use this for pipeline questions instead of paging through search_projects
+        per stage and adding numbers up yourself.
+
+        Args:
+            upcoming_days: Window for the upcoming launches list (default 90)
+            include_closed: Include Closed Lost and Cancelled projects (default False)
+            refresh: Rebuild the local snapshot from scratch (slow, rarely needed)
+        """
+        return pipeline_summary(upcoming_days, include_closed, refresh)
+
+    @tool
+    def hubspot_stage_velocity(
+        object_type: str = "deals",
+        group_by: str | None = None,
+        days: int = 365,
+        refresh: bool = False,
+        record_id: str | None = None,
+    ) -> str:
+        """
+        Report cycle times: median/mean days spent in each stage, how many
+        records are sitting in each stage now, and stage-to-stage transition
+        rates. Computed from HubSpot property history.
+
+        Use this for cycle time and conversion questions instead of reading
+        projects one by one.
+
+        Args:
+            object_type: deals (project stages) or companies (lead status)
+            group_by: Optional breakdown by owner or product_type
+            days: Only count stays and transitions ending in this many days (default 365)
+            refresh: Rebuild the local snapshot from scratch (slow, rarely needed)
+            record_id: Show one project's (or company's) stage timeline instead:
+                       each stage, when it was entered and how long it lasted
+        """
+        return stage_velocity(object_type, group_by, days, refresh, record_id)
+
+    @tool
+    def hubspot_changes_since(
+        since: str | None = None,
+        object_types: list[str] | None = None,
+        cursor: str = "default",
+    ) -> str:
+        """
+        List companies, contacts, projects and engagements modified since a time,
+        showing only the fields that changed (old -> new).
+
+        Call without `since` for a daily briefing: it continues from where the
+        last call with the same cursor left off (last 24 hours on first use).
+
+        Args:
+            since: ISO date/datetime (UTC if no offset) or epoch milliseconds
+            object_types: Any of companies, contacts, deals, notes, calls, meetings,
+                          emails, or engagements (default: all)
+            cursor: Name of the stored cursor, for separate briefing feeds
+        """
+        return changes_since(since, object_types, cursor)
+
+    @tool
+    def hubspot_find_duplicate_companies(
+        min_score: float = 0.85, limit: int = 25, refresh: bool = False
+    ) -> str:
+        """
+        Find likely duplicate companies: pairs sharing a website domain or with
+        near-identical names (ignoring words like Homes, LLC, Builders).
+
+        Args:
+            min_score: Minimum similarity from 0 to 1 (default 0.85; 1.0 = same domain)
+            limit: Max pairs to list (default 25)
+            refresh: Rebuild the local company snapshot from scratch (slow, rarely needed)
+        """
+        return find_duplicate_companies(min_score, limit, refresh)
+
+    @tool
+    def hubspot_write_status(handle: str | None = None) -> str:
+        """
+        Check writes queued for HubSpot in write-behind mode: how many are
+        pending, which failed and why, or the HubSpot ID for one handle.
+
+        Args:
+            handle: Local handle (local-...) returned when a write was queued
+        """
+        return write_status(handle)
+
+    @tool
+    def hubspot_prefetch_stats() -> str:
+        """
+        Show how often background prefetching turned a follow-up read (company,
+        its projects, its engagements) into a cache hit, and the learned odds
+        of each follow-up.
+        """
+        return prefetch_stats()
+
 
 # --- Conversion tools (excludable with --exclude conversions) ---
 
@@ -592,7 +885,7 @@ if "conversions" not in EXCLUDED:
     from tools.conversions.pdf_to_markdown import pdf_to_markdown
     from tools.conversions.docx_to_markdown import docx_to_markdown
 
-    @mcp.tool()
+    @tool
     def convert_pdf_to_markdown(file_path: str, output_path: str | None = None) -> str:
         """
         Convert a PDF file to Markdown text using markitdown.
@@ -606,7 +899,7 @@ if "conversions" not in EXCLUDED:
         """
         return pdf_to_markdown(file_path, output_path)
 
-    @mcp.tool()
+    @tool
     def convert_docx_to_markdown(file_path: str, output_path: str | None = None) -> str:
         """
         Convert a Word document (.doc/.docx) to Markdown text using markitdown.
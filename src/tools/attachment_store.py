@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ATTACHMENT_DIR = os.path.join(os.getenv("LOCAL_STORE_PATH", ".local"), "attachments")
+CHUNK_SIZE = 1024 * 1024
+CONVERTIBLE_EXTENSIONS = {"pdf", "doc", "docx", "xlsx", "pptx", "html", "htm", "csv"}
+# Characters of converted Markdown returned inline; the full text stays on disk
+MARKDOWN_EXCERPT_CHARS = 2000
+CONVERT_WORKERS = 4
+
+_convert_pool = ThreadPoolExecutor(max_workers=CONVERT_WORKERS)
+
+
+def blob_path(digest: str) -> str:
+    """Location of a stored attachment by its SHA-256 hex digest."""
+    return os.path.join(ATTACHMENT_DIR, digest[:2], digest)
+
+
+def store_stream(stream: BinaryIO) -> tuple[str, int]:
+    """
+    Copy a binary stream into the store in chunks, hashing as it goes.
+
+    Returns the SHA-256 hex digest and size. Content already in the store is
+    not written twice.
+    """
+    os.makedirs(ATTACHMENT_DIR, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=ATTACHMENT_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := stream.read(CHUNK_SIZE):
+                sha.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        digest = sha.hexdigest()
+        path = blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest, size
+
+
+def store_attachment(name: str, mime_type: str, stream: BinaryIO) -> dict[str, Any]:
+    """Store an attachment's content and return its handle (name, size, mimeType, hash)."""
+    digest, size = store_stream(stream)
+    meta_path = f"{blob_path(digest)}.json"
+    if not os.path.exists(meta_path):
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"name": name, "mimeType": mime_type, "size": size}, f)
+    return {
+        "name": name,
+        "extension": name.rsplit(".", 1)[-1] if "." in name else "",
+        "size": size,
+        "mimeType": mime_type,
+        "hash": digest,
+    }
+
+
+def markdown_path(digest: str) -> str:
+    """Where a stored attachment's converted Markdown is kept."""
+    return f"{blob_path(digest)}.md"
+
+
+def is_convertible(handle: dict[str, Any]) -> bool:
+    return handle.get("extension", "").lower() in CONVERTIBLE_EXTENSIONS
+
+
+def convert_to_markdown(digest: str, extension: str) -> str:
+    """Markdown for a stored attachment, converted once and kept beside it."""
+    path = markdown_path(digest)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    from tools.conversions import md_converter
+
+    markdown = md_converter.convert_local(
+        blob_path(digest), file_extension=f".{extension.lower()}"
+    ).markdown
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(markdown)
+    os.replace(tmp_path, path)
+    return markdown
+
+
+def _convert_handle(handle: dict[str, Any]) -> dict[str, Any]:
+    try:
+        markdown = convert_to_markdown(handle["hash"], handle["extension"])
+    except Exception as err:
+        return {"error": f"{type(err).__name__}: {err}"}
+    return {
+        "path": os.path.abspath(markdown_path(handle["hash"])),
+        "chars": len(markdown),
+        "excerpt": markdown[:MARKDOWN_EXCERPT_CHARS],
+        "truncated": len(markdown) > MARKDOWN_EXCERPT_CHARS,
+    }
+
+
+def start_conversion(handle: dict[str, Any]) -> Future:
+    """
+    Convert a stored attachment to Markdown on a worker thread.
+
+    The future resolves to {"path", "chars", "excerpt", "truncated"}, or
+    {"error"} if conversion failed.
+    """
+    return _convert_pool.submit(_convert_handle, handle)
+
+
+def get_attachment(
+    digest: str, output_path: str | None = None, convert: bool = False
+) -> str:
+    """
+    Fetch a stored email attachment by hash, optionally converted to Markdown.
+
+    Without output_path, returns the stored file's path (or the Markdown when
+    converting). With output_path, copies the file (or saves the Markdown) there.
+    """
+    digest = digest.strip().lower()
+    path = blob_path(digest)
+    if len(digest) != 64 or not os.path.isfile(path):
+        return f"Error: Attachment not found: {digest}"
+
+    if not convert:
+        if not output_path:
+            return path
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        shutil.copyfile(path, output_path)
+        return f"Saved attachment to {output_path}"
+
+    meta: dict[str, Any] = {}
+    if os.path.exists(f"{path}.json"):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    name = meta.get("name", "")
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension not in CONVERTIBLE_EXTENSIONS:
+        return f"Error: Cannot convert .{extension or '?'} attachments to Markdown"
+
+    markdown = convert_to_markdown(digest, extension)
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        return f"Saved markdown to {output_path}"
+    return markdown
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("hash")
+    parser.add_argument("--output", "-o")
+    parser.add_argument("--convert", "-c", action="store_true")
+    args = parser.parse_args()
+    print(get_attachment(args.hash, args.output, args.convert))
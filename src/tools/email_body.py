@@ -0,0 +1,116 @@
+import re
+
+BODY_MODES = ("full", "new")
+
+# A line where quoted history starts: everything from here on is dropped
+_HISTORY_START = re.compile(
+    "(?:"
+    + "|".join(
+        [
+            # Gmail / Apple Mail / Thunderbird, plus German, French, Spanish
+            r"on\b.{0,200}\bwrote:",
+            r"am\b.{0,200}\bschrieb.{0,80}:",
+            r"le\b.{0,200}\ba\s+[ée]crit\s*:",
+            r"el\b.{0,200}\bescribi[óo]\s*:",
+            # Outlook
+            r"-{2,}\s*original message\s*-{2,}",
+            r"_{10,}",
+            # Forwards
+            r"-{2,}\s*forwarded message\s*-{2,}",
+            r"begin forwarded message:",
+            # Signatures with a delimiter or a mobile client footer
+            r"--",
+            r"sent from my \w+",
+            r"get outlook for \w+",
+        ]
+    )
+    + r")\s*$",
+    re.I,
+)
+# Start of an Outlook-style header block ("From: ..." then "Sent:"/"Date:")
+_HEADER_FROM = re.compile(r"\*?(from|von|de)\s*:\*?\s", re.I)
+_HEADER_FOLLOW = re.compile(r"\*?(sent|date|gesendet|envoy[ée]|enviado)\s*:", re.I)
+# "On Mon, Jan 1, 2024 at 9:00 AM Jane Doe <jane@" wrapped before "wrote:"
+_WRAPPED_ON = re.compile(r"(on|am|le|el)\s.{0,200}$", re.I)
+_SIGN_OFF = re.compile(
+    r"(best( regards| wishes)?|kind regards|warm regards|regards|thanks( again)?|"
+    r"thank you|many thanks|cheers|sincerely|all the best|talk soon)[,.!]?",
+    re.I,
+)
+# Lines after a sign-off are treated as a signature only if there are few
+# and each looks like a name, title, phone number, address or link
+MAX_SIGNATURE_LINES = 8
+MAX_SIGNATURE_WORDS = 6
+_CONTACT_LINE = re.compile(
+    r"(\S+@\S+\.\w+|(https?://|www\.)\S+|\[LINK\]|"
+    r"([a-z]{1,6}\.?\s*:?\s*)?\+?[\d\s().\-/]{7,}(\s*(x|ext\.?)\s*\d+)?)",
+    re.I,
+)
+
+
+def _is_signature_line(line: str) -> bool:
+    if _CONTACT_LINE.fullmatch(line):
+        return True
+    words = len(line.split())
+    # Sentences, questions, list items and lead-ins are message text;
+    # a short line ending in "." can still be a name ("Acme Homes Inc.")
+    if line[-1] in "?!:;" or line[0] in "-*•" or line[0].isdigit():
+        return False
+    if line[-1] == "." and words > 3:
+        return False
+    return words <= MAX_SIGNATURE_WORDS
+
+
+def reduce_body(body: str, mode: str = "new") -> str:
+    """
+    Reduce an email body for reading.
+
+    "full" returns it unchanged. "new" keeps only what the sender wrote in
+    this message: quoted replies (">" lines, "On ... wrote:", Outlook
+    From/Sent header blocks, "Original Message" separators), forwarded
+    messages and signatures are cut in one pass over the lines.
+    """
+    if mode not in BODY_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(BODY_MODES)}")
+    if mode == "full" or not body:
+        return body
+
+    lines = body.splitlines()
+    # Non-blank line indexes, so look-ahead skips the blank lines between
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    kept: list[int] = []
+    last_sign_off = -1
+    for n, i in enumerate(content):
+        line = lines[i].strip()
+        if line.startswith(">"):
+            continue
+        following = [lines[j].strip() for j in content[n + 1 : n + 4]]
+        if _HISTORY_START.match(line):
+            break
+        if _HEADER_FROM.match(line) and any(_HEADER_FOLLOW.match(f) for f in following):
+            break
+        if (
+            following
+            and _WRAPPED_ON.match(line)
+            and _HISTORY_START.match(f"{line} {following[0]}")
+        ):
+            break
+        if _SIGN_OFF.fullmatch(line):
+            last_sign_off = len(kept)
+        kept.append(i)
+
+    if last_sign_off >= 0:
+        after = [lines[i].strip() for i in kept[last_sign_off + 1 :]]
+        # Only a sign-off followed by nothing but signature lines ends the message
+        if len(after) <= MAX_SIGNATURE_LINES and all(map(_is_signature_line, after)):
+            kept = kept[: last_sign_off + 1]
+    if not kept:
+        return ""
+    # Keep the blank lines between kept lines so paragraphs survive
+    kept_set = set(kept)
+    text = "\n".join(
+        lines[j]
+        for j in range(kept[0], kept[-1] + 1)
+        if j in kept_set or not lines[j].strip()
+    )
+    return re.sub(r"\n\s*\n\s*\n+", "\n\n", text).strip()
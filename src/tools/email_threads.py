@@ -0,0 +1,235 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+THREAD_DB_PATH = os.path.join(os.getenv("LOCAL_STORE_PATH", ".local"), "threads.db")
+# Reply/forward prefixes, including common non-English clients (AW, SV, WG, RV)
+SUBJECT_PREFIX = re.compile(r"^\s*((re|fw|fwd|aw|sv|wg|rv|tr)(\[\d+\])?\s*:\s*)+", re.I)
+# Shorter paragraphs ("Thanks,", "Best") are kept even if seen before
+MIN_DEDUP_LENGTH = 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    subject_key TEXT NOT NULL,
+    sent_on INTEGER NOT NULL,
+    file TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_thread ON messages(thread_id);
+CREATE INDEX IF NOT EXISTS messages_subject ON messages(subject_key);
+CREATE INDEX IF NOT EXISTS messages_file ON messages(file);
+CREATE TABLE IF NOT EXISTS refs (
+    message_id TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    PRIMARY KEY (message_id, ref)
+);
+CREATE INDEX IF NOT EXISTS refs_ref ON refs(ref);
+"""
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(THREAD_DB_PATH)), exist_ok=True)
+        # Worker processes of parse_email_directory write concurrently
+        conn = sqlite3.connect(THREAD_DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def subject_key(subject: str) -> str:
+    """Subject without reply/forward prefixes, lowercased and space-collapsed."""
+    return " ".join(SUBJECT_PREFIX.sub("", subject or "").lower().split())
+
+
+def index_email(file_path: str, email: dict[str, Any]) -> str:
+    """
+    Add a parsed email to the thread index and return its thread ID.
+
+    Messages are joined by Message-ID, In-Reply-To and References in either
+    direction, so threads assemble whatever order files are parsed in. A reply
+    with no resolvable references falls back to its normalized subject.
+    """
+    file_path = os.path.abspath(file_path)
+    message_id = email.get("messageId") or (
+        "file:" + hashlib.sha1(file_path.encode()).hexdigest()
+    )
+    refs = [r for r in email.get("references", []) if r != message_id]
+    if email.get("inReplyTo") and email["inReplyTo"] not in refs:
+        refs.append(email["inReplyTo"])
+    key = subject_key(email.get("subject", ""))
+    is_reply = bool(refs) or key != " ".join(
+        (email.get("subject") or "").lower().split()
+    )
+    data = {k: v for k, v in email.items() if k != "error"}
+
+    conn = _connect()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        threads: set[str] = set()
+        if refs:
+            marks = ",".join("?" * len(refs))
+            threads.update(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT thread_id FROM messages WHERE message_id IN ({marks})",
+                    refs,
+                )
+            )
+        threads.update(
+            row[0]
+            for row in conn.execute(
+                "SELECT m.thread_id FROM refs r JOIN messages m"
+                " ON m.message_id = r.message_id WHERE r.ref = ?",
+                (message_id,),
+            )
+        )
+        existing = conn.execute(
+            "SELECT thread_id FROM messages WHERE message_id = ?", (message_id,)
+        ).fetchone()
+        if existing:
+            threads.add(existing[0])
+        if not threads and is_reply and key:
+            row = conn.execute(
+                "SELECT thread_id FROM messages WHERE subject_key = ?"
+                " ORDER BY sent_on LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row:
+                threads.add(row[0])
+
+        thread_id = min(threads) if threads else message_id
+        for other in threads - {thread_id}:
+            conn.execute(
+                "UPDATE messages SET thread_id = ? WHERE thread_id = ?",
+                (thread_id, other),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                message_id,
+                thread_id,
+                key,
+                int(email.get("sentOn") or 0),
+                file_path,
+                json.dumps(data, default=str),
+            ),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO refs VALUES (?, ?)",
+            [(message_id, ref) for ref in refs],
+        )
+    return thread_id
+
+
+def _paragraph_key(paragraph: str) -> str:
+    lines = [line.lstrip("> ").strip() for line in paragraph.splitlines()]
+    return " ".join(" ".join(lines).lower().split())
+
+
+def _new_paragraphs(body: str, seen: set[str]) -> tuple[list[str], int]:
+    kept = []
+    dropped = 0
+    for paragraph in body.split("\n\n"):
+        key = _paragraph_key(paragraph)
+        if not key:
+            continue
+        if len(key) >= MIN_DEDUP_LENGTH:
+            if key in seen:
+                dropped += 1
+                continue
+            seen.add(key)
+        kept.append(paragraph)
+    return kept, dropped
+
+
+def get_email_thread(
+    file_path: str | None = None,
+    message_id: str | None = None,
+    max_messages: int = 50,
+) -> str:
+    """
+    Return the whole thread an indexed email belongs to, oldest first, with
+    paragraphs already shown earlier in the thread (quoted replies) removed.
+
+    Args:
+        file_path: An email file that has been parsed with parse_email
+        message_id: Or the Message-ID of any message in the thread
+        max_messages: Max messages to include (default 50; the most recent are kept)
+    """
+    if not file_path and not message_id:
+        return "Error: Provide file_path or message_id"
+
+    conn = _connect()
+    if message_id:
+        row = conn.execute(
+            "SELECT thread_id FROM messages WHERE message_id = ?", (message_id,)
+        ).fetchone()
+    else:
+        row = conn.execute(
+            "SELECT thread_id FROM messages WHERE file = ?",
+            (os.path.abspath(file_path),),
+        ).fetchone()
+    if not row:
+        return "Error: Email not indexed yet; parse it with parse_email_file first"
+
+    rows = conn.execute(
+        "SELECT data FROM messages WHERE thread_id = ? ORDER BY sent_on, message_id",
+        (row[0],),
+    ).fetchall()
+    emails = [json.loads(data) for (data,) in rows]
+
+    seen: set[str] = set()
+    sections = []
+    total_dropped = 0
+    for email in emails:
+        kept, dropped = _new_paragraphs(email.get("body", ""), seen)
+        total_dropped += dropped
+        sent = datetime.fromtimestamp(email.get("sentOn", 0) / 1000, timezone.utc)
+        header = [
+            f"--- {sent.strftime('%Y-%m-%d %H:%M UTC')} | {email.get('subject') or '(no subject)'}",
+            f"From: {email.get('from', '')}",
+        ]
+        if email.get("to"):
+            header.append(f"To: {', '.join(email['to'])}")
+        if email.get("cc"):
+            header.append(f"Cc: {', '.join(email['cc'])}")
+        if email.get("attachments"):
+            names = ", ".join(a["name"] for a in email["attachments"])
+            header.append(f"Attachments: {names}")
+        sections.append("\n".join(header) + "\n\n" + "\n\n".join(kept))
+
+    shown = sections[-max_messages:]
+    plural = "s" if len(emails) != 1 else ""
+    output = [f"Thread of {len(emails)} message{plural}"]
+    if len(sections) > len(shown):
+        output[0] += f" (showing the last {len(shown)})"
+    if total_dropped:
+        output[0] += f"; {total_dropped} repeated quoted paragraphs removed"
+    return "\n\n".join(output + shown)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", dest="file_path")
+    parser.add_argument("--message-id")
+    parser.add_argument("--max-messages", type=int, default=50)
+    args = parser.parse_args()
+    print(get_email_thread(args.file_path, args.message_id, args.max_messages))
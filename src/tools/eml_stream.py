@@ -0,0 +1,296 @@
+import io
+import re
+import secrets
+import binascii
+from email import policy
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import BinaryIO
+
+# Header added to parts whose body was cut out, pointing at it in the file
+PART_HEADER = "X-Parse-Email-Part"
+# Longest piece of a line read at once (8bit attachments may have no newlines)
+MAX_LINE_BYTES = 64 * 1024
+READ_BYTES = 1024 * 1024
+_BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+_NOT_BASE64 = re.compile(rb"[^A-Za-z0-9+/]")
+_INLINE_ENCODINGS = ("", "7bit", "8bit", "binary")
+
+
+class EmlParts:
+    """Where the bodies cut out of one .eml file by strip_parts are."""
+
+    def __init__(self, path: str):
+        self.path = path
+        # Random, so a header of the same name in the email itself is ignored
+        self.token = secrets.token_hex(8)
+        self.spans: list[list[int]] = []
+
+    def add(self) -> int:
+        """Reserve a span; returns its index, for the PART_HEADER value."""
+        self.spans.append([0, 0])
+        return len(self.spans) - 1
+
+    def span(self, part: Message) -> tuple[int, int] | None:
+        """(start, end) file offsets of a part's raw body, if it was cut out."""
+        token, _, index = str(part.get(PART_HEADER, "")).partition(":")
+        if token != self.token or not index.isdigit():
+            return None
+        if int(index) >= len(self.spans):
+            return None
+        start, end = self.spans[int(index)]
+        return start, end
+
+    def reader(self, part: Message) -> "PartReader":
+        start, end = self.span(part) or (0, 0)
+        encoding = str(part.get("content-transfer-encoding", "")).strip().lower()
+        return PartReader(self.path, start, end, encoding)
+
+
+def decoded_size(encoding: str, raw_size: int) -> int:
+    """About how many bytes a body of raw_size encoded bytes decodes to."""
+    if encoding == "base64":
+        return raw_size * 3 // 4
+    return raw_size
+
+
+class PartReader(io.RawIOBase):
+    """
+    Decodes one part's body straight from the file, a chunk at a time, so
+    memory stays bounded by READ_BYTES however large the attachment is.
+    Reads may return more or less than the size asked for.
+    """
+
+    def __init__(self, path: str, start: int, end: int, encoding: str):
+        super().__init__()
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+        self._encoding = encoding
+        self._carry = b""
+        self._newlines = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while self._remaining > 0 or self._carry or self._newlines:
+            raw = self._file.read(min(READ_BYTES, self._remaining))
+            self._remaining = self._remaining - len(raw) if raw else 0
+            data = self._decode(raw, final=self._remaining == 0)
+            if data:
+                return data
+        return b""
+
+    def _decode(self, raw: bytes, final: bool) -> bytes:
+        if self._encoding not in ("base64", "binary"):
+            # Text bodies get "\n" line endings, as the stdlib parser gives them
+            raw = self._newlines + raw
+            self._newlines = b"" if final or not raw.endswith(b"\r") else b"\r"
+            raw = raw[: len(raw) - len(self._newlines)].replace(b"\r\n", b"\n")
+        if self._encoding == "base64":
+            raw = raw.translate(None, b" \t\r\n")
+            if raw.translate(None, _BASE64_ALPHABET):
+                raw = _NOT_BASE64.sub(b"", raw)
+            data = self._carry + raw
+            cut = len(data) if final else len(data) - len(data) % 4
+            chunk, self._carry = data[:cut], data[cut:]
+            if len(chunk) % 4 == 1:
+                chunk = chunk[:-1]
+            return binascii.a2b_base64(chunk + b"=" * (-len(chunk) % 4))
+        if self._encoding == "quoted-printable":
+            data = self._carry + raw
+            # Soft line breaks end a line, so decode whole lines only
+            cut = len(data) if final else data.rfind(b"\n") + 1
+            chunk, self._carry = data[:cut], data[cut:]
+            return binascii.a2b_qp(chunk)
+        return raw
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+class _Lines:
+    """A file's lines with their offsets; over-long lines come in pieces."""
+
+    def __init__(self, f: BinaryIO):
+        self._file = f
+        self._offset = 0
+        self._at_line_start = True
+        self._pushed: tuple[int, bytes, bool] | None = None
+
+    @property
+    def position(self) -> int:
+        return self._pushed[0] if self._pushed else self._offset
+
+    def next(self) -> tuple[int, bytes, bool] | None:
+        """(offset, data, whether data starts a line), or None at the end."""
+        if self._pushed:
+            item, self._pushed = self._pushed, None
+            return item
+        data = self._file.readline(MAX_LINE_BYTES)
+        if not data:
+            return None
+        item = (self._offset, data, self._at_line_start)
+        self._offset += len(data)
+        self._at_line_start = data.endswith(b"\n")
+        return item
+
+    def push(self, item: tuple[int, bytes, bool]) -> None:
+        self._pushed = item
+
+    def skip_to(self, prefix: bytes) -> None:
+        """Skip to the next line starting with prefix, a chunk at a time."""
+        if self._pushed:
+            if self._pushed[2] and self._pushed[1].startswith(prefix):
+                return
+            self._pushed = None
+        while True:
+            chunk = self._file.read(READ_BYTES)
+            if self._at_line_start and chunk.startswith(prefix):
+                found = 0
+            else:
+                found = chunk.find(b"\n" + prefix) + 1
+            if found:
+                self._offset += found
+                self._at_line_start = True
+                break
+            if len(chunk) < READ_BYTES:
+                self._offset += len(chunk)
+                self._at_line_start = chunk.endswith(b"\n") or (
+                    self._at_line_start and not chunk
+                )
+                break
+            # Keep an overlap so a match split across chunks is still found
+            self._offset += len(chunk) - len(prefix)
+            self._at_line_start = chunk[-len(prefix) - 1 : -len(prefix)] == b"\n"
+            self._file.seek(self._offset)
+        self._file.seek(self._offset)
+
+    def line_break_before(self, offset: int) -> int:
+        """Length of the line break ending just before offset."""
+        self._file.seek(max(0, offset - 2))
+        before = self._file.read(min(2, offset))
+        self._file.seek(self._offset)
+        if before.endswith(b"\r\n"):
+            return 2
+        return 1 if before.endswith(b"\n") else 0
+
+
+def _boundary(item: tuple[int, bytes, bool], boundaries: list[bytes]):
+    """(boundary, closing) if the line is a delimiter of an open multipart."""
+    _, data, starts = item
+    if not starts or not data.startswith(b"--"):
+        return None
+    line = data.rstrip()
+    for boundary in reversed(boundaries):
+        if line == b"--" + boundary:
+            return boundary, False
+        if line == b"--" + boundary + b"--":
+            return boundary, True
+    return None
+
+
+def _skip_body(lines: _Lines, boundaries: list[bytes], start: int) -> int:
+    """Skip to the next delimiter; returns the body's end offset."""
+    while True:
+        lines.skip_to(b"--")
+        item = lines.next()
+        if item is None:
+            return lines.position
+        if _boundary(item, boundaries):
+            lines.push(item)
+            # The line break before a delimiter belongs to the delimiter
+            return max(start, item[0] - lines.line_break_before(item[0]))
+
+
+def _scan_entity(
+    lines: _Lines,
+    out: io.BytesIO,
+    parts: EmlParts,
+    boundaries: list[bytes],
+    top: bool = False,
+) -> None:
+    header_lines = []
+    blank = None
+    while (item := lines.next()) is not None:
+        if _boundary(item, boundaries):
+            lines.push(item)
+            break
+        if item[1] in (b"\n", b"\r\n"):
+            blank = item[1]
+            break
+        header_lines.append(item[1])
+    headers = b"".join(header_lines)
+    out.write(headers)
+    if blank is None:
+        return
+
+    info = BytesHeaderParser(policy=policy.compat32).parsebytes(headers)
+    content_type = info.get_content_type()
+    boundary = info.get_boundary()
+    encoding = str(info.get("content-transfer-encoding", "")).strip().lower()
+    disposition = str(info.get("content-disposition", "")).strip().lower()
+    nested = (
+        not top and content_type == "message/rfc822" and encoding in _INLINE_ENCODINGS
+    )
+    cut = (
+        not top
+        and info.get_content_maintype() != "multipart"
+        and content_type != "message/rfc822"
+        and info.get_filename() is not None
+        and (
+            disposition.startswith("attachment")
+            or info.get_content_maintype() != "text"
+        )
+    )
+
+    if nested or cut:
+        index = parts.add()
+        out.write(f"{PART_HEADER}: {parts.token}:{index}".encode() + blank)
+    out.write(blank)
+
+    if nested:
+        start = lines.position
+        _scan_entity(lines, out, parts, boundaries)
+        parts.spans[index] = [start, lines.position]
+        return
+    if cut:
+        start = lines.position
+        parts.spans[index] = [start, _skip_body(lines, boundaries, start)]
+        return
+
+    inner = (
+        boundaries + [boundary.encode("utf-8", "surrogateescape")]
+        if boundary
+        else boundaries
+    )
+    is_multipart = info.get_content_maintype() == "multipart" and boundary
+    while (item := lines.next()) is not None:
+        found = _boundary(item, inner)
+        if not found:
+            out.write(item[1])
+            continue
+        if not is_multipart or found[0] != inner[-1]:
+            lines.push(item)
+            return
+        out.write(item[1])
+        if not found[1]:
+            _scan_entity(lines, out, parts, inner)
+
+
+def strip_parts(f: BinaryIO, parts: EmlParts) -> io.BytesIO:
+    """
+    Copy an RFC 822 message without its attachment bodies, for the stdlib
+    parser, which would otherwise hold every attachment in memory (and
+    decode it) whether or not it's stored.
+
+    Each cut part gets a PART_HEADER header, and parts records where its
+    body is in the file so it can be sized and streamed later. Attached
+    messages stay inline, with their spans recorded for sizing.
+    """
+    out = io.BytesIO()
+    _scan_entity(_Lines(f), out, parts, [], top=True)
+    out.seek(0)
+    return out
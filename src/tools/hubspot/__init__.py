@@ -1,11 +1,24 @@
 import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import requests
+from typing import Any, Iterable, Iterator
 from dotenv import load_dotenv
 
 load_dotenv()
 
 HUBSPOT_TOKEN = os.getenv("HUBSPOT_ACCESS_TOKEN")
 BASE_URL = os.getenv("HUBSPOT_BASE_URL", "https://api.hubapi.com")
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", ".local")
+
+# Private apps are limited to 100 requests per 10 seconds
+RATE_LIMIT = int(os.getenv("HUBSPOT_RATE_LIMIT", "100"))
+RATE_WINDOW = 10.0
+BATCH_SIZE = 100
 
 CONTACT_PROPERTIES = ["firstname", "lastname", "email", "phone", "jobtitle"]
 
@@ -38,6 +51,9 @@ PRODUCT_TYPE_VALUES = [
     "Condo (low-rise)",
     "Condo (high-rise)",
 ]
+# Options of the deals product_type property, loaded separately from the
+# companies product_types ones
+DEAL_PRODUCT_TYPE_VALUES = list(PRODUCT_TYPE_VALUES)
 
 DEAL_PROPERTIES = [
     "dealname",
@@ -49,6 +65,8 @@ DEAL_PROPERTIES = [
     "google_maps_link",
 ]
 
+# Defaults below are replaced by live values from HubSpot, see load_metadata()
+
 # Maps user-friendly stage labels to HubSpot internal names
 DEAL_STAGES = {
     "Rumored": "appointmentscheduled",
@@ -63,6 +81,9 @@ DEAL_STAGES = {
 # Reverse mapping for display
 DEAL_STAGES_REVERSE = {v: k for k, v in DEAL_STAGES.items()}
 
+# Stages where a project is finished (Closed Lost, Cancelled)
+CLOSED_DEAL_STAGES = ["closedlost", "1295465318"]
+
 # ICP Tier mapping (label -> internal)
 ICP_TIERS = {
     "Tier 1": "tier_1",
@@ -77,6 +98,8 @@ ASSOC_IDS = {
     "call": {"contact": 194, "company": 182, "deal": 206},
     "meeting": {"contact": 200, "company": 188, "deal": 212},
 }
+# Default association type IDs between CRM objects, keyed "from/to"
+OBJECT_ASSOC_IDS = {"contacts/companies": 279, "deals/companies": 341}
 
 CALL_OUTCOMES = {
     "Connected": "f240bbac-87c9-4f6e-bf70-924b57d47db7",
@@ -87,9 +110,18 @@ CALL_OUTCOMES = {
     "Wrong number": "17b47fee-58de-441e-a44c-c6300d46f273",
 }
 
+CALL_OUTCOMES_REVERSE = {v: k for k, v in CALL_OUTCOMES.items()}
+
 MEETING_OUTCOMES = ["SCHEDULED", "COMPLETED", "RESCHEDULED", "NO_SHOW", "CANCELLED"]
 
 
+def load_metadata() -> None:
+    """Refresh enum values and association IDs from the on-disk metadata cache."""
+    from tools.hubspot.metadata import ensure_metadata
+
+    ensure_metadata()
+
+
 def build_associations(
     engagement_type: str,
     contact_id: str | None = None,
@@ -97,6 +129,7 @@ def build_associations(
     deal_id: str | None = None,
 ) -> list[dict]:
     """Build associations array for engagement creation."""
+    load_metadata()
     associations = []
     ids = ASSOC_IDS[engagement_type]
 
@@ -147,6 +180,287 @@ def headers():
     }
 
 
+_rate_lock = threading.Lock()
+_request_times: deque[float] = deque()
+
+
+def rate_headroom() -> int:
+    """Requests still available in the current rate window (negative when callers are queued)."""
+    with _rate_lock:
+        now = time.monotonic()
+        recent = sum(1 for t in _request_times if now - t < RATE_WINDOW)
+    return RATE_LIMIT - recent
+
+
+def throttle() -> None:
+    """Block until another request fits inside the HubSpot rate window."""
+    # Reserve a slot under the lock and sleep outside it, so waiting callers
+    # don't hold up each other or rate_headroom
+    with _rate_lock:
+        now = time.monotonic()
+        while _request_times and now - _request_times[0] >= RATE_WINDOW:
+            _request_times.popleft()
+        start = now
+        if len(_request_times) >= RATE_LIMIT:
+            # Slots may be in the future; ours opens when the one RATE_LIMIT
+            # back leaves the window
+            start = max(now, _request_times[-RATE_LIMIT] + RATE_WINDOW)
+        _request_times.append(start)
+    if start > now:
+        time.sleep(start - now)
+
+
+_inflight_lock = threading.Lock()
+_inflight: dict[str, Future] = {}
+
+
+def _coalesce_key(method: str, url: str, kwargs: dict[str, Any]) -> str | None:
+    """Key identical reads (GETs and batch reads) so concurrent callers can share one."""
+    if method != "GET" and not url.endswith("/batch/read"):
+        return None
+    params = dict(kwargs.get("params") or {})
+    if isinstance(params.get("properties"), str):
+        params["properties"] = ",".join(sorted(params["properties"].split(",")))
+    body = dict(kwargs.get("json") or {})
+    if isinstance(body.get("properties"), list):
+        body["properties"] = sorted(body["properties"])
+    return json.dumps([method, url, params, body], sort_keys=True, default=str)
+
+
+def api_request(
+    method: str, url: str, retries: int = 3, **kwargs: Any
+) -> requests.Response:
+    """
+    Rate-limited HubSpot request that backs off and retries on 429/5xx.
+
+    Identical GETs and batch reads already in flight on another thread are not
+    re-sent; the caller waits for and shares the in-flight response instead.
+    """
+    key = _coalesce_key(method, url, kwargs)
+    if key is None:
+        return _send(method, url, retries, **kwargs)
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if future is None:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        resp = _send(method, url, retries, **kwargs)
+        future.set_result(resp)
+        return resp
+    except BaseException as err:
+        future.set_exception(err)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _send(method: str, url: str, retries: int, **kwargs: Any) -> requests.Response:
+    attempt = 0
+    while True:
+        throttle()
+        resp = requests.request(method, url, headers=headers(), **kwargs)
+        if (resp.status_code != 429 and resp.status_code < 500) or attempt >= retries:
+            return resp
+        time.sleep(float(resp.headers.get("Retry-After", 2**attempt)))
+        attempt += 1
+
+
+def iter_object_pages(
+    object_type: str,
+    properties: list[str],
+    associations: list[str] | None = None,
+    page_size: int = 100,
+) -> Iterator[list[dict]]:
+    """Yield every object of a type, one page at a time, following paging cursors."""
+    url = f"{BASE_URL}/crm/v3/objects/{object_type}"
+    params: dict[str, Any] = {"limit": page_size, "properties": ",".join(properties)}
+    if associations:
+        params["associations"] = ",".join(associations)
+    while True:
+        resp = api_request("GET", url, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        yield data.get("results", [])
+        after = data.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            return
+        params["after"] = after
+
+
+# Contacts predate the hs_ prefix for their last-modified property
+MODIFIED_PROPERTY = {"contacts": "lastmodifieddate"}
+
+
+def iter_modified_since(
+    object_type: str, properties: list[str], since_ms: int
+) -> Iterator[list[dict]]:
+    """Yield pages of objects modified at or after an epoch-ms timestamp, oldest first."""
+    modified = MODIFIED_PROPERTY.get(object_type, "hs_lastmodifieddate")
+    url = f"{BASE_URL}/crm/v3/objects/{object_type}/search"
+    payload: dict[str, Any] = {
+        "filterGroups": [
+            {
+                "filters": [
+                    {"propertyName": modified, "operator": "GTE", "value": since_ms}
+                ]
+            }
+        ],
+        "sorts": [{"propertyName": modified, "direction": "ASCENDING"}],
+        "properties": [*properties, modified],
+        "limit": 100,
+    }
+    while True:
+        resp = api_request("POST", url, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
+        yield data.get("results", [])
+        after = data.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            return
+        payload["after"] = after
+
+
+def get_associated_ids(from_type: str, from_id: str, to_type: str) -> list[str]:
+    """Page through every association from one object to another object type."""
+    from tools.hubspot.cache import cache_associations, get_cached_associations
+
+    cached = get_cached_associations(from_type, from_id, to_type)
+    if cached is not None:
+        return cached
+    url = f"{BASE_URL}/crm/v4/objects/{from_type}/{from_id}/associations/{to_type}"
+    params: dict[str, Any] = {"limit": 500}
+    ids: list[str] = []
+    while True:
+        resp = api_request("GET", url, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        ids.extend(str(r["toObjectId"]) for r in data.get("results", []))
+        after = data.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            cache_associations(from_type, from_id, to_type, ids)
+            return ids
+        params["after"] = after
+
+
+def _read_chunk(object_type: str, ids: list[str], properties: list[str]) -> list[dict]:
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{object_type}/batch/read",
+        json={"properties": properties, "inputs": [{"id": i} for i in ids]},
+    )
+    resp.raise_for_status()
+    return resp.json().get("results", [])
+
+
+def batch_read(object_type: str, ids: list[str], properties: list[str]) -> list[dict]:
+    """Read objects by ID in API-sized chunks, sent concurrently."""
+    chunks = [ids[i : i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pages = pool.map(
+            lambda chunk: _read_chunk(object_type, chunk, properties), chunks
+        )
+        return [obj for page in pages for obj in page]
+
+
+def iter_batch_read(
+    object_type: str, ids: list[str], properties: list[str]
+) -> Iterator[list[dict]]:
+    """Like batch_read, but yields each chunk's results as soon as it arrives."""
+    chunks = [ids[i : i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(_read_chunk, object_type, chunk, properties) for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def batch_error_messages(data: dict[str, Any]) -> dict[str, str]:
+    """Messages of a 207 response's errors, by objectWriteTraceId where given."""
+    messages = {}
+    for error in data.get("errors", []):
+        traces = error.get("context", {}).get("objectWriteTraceId", [])
+        for trace in [traces] if isinstance(traces, str) else traces:
+            messages[trace] = error.get("message", "")
+    return messages
+
+
+# Property each create is stamped with (where the object type has it and it's
+# writable), so a create whose response was lost can be found in HubSpot
+# instead of being sent again
+TRACE_PROPERTY = os.getenv("HUBSPOT_WRITE_TRACE_PROPERTY", "hs_unique_creation_key")
+_trace_properties: dict[str, str | None] = {}
+
+
+def trace_property(object_type: str) -> str | None:
+    """TRACE_PROPERTY if the object type has it as a writable property, else None."""
+    if not TRACE_PROPERTY:
+        return None
+    if object_type not in _trace_properties:
+        resp = api_request(
+            "GET", f"{BASE_URL}/crm/v3/properties/{object_type}/{TRACE_PROPERTY}"
+        )
+        if resp.status_code not in (200, 404):
+            # Not cached, so the next caller asks again
+            return None
+        read_only = resp.status_code == 404 or resp.json().get(
+            "modificationMetadata", {}
+        ).get("readOnlyValue", False)
+        _trace_properties[object_type] = None if read_only else TRACE_PROPERTY
+    return _trace_properties[object_type]
+
+
+def find_by_property(object_type: str, prop: str, values: list[str]) -> dict[str, str]:
+    """IDs of records whose prop is one of values (at most 100), by value."""
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{object_type}/search",
+        json={
+            "filterGroups": [
+                {
+                    "filters": [
+                        {"propertyName": prop, "operator": "IN", "values": values}
+                    ]
+                }
+            ],
+            "properties": [prop],
+            "limit": len(values),
+        },
+    )
+    resp.raise_for_status()
+    return {
+        r["properties"][prop]: r["id"]
+        for r in resp.json().get("results", [])
+        if r["properties"].get(prop)
+    }
+
+
+def prefetch(items: Iterable[Any], depth: int = 2) -> Iterator[Any]:
+    """Consume an iterable on a background thread, keeping up to `depth` items ready."""
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                buffer.put(item)
+        except Exception as err:
+            buffer.put(err)
+        buffer.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while (item := buffer.get()) is not done:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
 def format_contact(contact: dict) -> str:
     props = contact.get("properties", {})
     name = f"{props.get('firstname', '')} {props.get('lastname', '')}".strip()
@@ -154,6 +468,7 @@ def format_contact(contact: dict) -> str:
 
 
 def format_company(company: dict) -> str:
+    load_metadata()
     props = company.get("properties", {})
     lines = [f"[{company['id']}] {props.get('name', 'Unnamed')}"]
     if props.get("domain"):
@@ -177,12 +492,14 @@ def format_company(company: dict) -> str:
 
 
 def validate_lead_status(value: str) -> str | None:
+    load_metadata()
     if value not in LEAD_STATUS_VALUES:
         return f"Invalid lead status. Must be one of: {', '.join(LEAD_STATUS_VALUES)}"
     return None
 
 
 def validate_product_types(values: list[str]) -> str | None:
+    load_metadata()
     invalid = [v for v in values if v not in PRODUCT_TYPE_VALUES]
     if invalid:
         return f"Invalid product types: {invalid}. Must be from: {', '.join(PRODUCT_TYPE_VALUES)}"
@@ -191,25 +508,29 @@ def validate_product_types(values: list[str]) -> str | None:
 
 def validate_icp_tier(value: str) -> tuple[str | None, str | None]:
     """Returns (internal_name, error). If valid, error is None."""
+    load_metadata()
     if value not in ICP_TIERS:
         return None, f"Invalid ICP tier. Must be one of: {', '.join(ICP_TIERS.keys())}"
     return ICP_TIERS[value], None
 
 
 def validate_product_type(value: str) -> str | None:
-    if value not in PRODUCT_TYPE_VALUES:
-        return f"Invalid product type. Must be one of: {', '.join(PRODUCT_TYPE_VALUES)}"
+    load_metadata()
+    if value not in DEAL_PRODUCT_TYPE_VALUES:
+        return f"Invalid product type. Must be one of: {', '.join(DEAL_PRODUCT_TYPE_VALUES)}"
     return None
 
 
 def validate_deal_stage(value: str) -> tuple[str | None, str | None]:
     """Returns (internal_name, error). If valid, error is None."""
+    load_metadata()
     if value not in DEAL_STAGES:
         return None, f"Invalid stage. Must be one of: {', '.join(DEAL_STAGES.keys())}"
     return DEAL_STAGES[value], None
 
 
 def format_project(deal: dict) -> str:
+    load_metadata()
     props = deal.get("properties", {})
     lines = [f"[{deal['id']}] {props.get('dealname', 'Unnamed Project')}"]
     if props.get("dealstage"):
@@ -228,25 +549,56 @@ def format_project(deal: dict) -> str:
     return "\n".join(lines)
 
 
+def sort_projects(deals: list[dict]) -> list[dict]:
+    """Sort projects by pipeline stage order, then launch date (missing dates last)."""
+    load_metadata()
+    stage_order = {stage: i for i, stage in enumerate(DEAL_STAGES.values())}
+
+    def key(deal: dict) -> tuple[int, str]:
+        props = deal.get("properties", {})
+        stage = stage_order.get(props.get("dealstage") or "", len(stage_order))
+        return stage, props.get("launch_date") or "9999"
+
+    return sorted(deals, key=key)
+
+
 def get_company_name(company_id: str) -> str | None:
-    url = f"{BASE_URL}/crm/v3/objects/companies/{company_id}"
-    resp = requests.get(url, headers=headers(), params={"properties": "name"})
-    if resp.status_code != 200:
+    from tools.hubspot.cache import get_cached_record
+    from tools.hubspot.micro_batch import read_object
+
+    cached = get_cached_record("companies", company_id, ["name"])
+    if cached:
+        return cached["properties"].get("name")
+    try:
+        company = read_object("companies", company_id, ["name"])
+    except requests.HTTPError:
         return None
-    return resp.json().get("properties", {}).get("name")
+    return company.get("properties", {}).get("name") if company else None
+
+
+def get_owner_names() -> dict[str, str]:
+    """Map HubSpot owner IDs to display names. Empty if owners can't be listed."""
+    resp = api_request("GET", f"{BASE_URL}/crm/v3/owners", params={"limit": 500})
+    if resp.status_code != 200:
+        return {}
+    names = {}
+    for user in resp.json().get("results", []):
+        name = f"{user.get('firstName', '')} {user.get('lastName', '')}".strip()
+        names[str(user["id"])] = name or user.get("email") or "Unknown"
+    return names
 
 
 def get_recent_engagement(contact_id: str) -> str | None:
     url = f"{BASE_URL}/crm/v3/objects/contacts/{contact_id}/associations/engagements"
-    resp = requests.get(url, headers=headers())
+    resp = api_request("GET", url)
     if resp.status_code != 200 or not resp.json().get("results"):
         return None
 
     engagement_id = resp.json()["results"][0]["id"]
     eng_url = f"{BASE_URL}/crm/v3/objects/engagements/{engagement_id}"
-    eng_resp = requests.get(
+    eng_resp = api_request(
+        "GET",
         eng_url,
-        headers=headers(),
         params={"properties": "hs_engagement_type,hs_timestamp,hs_body_preview"},
     )
     if eng_resp.status_code != 200:
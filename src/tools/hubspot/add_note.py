@@ -3,6 +3,8 @@ from datetime import datetime, timezone
 import requests
 from typing import Any
 from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers, build_associations
+from tools.hubspot.cache import invalidate_linked
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def add_note(
@@ -40,10 +42,20 @@ def add_note(
         "associations": build_associations("note", contact_id, company_id, deal_id),
     }
 
+    if WRITE_BEHIND:
+        linked = {
+            "contact_id": contact_id,
+            "company_id": company_id,
+            "deal_id": deal_id,
+        }
+        handle = queue_write("notes", payload, linked=linked)
+        return f"Note queued for HubSpot [handle: {handle}]"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
+    invalidate_linked("notes", contact_id, company_id, deal_id)
     return f"Note added successfully [ID: {resp.json()['id']}]"
 
 
@@ -0,0 +1,488 @@
+import os
+import csv
+import json
+import uuid
+import hashlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterator
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    LOCAL_STORE_PATH,
+    BATCH_SIZE,
+    COMPANY_PROPERTIES,
+    CONTACT_PROPERTIES,
+    DEAL_PROPERTIES,
+    api_request,
+    batch_error_messages,
+    find_by_property,
+    load_metadata,
+    trace_property,
+    validate_lead_status,
+    validate_product_types,
+    validate_icp_tier,
+    validate_product_type,
+    validate_deal_stage,
+)
+import tools.hubspot as hubspot
+from tools.hubspot.search_cache import invalidate_searches
+
+OBJECT_PROPERTIES = {
+    "companies": COMPANY_PROPERTIES,
+    "contacts": CONTACT_PROPERTIES,
+    "deals": DEAL_PROPERTIES,
+}
+
+# Friendly column names accepted in addition to the HubSpot property names
+COLUMN_ALIASES = {
+    "companies": {
+        "website": "domain",
+        "lead_status": "hs_lead_status",
+        "icp_tier": "hs_ideal_customer_profile",
+        "owner_id": "hubspot_owner_id",
+    },
+    "contacts": {
+        "first_name": "firstname",
+        "last_name": "lastname",
+        "job_title": "jobtitle",
+    },
+    "deals": {
+        "name": "dealname",
+        "project_name": "dealname",
+        "stage": "dealstage",
+        "units": "number_of_units",
+        "map_link": "google_maps_link",
+    },
+}
+
+REQUIRED_PROPERTY = {"companies": "name", "contacts": "email", "deals": "dealname"}
+
+CHECKPOINT_DIR = os.path.join(LOCAL_STORE_PATH, "bulk_import")
+MAX_IN_FLIGHT = 4
+# Statuses that mean HubSpot is unavailable: stop and resume later
+FATAL_STATUSES = (429, 500, 502, 503, 504)
+
+Batch = list[tuple[int, dict[str, str], str | None]]
+
+
+def iter_rows(file_path: str) -> Iterator[dict[str, Any]]:
+    """Stream rows from a CSV or JSONL file one at a time."""
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        if file_path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def map_row(
+    object_type: str, row: dict[str, Any], column_map: dict[str, str]
+) -> tuple[dict[str, str], str | None, str | None]:
+    """Returns (properties, company_id, error). If valid, error is None."""
+    allowed = OBJECT_PROPERTIES[object_type]
+    aliases = COLUMN_ALIASES[object_type]
+    props: dict[str, str] = {}
+    company_id = None
+    for column, value in row.items():
+        if value is None or str(value).strip() == "":
+            continue
+        key = str(column).strip().lower().replace(" ", "_")
+        prop = column_map.get(column) or column_map.get(key) or aliases.get(key, key)
+        if prop == "company_id" and object_type != "companies":
+            company_id = str(value).strip()
+        elif prop in allowed:
+            props[prop] = str(value).strip()
+
+    required = REQUIRED_PROPERTY[object_type]
+    if required not in props:
+        return props, company_id, f"Missing {required}"
+
+    err = None
+    if object_type == "companies":
+        if "hs_lead_status" in props:
+            err = validate_lead_status(props["hs_lead_status"])
+        if not err and "product_types" in props:
+            values = [
+                v.strip() for v in props["product_types"].replace(",", ";").split(";")
+            ]
+            err = validate_product_types(values)
+            props["product_types"] = ";".join(values)
+        icp = props.get("hs_ideal_customer_profile")
+        if not err and icp and icp not in hubspot.ICP_TIERS_REVERSE:
+            internal, err = validate_icp_tier(icp)
+            props["hs_ideal_customer_profile"] = internal or icp
+    elif object_type == "deals":
+        stage = props.get("dealstage")
+        if stage and stage not in hubspot.DEAL_STAGES_REVERSE:
+            internal, err = validate_deal_stage(stage)
+            props["dealstage"] = internal or stage
+        if not err and "product_type" in props:
+            err = validate_product_type(props["product_type"])
+    return props, company_id, err
+
+
+def _checkpoint_path(file_path: str, object_type: str) -> str:
+    key = hashlib.sha1(f"{file_path}|{object_type}".encode()).hexdigest()[:16]
+    return os.path.join(CHECKPOINT_DIR, f"{key}.json")
+
+
+def _load_checkpoint(path: str, file_path: str) -> dict[str, Any] | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    stat = os.stat(file_path)
+    if checkpoint["size"] != stat.st_size or checkpoint["mtime"] != stat.st_mtime:
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _trim_errors(errors_path: str, checkpoint: dict[str, Any]) -> int:
+    """
+    Drop error lines for rows a resumed import will process again.
+
+    Keeps rows before rows_done or inside an already sent batch; returns how
+    many were kept, which is the failed count so far.
+    """
+    if not os.path.exists(errors_path):
+        return 0
+    sent = checkpoint.get("sent", [])
+    kept = []
+    with open(errors_path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)["row"]
+            if row < checkpoint["rows_done"] or any(a <= row <= b for a, b in sent):
+                kept.append(line)
+    with open(f"{errors_path}.tmp", "w", encoding="utf-8") as f:
+        f.writelines(kept)
+    os.replace(f"{errors_path}.tmp", errors_path)
+    return len(kept)
+
+
+def _send_batch(
+    object_type: str,
+    batch: Batch,
+    prop: str | None = None,
+    run: str = "",
+    replay: bool = False,
+) -> tuple[int, int, list[tuple[int, str]]]:
+    """
+    Send one batch. Returns (status, records written, per-row errors).
+
+    Rows HubSpot did not write, and contacts whose company link failed, are
+    returned as (row number, error). A FATAL_STATUSES status writes nothing.
+
+    Companies and deals are created, which isn't idempotent, so each row is
+    stamped with a key from run and its row number in the trace property
+    prop. With replay (rows an interrupted run may have sent), rows whose key
+    is already in HubSpot count as written instead of being created again.
+    """
+    if object_type == "contacts":
+        # Upsert by email so a batch replayed after a crash doesn't duplicate
+        resp = api_request(
+            "POST",
+            f"{BASE_URL}/crm/v3/objects/contacts/batch/upsert",
+            json={
+                "inputs": [
+                    {"id": props["email"], "idProperty": "email", "properties": props}
+                    for _, props, _ in batch
+                ]
+            },
+        )
+        if resp.status_code in FATAL_STATUSES:
+            return resp.status_code, 0, []
+        if resp.status_code not in (200, 201, 207):
+            err = f"{resp.status_code} {resp.text[:200]}"
+            return resp.status_code, 0, [(row, err) for row, _, _ in batch]
+        data = resp.json()
+        ids = {
+            r["properties"].get("email", "").lower(): r["id"]
+            for r in data.get("results", [])
+        }
+        detail = "; ".join(e.get("message", "") for e in data.get("errors", []))
+        errors = [
+            (row, f"Not written: {detail or 'missing from response'}"[:300])
+            for row, props, _ in batch
+            if props["email"].lower() not in ids
+        ]
+        linked = {
+            ids[props["email"].lower()]: (row, company_id)
+            for row, props, company_id in batch
+            if company_id and props["email"].lower() in ids
+        }
+        if linked:
+            assoc = api_request(
+                "POST",
+                f"{BASE_URL}/crm/v4/associations/contacts/companies/batch/associate/default",
+                json={
+                    "inputs": [
+                        {"from": {"id": contact_id}, "to": {"id": company_id}}
+                        for contact_id, (_, company_id) in linked.items()
+                    ]
+                },
+            )
+            if assoc.status_code in (200, 201, 207):
+                done = {
+                    str(r.get("from", {}).get("id"))
+                    for r in assoc.json().get("results", [])
+                }
+                reason = "missing from response"
+            else:
+                done = set()
+                reason = f"{assoc.status_code} {assoc.text[:200]}"
+            errors += [
+                (row, f"Contact written but company {company_id} not linked: {reason}")
+                for contact_id, (row, company_id) in linked.items()
+                if contact_id not in done
+            ]
+        return resp.status_code, len(ids), errors
+
+    keys = {row: f"{run}-{row}" for row, _, _ in batch} if prop else {}
+    found: dict[str, str] = {}
+    if prop and replay:
+        try:
+            found = find_by_property(object_type, prop, list(keys.values()))
+        except requests.HTTPError as err:
+            status = err.response.status_code
+            if status in FATAL_STATUSES:
+                return status, 0, []
+            err_text = f"Could not check for an earlier write: {status}"
+            return status, 0, [(row, err_text) for row, _, _ in batch]
+        batch = [item for item in batch if keys[item[0]] not in found]
+        if not batch:
+            return 200, len(found), []
+
+    inputs: list[dict[str, Any]] = []
+    for row, props, company_id in batch:
+        if prop:
+            props = {**props, prop: keys[row]}
+        # Trace IDs map a 207's results and errors back to rows
+        record: dict[str, Any] = {"properties": props, "objectWriteTraceId": str(row)}
+        if company_id:
+            record["associations"] = [
+                {
+                    "to": {"id": company_id},
+                    "types": [
+                        {
+                            "associationCategory": "HUBSPOT_DEFINED",
+                            "associationTypeId": hubspot.OBJECT_ASSOC_IDS[
+                                f"{object_type}/companies"
+                            ],
+                        }
+                    ],
+                }
+            ]
+        inputs.append(record)
+
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{object_type}/batch/create",
+        json={"inputs": inputs},
+    )
+    if resp.status_code in FATAL_STATUSES:
+        return resp.status_code, 0, []
+    if resp.status_code not in (200, 201, 207):
+        err = f"{resp.status_code} {resp.text[:200]}"
+        return resp.status_code, 0, [(row, err) for row, _, _ in batch]
+    data = resp.json()
+    results = data.get("results", [])
+    if resp.status_code != 207:
+        return resp.status_code, len(found) + len(results), []
+    written = {r.get("objectWriteTraceId") for r in results}
+    messages = batch_error_messages(data)
+    errors = [
+        (row, f"Not written: {messages.get(str(row)) or 'missing from response'}")
+        for row, _, _ in batch
+        if str(row) not in written
+    ]
+    return resp.status_code, len(found) + len(results), errors
+
+
+def bulk_import(
+    file_path: str,
+    object_type: str,
+    column_map: dict[str, str] | None = None,
+    restart: bool = False,
+) -> str:
+    """
+    Stream a CSV or JSONL file into HubSpot using batch endpoints.
+
+    Columns are matched to the configured property lists (or friendly aliases
+    like lead_status, stage, units). A company_id column links contacts and
+    deals to a company. Invalid rows are skipped and written to an error file.
+    Progress is checkpointed so a rerun resumes after the last sent batch;
+    company and deal batches that were in flight when an import stopped are
+    checked against HubSpot rather than created twice.
+
+    Args:
+        file_path: Path to a .csv or .jsonl file
+        object_type: companies, contacts, or deals
+        column_map: Optional mapping of file column -> HubSpot property
+        restart: Ignore any saved checkpoint and import from the first row
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+    if object_type not in OBJECT_PROPERTIES:
+        return f"Error: object_type must be one of: {', '.join(OBJECT_PROPERTIES)}"
+    if not os.path.isfile(file_path):
+        return f"Error: File not found: {file_path}"
+
+    load_metadata()
+    file_path = os.path.abspath(file_path)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    checkpoint_path = _checkpoint_path(file_path, object_type)
+    errors_path = checkpoint_path.replace(".json", ".errors.jsonl")
+
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path, file_path)
+    if checkpoint is None:
+        stat = os.stat(file_path)
+        checkpoint = {
+            "file": file_path,
+            "object_type": object_type,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "rows_done": 0,
+            "sent": [],
+            "pending": [],
+            # Scopes the keys rows are stamped with to this import
+            "run": uuid.uuid4().hex[:12],
+            "written": 0,
+            "failed": 0,
+        }
+        if os.path.exists(errors_path):
+            os.remove(errors_path)
+    else:
+        checkpoint.setdefault("sent", [])
+        checkpoint.setdefault("pending", [])
+        checkpoint.setdefault("run", uuid.uuid4().hex[:12])
+        checkpoint["failed"] = _trim_errors(errors_path, checkpoint)
+    resumed_from = checkpoint["rows_done"]
+    # Batches sent after an earlier batch failed, which a resume must skip
+    sent_before = [tuple(r) for r in checkpoint["sent"]]
+    # Batches an interrupted run sent with no response recorded
+    replay_ranges = [tuple(r) for r in checkpoint["pending"]]
+    prop = None if object_type == "contacts" else trace_property(object_type)
+
+    column_map = column_map or {}
+    in_flight: deque[tuple[Future, Batch]] = deque()
+    fatal: int | None = None
+
+    def submit(batch: Batch) -> None:
+        # Saved before sending, so a crash mid-send is reconciled on resume
+        checkpoint["pending"].append([batch[0][0], batch[-1][0]])
+        _save_checkpoint(checkpoint_path, checkpoint)
+        replay = any(a <= row <= b for row, _, _ in batch for a, b in replay_ranges)
+        future = pool.submit(
+            _send_batch, object_type, batch, prop, checkpoint["run"], replay
+        )
+        in_flight.append((future, batch))
+
+    def complete_oldest(errors_file: Any) -> None:
+        nonlocal fatal
+        future, batch = in_flight.popleft()
+        status, written, row_errors = future.result()
+        if status in FATAL_STATUSES:
+            # Not written (but left pending, so a resume checks); later
+            # batches still finish and are checkpointed
+            fatal = fatal or status
+            return
+        props_by_row = {row: props for row, props, _ in batch}
+        for row, err in row_errors:
+            errors_file.write(
+                json.dumps({"row": row, "error": err, "properties": props_by_row[row]})
+                + "\n"
+            )
+        errors_file.flush()
+        checkpoint["failed"] += len(row_errors)
+        checkpoint["written"] += written
+        if fatal is None:
+            # Everything before this batch has completed
+            checkpoint["rows_done"] = batch[-1][0] + 1
+            checkpoint["sent"] = [
+                r for r in checkpoint["sent"] if r[1] >= checkpoint["rows_done"]
+            ]
+        else:
+            checkpoint["sent"].append([batch[0][0], batch[-1][0]])
+        checkpoint["pending"] = [
+            r
+            for r in checkpoint["pending"]
+            if r != [batch[0][0], batch[-1][0]] and r[1] >= checkpoint["rows_done"]
+        ]
+        _save_checkpoint(checkpoint_path, checkpoint)
+
+    batch: Batch = []
+    total_rows = resumed_from
+    with (
+        ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool,
+        open(errors_path, "a", encoding="utf-8") as errors_file,
+    ):
+        for row_num, row in enumerate(iter_rows(file_path)):
+            total_rows = max(total_rows, row_num + 1)
+            if row_num < resumed_from or any(a <= row_num <= b for a, b in sent_before):
+                continue
+            props, company_id, err = map_row(object_type, row, column_map)
+            if err:
+                checkpoint["failed"] += 1
+                errors_file.write(
+                    json.dumps({"row": row_num, "error": err, "properties": props})
+                    + "\n"
+                )
+                continue
+            batch.append((row_num, props, company_id))
+            if len(batch) < BATCH_SIZE:
+                continue
+            if len(in_flight) >= MAX_IN_FLIGHT:
+                complete_oldest(errors_file)
+                if fatal:
+                    break
+            submit(batch)
+            batch = []
+
+        if batch and not fatal:
+            submit(batch)
+        # Batches already sent can't be recalled: record every one of them
+        while in_flight:
+            complete_oldest(errors_file)
+        if not fatal:
+            checkpoint["rows_done"] = total_rows
+            checkpoint["sent"] = []
+            checkpoint["pending"] = []
+            _save_checkpoint(checkpoint_path, checkpoint)
+    invalidate_searches(object_type)
+
+    summary = (
+        f"{object_type}: {checkpoint['written']} written, {checkpoint['failed']} failed"
+        f" ({checkpoint['rows_done']} rows processed"
+        + (f", resumed at row {resumed_from})" if resumed_from else ")")
+    )
+    if checkpoint["failed"]:
+        summary += f"\nErrors: {errors_path}"
+    if fatal:
+        return f"Error: HubSpot unavailable ({fatal}). Rerun to resume.\n{summary}"
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file_path")
+    parser.add_argument("object_type", choices=list(OBJECT_PROPERTIES))
+    parser.add_argument(
+        "--map", "-m", nargs="+", default=[], help="column=property overrides"
+    )
+    parser.add_argument("--restart", action="store_true")
+    args = parser.parse_args()
+
+    mapping = dict(m.split("=", 1) for m in args.map)
+    print(bulk_import(args.file_path, args.object_type, mapping, args.restart))
@@ -0,0 +1,127 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any
+
+# Seconds a cached record is trusted for rendering and no-op detection
+CACHE_TTL = float(os.getenv("HUBSPOT_CACHE_TTL", "120"))
+# Entries kept per cache; the least recently used are dropped beyond this
+CACHE_MAX_ENTRIES = int(os.getenv("HUBSPOT_CACHE_MAX_ENTRIES", "5000"))
+
+_lock = threading.Lock()
+# (object_type, id) -> (fetched_at, properties known for the record, record)
+_records: OrderedDict[tuple[str, str], tuple[float, set[str], dict[str, Any]]] = (
+    OrderedDict()
+)
+
+
+def _put(cache: OrderedDict, key: tuple, value: tuple) -> None:
+    """Store an entry as most recently used, evicting the oldest past the cap."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+def _get(cache: OrderedDict, key: tuple) -> tuple | None:
+    """A fresh entry, marked as recently used; expired entries are dropped."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] > CACHE_TTL:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return entry
+
+
+def cache_record(
+    object_type: str, record: dict[str, Any], requested: list[str] | None = None
+) -> None:
+    """Store a record read from HubSpot. Requested but absent properties are empty."""
+    props = dict(record.get("properties") or {})
+    known = set(props) | set(requested or [])
+    with _lock:
+        _put(
+            _records,
+            (object_type, str(record["id"])),
+            (time.monotonic(), known, {"id": str(record["id"]), "properties": props}),
+        )
+
+
+def get_cached_record(
+    object_type: str, record_id: str, properties: list[str]
+) -> dict[str, Any] | None:
+    """Return a fresh cached record that covers every requested property, else None."""
+    with _lock:
+        entry = _get(_records, (object_type, str(record_id)))
+        if not entry or not entry[1].issuperset(properties):
+            return None
+        record = entry[2]
+        return {"id": record["id"], "properties": dict(record["properties"])}
+
+
+def merge_cached_record(
+    object_type: str, record_id: str, properties: dict[str, Any]
+) -> dict[str, Any] | None:
+    """
+    Apply written properties to a fresh cached record and return the merged
+    copy; None (and the stale entry dropped) if it has expired.
+    """
+    with _lock:
+        entry = _get(_records, (object_type, str(record_id)))
+        if not entry:
+            return None
+        _, known, record = entry
+        record["properties"].update(properties)
+        known.update(properties)
+        return {"id": record["id"], "properties": dict(record["properties"])}
+
+
+def invalidate_record(object_type: str, record_id: str) -> None:
+    with _lock:
+        _records.pop((object_type, str(record_id)), None)
+
+
+# (from_type, id, to_type) -> (fetched_at, associated IDs)
+_associations: OrderedDict[tuple[str, str, str], tuple[float, list[str]]] = (
+    OrderedDict()
+)
+
+
+def cache_associations(
+    from_type: str, from_id: str, to_type: str, ids: list[str]
+) -> None:
+    with _lock:
+        _put(_associations, (from_type, str(from_id), to_type), (time.monotonic(), ids))
+
+
+def get_cached_associations(
+    from_type: str, from_id: str, to_type: str
+) -> list[str] | None:
+    """Return fresh cached associated IDs, else None."""
+    with _lock:
+        entry = _get(_associations, (from_type, str(from_id), to_type))
+        return list(entry[1]) if entry else None
+
+
+def invalidate_associations(from_type: str, from_id: str, to_type: str) -> None:
+    with _lock:
+        _associations.pop((from_type, str(from_id), to_type), None)
+
+
+def invalidate_linked(
+    to_type: str,
+    contact_id: str | None = None,
+    company_id: str | None = None,
+    deal_id: str | None = None,
+) -> None:
+    """Drop association lists that gain a new `to_type` record linked to these IDs."""
+    for from_type, from_id in (
+        ("contacts", contact_id),
+        ("companies", company_id),
+        ("deals", deal_id),
+    ):
+        if from_id:
+            invalidate_associations(from_type, from_id, to_type)
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    LOCAL_STORE_PATH,
+    iter_modified_since,
+)
+from tools.hubspot.export import EXPORT_PROPERTIES, ENGAGEMENT_TYPES
+
+CHANGES_DIR = os.path.join(LOCAL_STORE_PATH, "changes")
+CURSOR_PATH = os.path.join(CHANGES_DIR, "cursors.json")
+# Search results lag writes by a few seconds, so re-read a little before the cursor
+CURSOR_OVERLAP_MS = 60_000
+DEFAULT_LOOKBACK_MS = 24 * 3600 * 1000
+MAX_LISTED = 25
+MAX_VALUE_LENGTH = 80
+
+# Property used to name a record in the feed
+TITLE_PROPERTY = {
+    "companies": "name",
+    "deals": "dealname",
+    "calls": "hs_call_title",
+    "meetings": "hs_meeting_title",
+    "emails": "hs_email_subject",
+    "notes": "hs_note_body",
+}
+
+_lock = threading.Lock()
+
+
+def _parse_since(since: str) -> int:
+    if since.isdigit():
+        return int(since)
+    parsed = datetime.fromisoformat(since)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _format_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime(
+        "%Y-%m-%d %H:%M UTC"
+    )
+
+
+def _load_json(path: str) -> dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path: str, data: dict[str, Any]) -> None:
+    os.makedirs(CHANGES_DIR, exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+
+
+def _short(value: str | None) -> str:
+    text = " ".join((value or "").split())
+    if len(text) > MAX_VALUE_LENGTH:
+        text = text[: MAX_VALUE_LENGTH - 3] + "..."
+    return repr(text)
+
+
+def _title(object_type: str, props: dict[str, Any]) -> str:
+    if object_type == "contacts":
+        name = f"{props.get('firstname') or ''} {props.get('lastname') or ''}".strip()
+        return name or props.get("email") or ""
+    return " ".join((props.get(TITLE_PROPERTY[object_type]) or "").split())[:60]
+
+
+def _fetch(object_type: str, since_ms: int) -> list[dict]:
+    properties = EXPORT_PROPERTIES[object_type]
+    return [
+        obj
+        for page in iter_modified_since(object_type, properties, since_ms)
+        for obj in page
+    ]
+
+
+def _diff(
+    object_type: str, objects: list[dict], since_ms: int
+) -> tuple[list[str], int]:
+    """Diff fetched records against their cached versions; returns lines and unchanged count."""
+    path = os.path.join(CHANGES_DIR, f"{object_type}.json")
+    tracked = EXPORT_PROPERTIES[object_type]
+    versions = _load_json(path)
+    lines = []
+    unchanged = 0
+    for obj in objects:
+        props = obj.get("properties", {})
+        current = {p: props.get(p) for p in tracked}
+        previous = versions.get(obj["id"])
+        versions[obj["id"]] = current
+        label = f"  [{obj['id']}] {_title(object_type, props)}".rstrip()
+
+        created = props.get("createdate") or props.get("hs_createdate")
+        if previous is None and created and _parse_since(created) >= since_ms:
+            lines.append(f"{label}: created")
+        elif previous is None:
+            values = [f"{p}={_short(v)}" for p, v in current.items() if v]
+            lines.append(f"{label}: updated (no earlier copy) {'; '.join(values)}")
+        else:
+            changes = [
+                f"{p} {_short(previous.get(p))} -> {_short(v)}"
+                for p, v in current.items()
+                if (previous.get(p) or "") != (v or "")
+            ]
+            if changes:
+                lines.append(f"{label}: {'; '.join(changes)}")
+            else:
+                unchanged += 1
+    _save_json(path, versions)
+    return lines, unchanged
+
+
+def changes_since(
+    since: str | None = None,
+    object_types: list[str] | None = None,
+    cursor: str = "default",
+) -> str:
+    """
+    List CRM records modified since a time, with field-level diffs against
+    the version this tool last saw.
+
+    Without `since`, reads from the named cursor (last 24 hours on first use)
+    and advances it, so repeated calls return only what's new.
+
+    Args:
+        since: ISO date/datetime (UTC if no offset) or epoch milliseconds
+        object_types: Any of companies, contacts, deals, notes, calls, meetings,
+                      emails, or engagements (default: all)
+        cursor: Name of the stored cursor to read and advance when since is omitted
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+
+    types: list[str] = []
+    for t in object_types or list(EXPORT_PROPERTIES):
+        expanded = ENGAGEMENT_TYPES if t == "engagements" else [t]
+        for e in expanded:
+            if e not in EXPORT_PROPERTIES:
+                valid = ", ".join([*EXPORT_PROPERTIES, "engagements"])
+                return f"Error: object_types must be from: {valid}"
+            if e not in types:
+                types.append(e)
+
+    started = int(time.time() * 1000)
+    if since:
+        try:
+            since_ms = _parse_since(since)
+        except ValueError:
+            return "Error: since must be an ISO date/datetime or epoch milliseconds"
+    else:
+        cursors = _load_json(CURSOR_PATH)
+        last = cursors.get(cursor)
+        since_ms = last - CURSOR_OVERLAP_MS if last else started - DEFAULT_LOOKBACK_MS
+
+    with ThreadPoolExecutor(max_workers=len(types)) as pool:
+        futures = {t: pool.submit(_fetch, t, since_ms) for t in types}
+        try:
+            fetched = {t: f.result() for t, f in futures.items()}
+        except requests.HTTPError as err:
+            return f"Error: {err.response.status_code}"
+
+    with _lock:
+        results = {t: _diff(t, fetched[t], since_ms) for t in types}
+        if not since:
+            cursors = _load_json(CURSOR_PATH)
+            cursors[cursor] = started
+            _save_json(CURSOR_PATH, cursors)
+
+    output = [f"Changes since {_format_ms(since_ms)}"]
+    for object_type in types:
+        lines, unchanged = results[object_type]
+        if not lines and not unchanged:
+            continue
+        output.append(f"\n{object_type.capitalize()} ({len(lines)}):")
+        output.extend(lines[:MAX_LISTED])
+        if len(lines) > MAX_LISTED:
+            output.append(f"  ... and {len(lines) - MAX_LISTED} more")
+        if unchanged:
+            output.append(f"  ({unchanged} more touched with no tracked field changes)")
+    if len(output) == 1:
+        output.append("No changes")
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--since", help="ISO date/datetime or epoch ms")
+    parser.add_argument("--types", nargs="*", dest="object_types")
+    parser.add_argument("--cursor", default="default")
+    args = parser.parse_args()
+    print(changes_since(args.since, args.object_types, args.cursor))
@@ -10,6 +10,9 @@ from tools.hubspot import (
     validate_product_types,
     validate_icp_tier,
 )
+from tools.hubspot.duplicates import check_duplicate_company, record_created_company
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def create_company(
@@ -22,6 +25,7 @@ def create_company(
     lead_status: str | None = None,
     product_types: list[str] | None = None,
     icp_tier: str | None = None,
+    allow_duplicate: bool = False,
 ) -> str:
     """
     Create a new HubSpot company.
@@ -38,6 +42,7 @@ def create_company(
         product_types: List of product types built - each must be from:
                        Single Family, Multi-Family, Condo (low-rise), Condo (high-rise)
         icp_tier: Ideal Customer Profile tier - must be: Tier 1, Tier 2, or Tier 3
+        allow_duplicate: Create even if a similar company already exists
     """
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
@@ -58,6 +63,18 @@ def create_company(
         if err:
             return f"Error: {err}"
 
+    note = ""
+    if not allow_duplicate:
+        matches = check_duplicate_company(name, domain)
+        if matches is None:
+            note = "\n  Duplicate check: skipped, company list still syncing"
+        elif matches:
+            return (
+                "Error: Possible duplicate of existing companies:\n"
+                + "\n".join(f"  {m}" for m in matches[:5])
+                + "\nUse an existing company, or set allow_duplicate to create anyway"
+            )
+
     url = f"{BASE_URL}/crm/v3/objects/companies"
 
     properties: dict[str, Any] = {"name": name}
@@ -80,11 +97,18 @@ def create_company(
 
     payload: dict[str, Any] = {"properties": properties}
 
+    if WRITE_BEHIND:
+        handle = queue_write("companies", payload)
+        queued = format_company({"id": handle, "properties": properties})
+        return f"{queued}\n  Status: queued{note}"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
-    return format_company(resp.json())
+    invalidate_searches("companies")
+    record_created_company(resp.json())
+    return format_company(resp.json()) + note
 
 
 if __name__ == "__main__":
@@ -100,6 +124,7 @@ if __name__ == "__main__":
     parser.add_argument("--lead-status", "-s")
     parser.add_argument("--product-types", nargs="+")
     parser.add_argument("--icp-tier")
+    parser.add_argument("--allow-duplicate", action="store_true")
     args = parser.parse_args()
 
     print(
@@ -113,5 +138,6 @@ if __name__ == "__main__":
             args.lead_status,
             args.product_types,
             args.icp_tier,
+            args.allow_duplicate,
         )
     )
@@ -2,6 +2,10 @@ import sys
 import requests
 from typing import Any
 from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers, format_contact
+from tools.hubspot.cache import invalidate_linked
+from tools.hubspot.participants import record_created_contact
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def create_contact(
@@ -40,12 +44,19 @@ def create_contact(
             }
         ]
 
+    if WRITE_BEHIND:
+        handle = queue_write("contacts", payload, linked={"company_id": company_id})
+        return f"{format_contact({'id': handle, 'properties': properties})}\n  Status: queued"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code == 409:
         return "Error: Contact already exists"
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
+    invalidate_searches("contacts")
+    invalidate_linked("contacts", company_id=company_id)
+    record_created_contact(resp.json(), company_id)
     return format_contact(resp.json())
 
 
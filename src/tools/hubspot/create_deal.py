@@ -9,6 +9,9 @@ from tools.hubspot import (
     validate_deal_stage,
     validate_product_type,
 )
+from tools.hubspot.cache import invalidate_linked
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def create_project(
@@ -80,10 +83,16 @@ def create_project(
         ],
     }
 
+    if WRITE_BEHIND:
+        handle = queue_write("deals", payload, linked={"company_id": company_id})
+        return f"{format_project({'id': handle, 'properties': properties})}\n  Status: queued"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
+    invalidate_searches("deals")
+    invalidate_linked("deals", company_id=company_id)
     return format_project(resp.json())
 
 
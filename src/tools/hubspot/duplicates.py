@@ -0,0 +1,282 @@
+import re
+import threading
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from urllib.parse import urlsplit
+import requests
+from tools.hubspot import HUBSPOT_TOKEN
+from tools.hubspot.snapshot import COMPANY_SNAPSHOT_PROPERTIES, get_snapshot
+from tools.hubspot.write_queue import WRITE_BEHIND, get_write_queue
+
+# Words that say nothing about which builder a company is
+LEGAL_TOKENS = {
+    "the",
+    "and",
+    "of",
+    "inc",
+    "llc",
+    "ltd",
+    "lp",
+    "llp",
+    "co",
+    "corp",
+    "corporation",
+    "company",
+    "companies",
+    "group",
+    "holdings",
+    "partners",
+    "enterprises",
+}
+# Words that describe the business; different ones suggest different companies
+# ("Smith Homes" vs "Smith Construction")
+DESCRIPTIVE_TOKENS = {
+    "homes",
+    "home",
+    "builders",
+    "builder",
+    "building",
+    "development",
+    "developments",
+    "construction",
+    "properties",
+    "realty",
+    "residential",
+    "communities",
+}
+GENERIC_TOKENS = LEGAL_TOKENS | DESCRIPTIVE_TOKENS
+# Tokens shared by more companies than this are too common to block on
+MAX_BLOCK_SIZE = 50
+DUPLICATE_THRESHOLD = 0.85
+# Score multipliers when descriptive words conflict, or appear on one side only
+CONFLICTING_WORDS_FACTOR = 0.8
+MISSING_WORDS_FACTOR = 0.95
+
+
+def normalize_domain(domain: str | None) -> str:
+    """Reduce a domain or URL to its bare lowercase host, e.g. acme.com."""
+    domain = (domain or "").strip().lower()
+    if not domain:
+        return ""
+    host = urlsplit(domain if "//" in domain else f"//{domain}").hostname or ""
+    return host.removeprefix("www.")
+
+
+def all_tokens(name: str | None) -> list[str]:
+    """Lowercase alphanumeric tokens of a company name."""
+    return re.findall(r"[a-z0-9]+", (name or "").lower().replace("&", " and "))
+
+
+def name_tokens(name: str | None) -> list[str]:
+    """Tokens of a company name minus generic words, unless that leaves nothing."""
+    tokens = all_tokens(name)
+    core = [t for t in tokens if t not in GENERIC_TOKENS]
+    return core or tokens
+
+
+def descriptive_words(tokens: list[str]) -> set[str]:
+    """Descriptive words in a name, singular so "homes" matches "home"."""
+    return {t.removesuffix("s") for t in tokens if t in DESCRIPTIVE_TOKENS}
+
+
+def similarity(a: list[str], b: list[str]) -> float:
+    """Blend of character similarity and token overlap between two token lists."""
+    if not a or not b:
+        return 0.0
+    matcher = SequenceMatcher(None, " ".join(a), " ".join(b))
+    jaccard = len(set(a) & set(b)) / len(set(a) | set(b))
+    return (matcher.ratio() + jaccard) / 2
+
+
+class CompanyIndex:
+    """Blocking index over company columns: normalized domain and name tokens."""
+
+    def __init__(
+        self, ids: list[str], cols: dict[str, list[str | None]], version: int = 0
+    ):
+        self.version = version
+        self.ids = list(ids)
+        self.names = [n or "" for n in cols["name"][: len(self.ids)]]
+        self.domains = [normalize_domain(d) for d in cols["domain"][: len(self.ids)]]
+        self.cities = [c or "" for c in cols["city"][: len(self.ids)]]
+        self.all_tokens = [all_tokens(n) for n in self.names]
+        self.tokens = [name_tokens(n) for n in self.names]
+        self.descriptive = [descriptive_words(t) for t in self.all_tokens]
+        self.by_domain: dict[str, list[int]] = defaultdict(list)
+        self.by_token: dict[str, list[int]] = defaultdict(list)
+        for row, (domain, tokens) in enumerate(zip(self.domains, self.tokens)):
+            if domain:
+                self.by_domain[domain].append(row)
+            for token in set(tokens):
+                self.by_token[token].append(row)
+
+    def _score(self, name: str, domain: str, row: int) -> float:
+        if domain and domain == self.domains[row]:
+            return 1.0
+        # Distinctive words decide the match; descriptive words only lower it,
+        # so "Acme Homes LLC" matches "Acme" better than "Acme Builders"
+        core = similarity(name_tokens(name), self.tokens[row])
+        ours = descriptive_words(all_tokens(name))
+        theirs = self.descriptive[row]
+        if ours and theirs and not ours & theirs:
+            return core * CONFLICTING_WORDS_FACTOR
+        if ours != theirs:
+            return core * MISSING_WORDS_FACTOR
+        return core
+
+    def candidates(
+        self, name: str, domain: str | None = None
+    ) -> list[tuple[float, int]]:
+        """Rows that may be the same company as name/domain, best match first."""
+        tokens = name_tokens(name)
+        domain = normalize_domain(domain)
+        rows = set(self.by_domain.get(domain, [])) if domain else set()
+        for token in tokens:
+            block = self.by_token.get(token, [])
+            if len(block) <= MAX_BLOCK_SIZE:
+                rows.update(block)
+        scored = [(self._score(name, domain, row), row) for row in rows]
+        return sorted(scored, reverse=True)
+
+    def pairs(self, threshold: float) -> list[tuple[float, int, int]]:
+        """Every pair of rows sharing a block and scoring at least threshold."""
+        seen: set[tuple[int, int]] = set()
+        found = []
+        blocks = [b for b in self.by_domain.values() if len(b) > 1]
+        blocks += [b for b in self.by_token.values() if 1 < len(b) <= MAX_BLOCK_SIZE]
+        for block in blocks:
+            for a, b in combinations(block, 2):
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                score = self._score(self.names[a], self.domains[a], b)
+                if score >= threshold:
+                    found.append((score, a, b))
+        return sorted(found, reverse=True)
+
+    def describe(self, row: int) -> str:
+        details = ", ".join(d for d in (self.domains[row], self.cities[row]) if d)
+        text = f"[{self.ids[row]}] {self.names[row] or 'Unnamed'}"
+        return f"{text} ({details})" if details else text
+
+
+_index: CompanyIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_company_index(
+    max_age: float = 300, full: bool = False, allow_full: bool = True
+) -> CompanyIndex:
+    """Index over the company snapshot, synced if stale and rebuilt when it changed."""
+    global _index
+    snapshot = get_snapshot("companies", COMPANY_SNAPSHOT_PROPERTIES)
+    snapshot.refresh(max_age=max_age, full=full, allow_full=allow_full)
+    with _index_lock:
+        if _index is None or _index.version != snapshot.version:
+            _index = CompanyIndex(snapshot.ids, snapshot.columns, snapshot.version)
+        return _index
+
+
+def _queued_index() -> CompanyIndex:
+    """Index over company creates still waiting in the write queue."""
+    entries = [
+        e
+        for e in get_write_queue().entries()
+        if e["object_type"] == "companies"
+        and not e.get("object_id")
+        and e["status"] == "pending"
+    ]
+    props = [e["payload"].get("properties", {}) for e in entries]
+    cols = {p: [x.get(p) for x in props] for p in ("name", "domain", "city")}
+    return CompanyIndex([e["handle"] for e in entries], cols)
+
+
+def check_duplicate_company(
+    name: str, domain: str | None = None, threshold: float = DUPLICATE_THRESHOLD
+) -> list[str] | None:
+    """
+    Describe existing or queued companies likely to be the same as name/domain.
+
+    Checks the locally synced company snapshot, plus creates still in the
+    write queue. A cold or due full sync is started in the background
+    instead of holding up the create; until the first one finishes the
+    snapshot is empty, so None is returned when nothing was found, meaning
+    the check was skipped rather than passed.
+    """
+    snapshot = get_snapshot("companies", COMPANY_SNAPSHOT_PROPERTIES)
+    if snapshot.full_sync_due:
+        snapshot.refresh_in_background()
+    indexes = [_queued_index()] if WRITE_BEHIND else []
+    if snapshot.full_synced_at:
+        try:
+            # Only a quick incremental sync here, and none while the
+            # background sync holds the snapshot
+            max_age = float("inf") if snapshot.syncing else 300
+            indexes.append(get_company_index(max_age=max_age, allow_full=False))
+        except requests.RequestException:
+            # Fall back to whatever is already synced rather than blocking creates
+            indexes.append(get_company_index(max_age=float("inf")))
+    scored = [
+        (score, index.describe(row))
+        for index in indexes
+        for score, row in index.candidates(name, domain)
+        if score >= threshold
+    ]
+    if not scored and not snapshot.full_synced_at:
+        return None
+    return [
+        f"{text} - match {score:.0%}" for score, text in sorted(scored, reverse=True)
+    ]
+
+
+def record_created_company(company: dict) -> None:
+    """Add a just-created company so an immediate re-create is still caught."""
+    get_snapshot("companies", COMPANY_SNAPSHOT_PROPERTIES).upsert([company])
+
+
+def find_duplicate_companies(
+    min_score: float = DUPLICATE_THRESHOLD, limit: int = 25, refresh: bool = False
+) -> str:
+    """
+    Report likely duplicate companies across the whole CRM.
+
+    Companies are compared only within blocks sharing a normalized domain or a
+    distinctive name token, so this stays fast on large portals.
+
+    Args:
+        min_score: Minimum similarity from 0 to 1 (default 0.85; 1.0 = same domain)
+        limit: Max pairs to list (default 25)
+        refresh: Rebuild the local company snapshot from scratch
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+
+    try:
+        index = get_company_index(max_age=0 if refresh else 300, full=refresh)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+
+    pairs = index.pairs(min_score)
+    if not pairs:
+        return f"No likely duplicates among {len(index.ids)} companies"
+
+    output = [f"{len(pairs)} likely duplicate pairs among {len(index.ids)} companies:"]
+    for score, a, b in pairs[:limit]:
+        output.append(f"\n{score:.0%} match:")
+        output.append(f"  {index.describe(a)}")
+        output.append(f"  {index.describe(b)}")
+    if len(pairs) > limit:
+        output.append(f"\n... and {len(pairs) - limit} more")
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-score", type=float, default=DUPLICATE_THRESHOLD)
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--refresh", action="store_true")
+    args = parser.parse_args()
+    print(find_duplicate_companies(args.min_score, args.limit, args.refresh))
@@ -0,0 +1,111 @@
+import sys
+import os
+import json
+from datetime import datetime
+from typing import TextIO
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    LOCAL_STORE_PATH,
+    COMPANY_PROPERTIES,
+    CONTACT_PROPERTIES,
+    DEAL_PROPERTIES,
+    iter_object_pages,
+    prefetch,
+)
+from tools.hubspot.search_notes import NOTE_PROPERTIES
+from tools.hubspot.search_calls import CALL_PROPERTIES
+from tools.hubspot.search_meetings import MEETING_PROPERTIES
+from tools.hubspot.search_emails import EMAIL_PROPERTIES
+
+EXPORT_PROPERTIES = {
+    "companies": COMPANY_PROPERTIES,
+    "contacts": CONTACT_PROPERTIES,
+    "deals": DEAL_PROPERTIES,
+    "notes": NOTE_PROPERTIES,
+    "calls": CALL_PROPERTIES,
+    "meetings": MEETING_PROPERTIES,
+    "emails": EMAIL_PROPERTIES,
+}
+
+ENGAGEMENT_TYPES = ["notes", "calls", "meetings", "emails"]
+
+EXPORT_DIR = os.path.join(LOCAL_STORE_PATH, "exports")
+
+
+def _export_rows(object_type: str, out: TextIO) -> int:
+    associations = ["companies"] if object_type in ("contacts", "deals") else None
+    count = 0
+    pages = iter_object_pages(object_type, EXPORT_PROPERTIES[object_type], associations)
+    for page_num, page in enumerate(prefetch(pages), 1):
+        for obj in page:
+            row = {"object_type": object_type, "id": obj["id"]}
+            row.update(obj.get("properties", {}))
+            companies = (
+                obj.get("associations", {}).get("companies", {}).get("results", [])
+            )
+            if companies:
+                row["company_id"] = companies[0]["id"]
+            out.write(json.dumps(row) + "\n")
+        count += len(page)
+        if page_num % 10 == 0:
+            print(f"{object_type}: {count} rows exported", file=sys.stderr)
+    return count
+
+
+def export_objects(object_type: str, output_path: str | None = None) -> str:
+    """
+    Export every record of a HubSpot object type to a JSONL file.
+
+    Pages are fetched in the background while the previous page is written,
+    so memory stays constant regardless of record count. Each line holds
+    object_type, id, the configured properties, and company_id for contacts
+    and deals.
+
+    Args:
+        object_type: companies, contacts, deals, notes, calls, meetings, emails,
+                     or engagements (all four engagement types in one file)
+        output_path: Where to write the .jsonl file (default: .local/exports/)
+
+    Returns:
+        The file path and row counts; the data itself is not returned.
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+
+    if object_type == "engagements":
+        types = ENGAGEMENT_TYPES
+    elif object_type in EXPORT_PROPERTIES:
+        types = [object_type]
+    else:
+        valid = ", ".join([*EXPORT_PROPERTIES, "engagements"])
+        return f"Error: object_type must be one of: {valid}"
+
+    if not output_path:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_path = os.path.join(EXPORT_DIR, f"{object_type}-{stamp}.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    counts: dict[str, int] = {}
+    tmp_path = f"{output_path}.partial"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for t in types:
+                counts[t] = _export_rows(t, out)
+    except requests.HTTPError as err:
+        os.remove(tmp_path)
+        return f"Error: {err.response.status_code} while exporting {types[len(counts)]}"
+    os.replace(tmp_path, output_path)
+
+    summary = ", ".join(f"{n} {t}" for t, n in counts.items())
+    return f"Exported {summary} to {output_path}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("object_type")
+    parser.add_argument("--output", "-o", dest="output_path")
+    args = parser.parse_args()
+    print(export_objects(args.object_type, args.output_path))
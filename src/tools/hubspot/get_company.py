@@ -2,12 +2,12 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     COMPANY_PROPERTIES,
-    headers,
     format_company,
-    get_recent_engagement,
 )
+from tools.hubspot.cache import cache_record, get_cached_record
+from tools.hubspot.micro_batch import read_object
+from tools.hubspot.prefetcher import record_read
 
 
 def get_company(company_id: str) -> str:
@@ -25,16 +25,18 @@ def get_company(company_id: str) -> str:
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/companies/{company_id}"
-    params = {"properties": ",".join(COMPANY_PROPERTIES)}
-
-    resp = requests.get(url, headers=headers(), params=params)
-    if resp.status_code == 404:
-        return "Error: Company not found"
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
-
-    return format_company(resp.json())
+    company = get_cached_record("companies", company_id, COMPANY_PROPERTIES)
+    if company is None:
+        try:
+            company = read_object("companies", company_id, COMPANY_PROPERTIES)
+        except requests.HTTPError as err:
+            return f"Error: {err.response.status_code}"
+        if company is None:
+            return "Error: Company not found"
+        cache_record("companies", company, COMPANY_PROPERTIES)
+
+    record_read("company", company_id)
+    return format_company(company)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    COMPANY_PROPERTIES,
+    CONTACT_PROPERTIES,
+    DEAL_PROPERTIES,
+    api_request,
+    batch_read,
+    get_associated_ids,
+    format_company,
+    format_contact,
+    format_project,
+    sort_projects,
+)
+
+# Title and body properties used for the one-line activity summary
+ACTIVITY_PROPERTIES = {
+    "notes": ("Note", None, "hs_note_body"),
+    "calls": ("Call", "hs_call_title", "hs_call_body"),
+    "meetings": ("Meeting", "hs_meeting_title", "hs_meeting_body"),
+    "emails": ("Email", "hs_email_subject", None),
+}
+
+MAX_CONTACTS = 25
+# Largest page the CRM search endpoint returns
+MAX_SEARCH_LIMIT = 200
+
+
+def _get_company(company_id: str) -> dict | None:
+    resp = api_request(
+        "GET",
+        f"{BASE_URL}/crm/v3/objects/companies/{company_id}",
+        params={"properties": ",".join(COMPANY_PROPERTIES)},
+    )
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _get_associated(company_id: str, to_type: str, properties: list[str]) -> list[dict]:
+    ids = get_associated_ids("companies", company_id, to_type)
+    return batch_read(to_type, ids, properties) if ids else []
+
+
+def _get_recent(company_id: str, engagement_type: str, limit: int) -> list[dict]:
+    _, title_prop, body_prop = ACTIVITY_PROPERTIES[engagement_type]
+    properties = ["hs_timestamp"] + [p for p in (title_prop, body_prop) if p]
+    # Search ranks by hs_timestamp server-side, so only the latest few are read
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{engagement_type}/search",
+        json={
+            "filterGroups": [
+                {
+                    "filters": [
+                        {
+                            "propertyName": "associations.company",
+                            "operator": "EQ",
+                            "value": company_id,
+                        }
+                    ]
+                }
+            ],
+            "properties": properties,
+            "sorts": [{"propertyName": "hs_timestamp", "direction": "DESCENDING"}],
+            "limit": min(limit, MAX_SEARCH_LIMIT),
+        },
+    )
+    resp.raise_for_status()
+    results = resp.json().get("results", [])
+    for r in results:
+        r["type"] = engagement_type
+    return results
+
+
+def _format_activity(e: dict) -> str:
+    label, title_prop, body_prop = ACTIVITY_PROPERTIES[e["type"]]
+    props = e.get("properties", {})
+    date = (props.get("hs_timestamp") or "")[:10]
+    text = (props.get(title_prop) if title_prop else None) or ""
+    if body_prop and props.get(body_prop):
+        body = " ".join(props[body_prop].split())[:150]
+        text = f"{text} - {body}" if text else body
+    return f"  {date} {label} [{e['id']}]: {text}"
+
+
+def get_company_overview(company_id: str, activity_limit: int = 5) -> str:
+    """
+    Get a company with its projects, contacts, and recent activity in one call.
+
+    All lookups run concurrently: company details, associated projects and
+    contacts (batch reads), and the most recent notes, calls, meetings, and emails.
+
+    Args:
+        company_id: HubSpot company ID
+        activity_limit: Max recent activity entries to include (default 5)
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+
+    pool = ThreadPoolExecutor(max_workers=8)
+    company_f = pool.submit(_get_company, company_id)
+    deals_f = pool.submit(_get_associated, company_id, "deals", DEAL_PROPERTIES)
+    contacts_f = pool.submit(
+        _get_associated, company_id, "contacts", CONTACT_PROPERTIES
+    )
+    activity_fs = [
+        pool.submit(_get_recent, company_id, t, activity_limit)
+        for t in ACTIVITY_PROPERTIES
+    ]
+    try:
+        company = company_f.result()
+        if company is None:
+            return "Error: Company not found"
+        deals = sort_projects(deals_f.result())
+        contacts = contacts_f.result()
+        activity = [e for f in activity_fs for e in f.result()]
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+    finally:
+        # An early return doesn't wait for the other lookups
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    output = [format_company(company)]
+
+    output.append(f"\nProjects ({len(deals)}):")
+    if deals:
+        output.append("\n".join(format_project(d) for d in deals))
+
+    output.append(f"\nContacts ({len(contacts)}):")
+    output.extend(format_contact(c) for c in contacts[:MAX_CONTACTS])
+    if len(contacts) > MAX_CONTACTS:
+        output.append(f"  ... {len(contacts) - MAX_CONTACTS} more")
+
+    activity.sort(
+        key=lambda e: e.get("properties", {}).get("hs_timestamp") or "", reverse=True
+    )
+    output.append("\nRecent Activity:")
+    output.extend(_format_activity(e) for e in activity[:activity_limit])
+    if not activity:
+        output.append("  None")
+
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("company_id")
+    parser.add_argument("--activity-limit", "-l", type=int, default=5)
+    args = parser.parse_args()
+    print(get_company_overview(args.company_id, args.activity_limit))
@@ -1,12 +1,34 @@
 import sys
+from typing import Iterator
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     DEAL_PROPERTIES,
-    headers,
+    get_associated_ids,
+    iter_batch_read,
     format_project,
+    sort_projects,
 )
+from tools.hubspot.cache import cache_record, get_cached_record
+from tools.hubspot.prefetcher import record_read
+
+
+def iter_company_projects(company_id: str) -> Iterator[list[dict]]:
+    """Yield a company's projects chunk by chunk as each batch read completes."""
+    deal_ids = get_associated_ids("companies", company_id, "deals")
+    cached, missing = [], []
+    for deal_id in deal_ids:
+        deal = get_cached_record("deals", deal_id, DEAL_PROPERTIES)
+        if deal:
+            cached.append(deal)
+        else:
+            missing.append(deal_id)
+    if cached:
+        yield sort_projects(cached)
+    for deals in iter_batch_read("deals", missing, DEAL_PROPERTIES):
+        for deal in deals:
+            cache_record("deals", deal, DEAL_PROPERTIES)
+        yield sort_projects(deals)
 
 
 def get_company_projects(company_id: str) -> str:
@@ -17,42 +39,24 @@ def get_company_projects(company_id: str) -> str:
         company_id: HubSpot company ID
 
     Returns:
-        Formatted list of all projects linked to this company.
+        Formatted list of all projects linked to this company, sorted by
+        stage and launch date.
     """
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    # Get associated deal IDs
-    assoc_url = f"{BASE_URL}/crm/v3/objects/companies/{company_id}/associations/deals"
-    assoc_resp = requests.get(assoc_url, headers=headers())
+    try:
+        deals = [d for chunk in iter_company_projects(company_id) for d in chunk]
+    except requests.HTTPError as err:
+        if err.response.status_code == 404:
+            return "Error: Company not found"
+        return f"Error: {err.response.status_code}"
 
-    if assoc_resp.status_code == 404:
-        return "Error: Company not found"
-    if assoc_resp.status_code != 200:
-        return f"Error: {assoc_resp.status_code}"
-
-    results = assoc_resp.json().get("results", [])
-    if not results:
-        return "No projects found for this company"
-
-    deal_ids = [r["id"] for r in results]
-
-    # Batch fetch deal details
-    batch_url = f"{BASE_URL}/crm/v3/objects/deals/batch/read"
-    batch_payload = {
-        "properties": DEAL_PROPERTIES,
-        "inputs": [{"id": deal_id} for deal_id in deal_ids],
-    }
-
-    batch_resp = requests.post(batch_url, headers=headers(), json=batch_payload)
-    if batch_resp.status_code != 200:
-        return f"Error fetching project details: {batch_resp.status_code}"
-
-    deals = batch_resp.json().get("results", [])
+    record_read("company_projects", company_id)
     if not deals:
-        return "No project details found"
+        return "No projects found for this company"
 
-    return "\n\n".join(format_project(deal) for deal in deals)
+    return "\n\n".join(format_project(deal) for deal in sort_projects(deals))
 
 
 if __name__ == "__main__":
@@ -60,6 +64,14 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("company_id")
+    parser.add_argument(
+        "--stream", action="store_true", help="Print projects as each batch arrives"
+    )
     args = parser.parse_args()
 
-    print(get_company_projects(args.company_id))
+    if args.stream:
+        for chunk in iter_company_projects(args.company_id):
+            for deal in chunk:
+                print(format_project(deal), end="\n\n", flush=True)
+    else:
+        print(get_company_projects(args.company_id))
@@ -2,13 +2,14 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     CONTACT_PROPERTIES,
-    headers,
     format_contact,
     get_company_name,
     get_recent_engagement,
 )
+from tools.hubspot.cache import cache_record
+from tools.hubspot.micro_batch import associated_ids, submit_read
+from tools.hubspot.prefetcher import record_read
 
 
 def get_contact(contact_id: str) -> str:
@@ -16,21 +17,22 @@ def get_contact(contact_id: str) -> str:
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/contacts/{contact_id}"
-    params = {"properties": ",".join(CONTACT_PROPERTIES), "associations": "companies"}
-
-    resp = requests.get(url, headers=headers(), params=params)
-    if resp.status_code == 404:
+    try:
+        contact = submit_read(
+            "contacts", contact_id, CONTACT_PROPERTIES, "companies"
+        ).result()
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+    if contact is None:
         return "Error: Contact not found"
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
 
-    data = resp.json()
-    output = [format_contact(data)]
+    cache_record("contacts", contact, CONTACT_PROPERTIES)
+    companies = associated_ids(contact, "companies")
+    record_read("contact", companies[0] if companies else None)
+    output = [format_contact(contact)]
 
-    companies = data.get("associations", {}).get("companies", {}).get("results", [])
     if companies:
-        company_name = get_company_name(companies[0]["id"])
+        company_name = get_company_name(companies[0])
         if company_name:
             output.append(f"Company: {company_name}")
 
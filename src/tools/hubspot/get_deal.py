@@ -2,12 +2,13 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     DEAL_PROPERTIES,
-    headers,
     format_project,
     get_company_name,
 )
+from tools.hubspot.cache import cache_record
+from tools.hubspot.micro_batch import associated_ids, submit_read
+from tools.hubspot.prefetcher import record_read
 
 
 def get_project(deal_id: str) -> str:
@@ -27,24 +28,20 @@ def get_project(deal_id: str) -> str:
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/deals/{deal_id}"
-    params = {
-        "properties": ",".join(DEAL_PROPERTIES),
-        "associations": "companies",
-    }
-
-    resp = requests.get(url, headers=headers(), params=params)
-    if resp.status_code == 404:
+    try:
+        deal = submit_read("deals", deal_id, DEAL_PROPERTIES, "companies").result()
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+    if deal is None:
         return "Error: Project not found"
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
 
-    data = resp.json()
-    output = [format_project(data)]
+    cache_record("deals", deal, DEAL_PROPERTIES)
+    companies = associated_ids(deal, "companies")
+    record_read("deal", companies[0] if companies else None)
+    output = [format_project(deal)]
 
-    companies = data.get("associations", {}).get("companies", {}).get("results", [])
     if companies:
-        company_name = get_company_name(companies[0]["id"])
+        company_name = get_company_name(companies[0])
         if company_name:
             output.append(f"  Company: {company_name}")
 
@@ -1,6 +1,5 @@
 import sys
-import requests
-from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers
+from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, api_request
 
 
 def list_users() -> str:
@@ -13,7 +12,7 @@ def list_users() -> str:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
     url = f"{BASE_URL}/crm/v3/owners"
-    resp = requests.get(url, headers=headers())
+    resp = api_request("GET", url)
 
     if resp.status_code != 200:
         return f"Error: {resp.status_code}"
@@ -7,9 +7,12 @@ from tools.hubspot import (
     HUBSPOT_TOKEN,
     BASE_URL,
     headers,
+    load_metadata,
     build_associations,
-    CALL_OUTCOMES,
 )
+import tools.hubspot as hubspot
+from tools.hubspot.cache import invalidate_linked
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def _to_utc(time_str: str, tz: ZoneInfo) -> str:
@@ -56,10 +59,9 @@ def log_call(
     if not any([contact_id, company_id, deal_id]):
         return "Error: Must provide at least one of contact_id, company_id, or deal_id"
 
-    if outcome and outcome not in CALL_OUTCOMES:
-        return (
-            f"Error: Invalid outcome. Must be one of: {', '.join(CALL_OUTCOMES.keys())}"
-        )
+    load_metadata()
+    if outcome and outcome not in hubspot.CALL_OUTCOMES:
+        return f"Error: Invalid outcome. Must be one of: {', '.join(hubspot.CALL_OUTCOMES.keys())}"
 
     if direction and direction not in ["INBOUND", "OUTBOUND"]:
         return "Error: direction must be INBOUND or OUTBOUND"
@@ -89,7 +91,7 @@ def log_call(
             duration_minutes * 60 * 1000
         )  # Convert to ms
     if outcome:
-        properties["hs_call_disposition"] = CALL_OUTCOMES[outcome]
+        properties["hs_call_disposition"] = hubspot.CALL_OUTCOMES[outcome]
     if direction:
         properties["hs_call_direction"] = direction
 
@@ -98,10 +100,20 @@ def log_call(
         "associations": build_associations("call", contact_id, company_id, deal_id),
     }
 
+    if WRITE_BEHIND:
+        linked = {
+            "contact_id": contact_id,
+            "company_id": company_id,
+            "deal_id": deal_id,
+        }
+        handle = queue_write("calls", payload, linked=linked)
+        return f"Call queued for HubSpot [handle: {handle}]"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
+    invalidate_linked("calls", contact_id, company_id, deal_id)
     return f"Call logged successfully [ID: {resp.json()['id']}]"
 
 
@@ -10,6 +10,8 @@ from tools.hubspot import (
     build_associations,
     MEETING_OUTCOMES,
 )
+from tools.hubspot.cache import invalidate_linked
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def _to_utc(time_str: str, tz: ZoneInfo) -> str:
@@ -101,10 +103,20 @@ def log_meeting(
         "associations": build_associations("meeting", contact_id, company_id, deal_id),
     }
 
+    if WRITE_BEHIND:
+        linked = {
+            "contact_id": contact_id,
+            "company_id": company_id,
+            "deal_id": deal_id,
+        }
+        handle = queue_write("meetings", payload, linked=linked)
+        return f"Meeting queued for HubSpot [handle: {handle}]"
+
     resp = requests.post(url, headers=headers(), json=payload)
     if resp.status_code != 201:
         return f"Error: {resp.status_code}"
 
+    invalidate_linked("meetings", contact_id, company_id, deal_id)
     return f"Meeting logged successfully [ID: {resp.json()['id']}]"
 
 
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    LOCAL_STORE_PATH,
+    api_request,
+)
+import tools.hubspot as hubspot
+
+METADATA_PATH = os.path.join(LOCAL_STORE_PATH, "hubspot_metadata.json")
+METADATA_TTL = float(os.getenv("HUBSPOT_METADATA_TTL_HOURS", "24")) * 3600
+
+ENGAGEMENT_OBJECTS = {"note": "notes", "call": "calls", "meeting": "meetings"}
+ASSOC_TARGETS = {"contact": "contacts", "company": "companies", "deal": "deals"}
+
+_lock = threading.Lock()
+_loaded_at = 0.0
+
+
+def _get(path: str) -> Any:
+    resp = api_request("GET", f"{BASE_URL}{path}")
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _options(object_type: str, prop: str) -> dict[str, str]:
+    data = _get(f"/crm/v3/properties/{object_type}/{prop}")
+    return {
+        o["label"]: o["value"] for o in data.get("options", []) if not o.get("hidden")
+    }
+
+
+def _deal_pipeline() -> dict[str, Any]:
+    pipelines = sorted(
+        _get("/crm/v3/pipelines/deals").get("results", []),
+        key=lambda p: (p["id"] != "default", p.get("displayOrder", 0)),
+    )
+    stages: dict[str, str] = {}
+    closed: list[str] = []
+    for pipeline in pipelines:
+        for stage in sorted(pipeline["stages"], key=lambda s: s["displayOrder"]):
+            stages.setdefault(stage["label"], stage["id"])
+            if stage.get("metadata", {}).get("isClosed") == "true":
+                closed.append(stage["id"])
+    return {"stages": stages, "closed": closed}
+
+
+def _call_outcomes() -> dict[str, str]:
+    return {d["label"]: d["id"] for d in _get("/calling/v1/dispositions")}
+
+
+def _default_type_id(from_type: str, to_type: str) -> int | None:
+    labels = _get(f"/crm/v4/associations/{from_type}/{to_type}/labels")
+    for label in labels.get("results", []):
+        if label["category"] == "HUBSPOT_DEFINED" and not label.get("label"):
+            return label["typeId"]
+    return None
+
+
+def _assoc_ids() -> dict[str, dict[str, int]]:
+    pairs = [(e, t) for e in ENGAGEMENT_OBJECTS for t in ASSOC_TARGETS]
+    with ThreadPoolExecutor(max_workers=len(pairs)) as pool:
+        type_ids = pool.map(
+            lambda pair: _default_type_id(
+                ENGAGEMENT_OBJECTS[pair[0]], ASSOC_TARGETS[pair[1]]
+            ),
+            pairs,
+        )
+        ids: dict[str, dict[str, int]] = {e: {} for e in ENGAGEMENT_OBJECTS}
+        for (engagement, target), type_id in zip(pairs, type_ids):
+            if type_id is not None:
+                ids[engagement][target] = type_id
+    return ids
+
+
+def _object_assoc_ids() -> dict[str, int]:
+    with ThreadPoolExecutor(max_workers=len(hubspot.OBJECT_ASSOC_IDS)) as pool:
+        type_ids = pool.map(
+            lambda key: _default_type_id(*key.split("/")),
+            list(hubspot.OBJECT_ASSOC_IDS),
+        )
+        return {
+            key: type_id
+            for key, type_id in zip(hubspot.OBJECT_ASSOC_IDS, type_ids)
+            if type_id is not None
+        }
+
+
+def fetch_metadata() -> dict[str, Any]:
+    """Load property options, pipeline stages and association types from HubSpot."""
+    jobs = {
+        "lead_status": lambda: _options("companies", "hs_lead_status"),
+        "product_types": lambda: _options("companies", "product_types"),
+        "deal_product_type": lambda: _options("deals", "product_type"),
+        "icp_tiers": lambda: _options("companies", "hs_ideal_customer_profile"),
+        "deal_pipeline": _deal_pipeline,
+        "call_outcomes": _call_outcomes,
+        "assoc_ids": _assoc_ids,
+        "object_assoc_ids": _object_assoc_ids,
+    }
+    metadata: dict[str, Any] = {"fetched_at": time.time()}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = {key: pool.submit(job) for key, job in jobs.items()}
+        for key, future in futures.items():
+            try:
+                metadata[key] = future.result()
+            except (requests.RequestException, KeyError, ValueError):
+                pass
+    return metadata
+
+
+def _reverse(values: dict[str, str]) -> dict[str, str]:
+    return {v: k for k, v in values.items()}
+
+
+def apply_metadata(metadata: dict[str, Any]) -> None:
+    """
+    Swap loaded values into the shared lookup tables, keeping defaults for gaps.
+
+    Each table is built whole and then rebound on tools.hubspot, so readers
+    (which look them up there at call time) never see one half-updated.
+    """
+    if metadata.get("lead_status"):
+        hubspot.LEAD_STATUS_VALUES = list(metadata["lead_status"].values())
+    if metadata.get("product_types"):
+        hubspot.PRODUCT_TYPE_VALUES = list(metadata["product_types"].values())
+    if metadata.get("deal_product_type"):
+        hubspot.DEAL_PRODUCT_TYPE_VALUES = list(metadata["deal_product_type"].values())
+    if metadata.get("icp_tiers"):
+        tiers = dict(metadata["icp_tiers"])
+        hubspot.ICP_TIERS, hubspot.ICP_TIERS_REVERSE = tiers, _reverse(tiers)
+    if metadata.get("deal_pipeline"):
+        stages = dict(metadata["deal_pipeline"]["stages"])
+        hubspot.DEAL_STAGES, hubspot.DEAL_STAGES_REVERSE = stages, _reverse(stages)
+        hubspot.CLOSED_DEAL_STAGES = list(metadata["deal_pipeline"]["closed"])
+    if metadata.get("call_outcomes"):
+        outcomes = dict(metadata["call_outcomes"])
+        hubspot.CALL_OUTCOMES = outcomes
+        hubspot.CALL_OUTCOMES_REVERSE = _reverse(outcomes)
+    if metadata.get("object_assoc_ids"):
+        hubspot.OBJECT_ASSOC_IDS = {
+            **hubspot.OBJECT_ASSOC_IDS,
+            **metadata["object_assoc_ids"],
+        }
+    assoc_ids = {
+        engagement: ids
+        for engagement, ids in (metadata.get("assoc_ids") or {}).items()
+        if len(ids) == len(ASSOC_TARGETS)
+    }
+    if assoc_ids:
+        hubspot.ASSOC_IDS = {**hubspot.ASSOC_IDS, **assoc_ids}
+
+
+def ensure_metadata(force: bool = False) -> None:
+    """Load metadata once per TTL: from disk if fresh, else from HubSpot."""
+    global _loaded_at
+    if not force and time.time() - _loaded_at < METADATA_TTL:
+        return
+    with _lock:
+        if not force and time.time() - _loaded_at < METADATA_TTL:
+            return
+        cached: dict[str, Any] = {}
+        if os.path.exists(METADATA_PATH):
+            with open(METADATA_PATH, "r") as f:
+                cached = json.load(f)
+        metadata = cached
+        loaded_at = cached.get("fetched_at", 0)
+        if force or time.time() - loaded_at >= METADATA_TTL:
+            fetched = fetch_metadata() if HUBSPOT_TOKEN else {}
+            if len(fetched) > 1:
+                metadata = {**cached, **fetched}
+                os.makedirs(LOCAL_STORE_PATH, exist_ok=True)
+                with open(METADATA_PATH, "w") as f:
+                    json.dump(metadata, f, indent=2)
+                loaded_at = metadata["fetched_at"]
+            else:
+                # Keep defaults or the stale copy and retry in a few minutes
+                loaded_at = time.time() - METADATA_TTL + 300
+        apply_metadata(metadata)
+        _loaded_at = loaded_at
+
+
+if __name__ == "__main__":
+    ensure_metadata(force=True)
+    print(f"Deal stages: {', '.join(hubspot.DEAL_STAGES)}")
+    print(f"Lead statuses: {', '.join(hubspot.LEAD_STATUS_VALUES)}")
+    print(f"Product types: {', '.join(hubspot.PRODUCT_TYPE_VALUES)}")
+    print(f"Project product types: {', '.join(hubspot.DEAL_PRODUCT_TYPE_VALUES)}")
+    print(f"ICP tiers: {', '.join(hubspot.ICP_TIERS)}")
+    print(f"Call outcomes: {', '.join(hubspot.CALL_OUTCOMES)}")
+    print(f"Association IDs: {hubspot.ASSOC_IDS}")
+    print(f"Object association IDs: {hubspot.OBJECT_ASSOC_IDS}")
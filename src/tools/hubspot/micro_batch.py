@@ -0,0 +1,140 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+import requests
+from tools.hubspot import BASE_URL, BATCH_SIZE, api_request
+
+# How long to wait for more single reads before sending a batch
+BATCH_WINDOW = float(os.getenv("HUBSPOT_BATCH_WINDOW_MS", "5")) / 1000
+
+
+class MicroBatcher:
+    """Collects single-key lookups arriving within a short window into one batch call."""
+
+    def __init__(self, fetch: Callable[[list[str]], dict[str, Any]]):
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+
+    def submit(self, key: str) -> Future:
+        flush_now = None
+        with self._lock:
+            if not self._pending:
+                threading.Timer(BATCH_WINDOW, self._flush_if, [self._pending]).start()
+            future = self._pending.setdefault(key, Future())
+            if len(self._pending) >= BATCH_SIZE:
+                flush_now, self._pending = self._pending, {}
+        if flush_now:
+            self._run(flush_now)
+        return future
+
+    def _flush_if(self, batch: dict[str, Future]) -> None:
+        with self._lock:
+            if self._pending is not batch:
+                return
+            self._pending = {}
+        self._run(batch)
+
+    def _run(self, batch: dict[str, Future]) -> None:
+        try:
+            results = self._fetch(list(batch))
+        except Exception as err:
+            if len(batch) > 1 and _bad_input(err):
+                # One caller's bad ID shouldn't fail everyone else's read
+                for key, future in batch.items():
+                    self._run({key: future})
+                return
+            for future in batch.values():
+                future.set_exception(err)
+            return
+        for key, future in batch.items():
+            future.set_result(results.get(key))
+
+
+def _bad_input(err: Exception) -> bool:
+    """A 4xx other than 429: some input was rejected, so a retry alone may pass."""
+    if not isinstance(err, requests.HTTPError) or err.response is None:
+        return False
+    return 400 <= err.response.status_code < 500 and err.response.status_code != 429
+
+
+_batchers: dict[tuple, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def _batcher(key: tuple, fetch: Callable[[list[str]], dict[str, Any]]) -> MicroBatcher:
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher(fetch)
+        return _batchers[key]
+
+
+def submit_read(
+    object_type: str,
+    object_id: str,
+    properties: list[str],
+    associations: str | None = None,
+) -> Future:
+    """
+    Queue a single-object read; resolves to the object, or None if it doesn't
+    exist. With associations (e.g. "companies"), the object gets the same
+    "associations" entry a GET with associations= returns.
+    """
+
+    def fetch(ids: list[str]) -> dict[str, Any]:
+        if associations and len(ids) == 1:
+            # Alone, one GET returns the object and its associations together
+            resp = api_request(
+                "GET",
+                f"{BASE_URL}/crm/v3/objects/{object_type}/{ids[0]}",
+                params={
+                    "properties": ",".join(properties),
+                    "associations": associations,
+                },
+            )
+            if resp.status_code == 404:
+                return {}
+            resp.raise_for_status()
+            return {ids[0]: resp.json()}
+
+        resp = api_request(
+            "POST",
+            f"{BASE_URL}/crm/v3/objects/{object_type}/batch/read",
+            json={"properties": properties, "inputs": [{"id": i} for i in ids]},
+        )
+        resp.raise_for_status()
+        records = {r["id"]: r for r in resp.json().get("results", [])}
+        if associations and records:
+            resp = api_request(
+                "POST",
+                f"{BASE_URL}/crm/v4/associations/{object_type}/{associations}/batch/read",
+                json={"inputs": [{"id": i} for i in records]},
+            )
+            resp.raise_for_status()
+            linked = {
+                str(r["from"]["id"]): [
+                    {"id": str(t["toObjectId"])} for t in r.get("to", [])
+                ]
+                for r in resp.json().get("results", [])
+            }
+            for id_, record in records.items():
+                record["associations"] = {
+                    associations: {"results": linked.get(id_, [])}
+                }
+        return records
+
+    key = ("read", object_type, tuple(sorted(properties)), associations)
+    return _batcher(key, fetch).submit(str(object_id))
+
+
+def associated_ids(record: dict[str, Any], to_type: str) -> list[str]:
+    """IDs in a record's "associations" entry, in order, without duplicates."""
+    results = record.get("associations", {}).get(to_type, {}).get("results", [])
+    return list(dict.fromkeys(str(r["id"]) for r in results))
+
+
+def read_object(
+    object_type: str, object_id: str, properties: list[str]
+) -> dict[str, Any] | None:
+    return submit_read(object_type, object_id, properties).result()
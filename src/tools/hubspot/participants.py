@@ -0,0 +1,108 @@
+import re
+import threading
+from typing import Any
+import requests
+from tools.hubspot.duplicates import get_company_index, normalize_domain
+from tools.hubspot.snapshot import Snapshot, get_snapshot
+
+CONTACT_MATCH_PROPERTIES = ["email", "hs_additional_emails", "associatedcompanyid"]
+# Seconds between incremental syncs; lookups in between never call HubSpot
+MATCH_MAX_AGE = 300
+
+_EMAIL = re.compile(r"[^\s<>@]+@[^\s<>@]+\.[^\s<>@]+")
+
+
+class ContactIndex:
+    """Email address -> (contact ID, primary company ID) over the contact snapshot."""
+
+    def __init__(self, snapshot: Snapshot):
+        cols = snapshot.columns
+        self.version = snapshot.version
+        self.by_email: dict[str, tuple[str, str]] = {}
+        for row, id_ in enumerate(snapshot.ids):
+            company_id = cols["associatedcompanyid"][row] or ""
+            extra = (cols["hs_additional_emails"][row] or "").split(";")
+            for email in [cols["email"][row], *extra]:
+                email = (email or "").strip().lower()
+                if email:
+                    self.by_email.setdefault(email, (id_, company_id))
+
+
+_index: ContactIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_contact_index(max_age: float = MATCH_MAX_AGE) -> ContactIndex:
+    """Index over the contact snapshot, synced if stale and rebuilt when it changed."""
+    global _index
+    snapshot = get_snapshot("contacts", CONTACT_MATCH_PROPERTIES)
+    snapshot.refresh(max_age=max_age)
+    with _index_lock:
+        if _index is None or _index.version != snapshot.version:
+            _index = ContactIndex(snapshot)
+        return _index
+
+
+def record_created_contact(contact: dict, company_id: str | None = None) -> None:
+    """Add a just-created contact so emails parsed right after still match it."""
+    props = dict(contact.get("properties") or {})
+    if company_id:
+        props.setdefault("associatedcompanyid", company_id)
+    get_snapshot("contacts", CONTACT_MATCH_PROPERTIES).upsert(
+        [{"id": str(contact["id"]), "properties": props}]
+    )
+
+
+def address_email(address: str) -> str:
+    """The bare lowercase email in an address like "Jane Doe <jane@acme.com>"."""
+    found = _EMAIL.search(address or "")
+    return found.group(0).lower() if found else ""
+
+
+def match_participants(email: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Match every sender and recipient of a parsed email to HubSpot records.
+
+    Contacts are found by email address and companies by the contact's primary
+    company, else by the address's domain (or a parent domain, so
+    mail.acme.com finds acme.com). All lookups are against local indexes of
+    the contact and company snapshots, which sync incrementally at most every
+    MATCH_MAX_AGE seconds; if HubSpot can't be reached the last synced copy
+    is used.
+    """
+    try:
+        contacts = get_contact_index()
+        companies = get_company_index(max_age=MATCH_MAX_AGE)
+    except requests.RequestException:
+        contacts = get_contact_index(max_age=float("inf"))
+        companies = get_company_index(max_age=float("inf"))
+
+    def company_for(domain: str) -> str | None:
+        labels = domain.split(".")
+        for i in range(len(labels) - 1):
+            rows = companies.by_domain.get(".".join(labels[i:]))
+            if rows:
+                return companies.ids[rows[0]]
+        return None
+
+    participants = []
+    roles = [("from", [email.get("from", "")])]
+    roles += [(role, email.get(role, [])) for role in ("to", "cc", "bcc")]
+    for role, addresses in roles:
+        for address in addresses:
+            if not address:
+                continue
+            bare = address_email(address)
+            contact_id, company_id = contacts.by_email.get(bare, (None, None))
+            if not company_id and bare:
+                company_id = company_for(normalize_domain(bare.rsplit("@", 1)[1]))
+            participants.append(
+                {
+                    "role": role,
+                    "address": address,
+                    "email": bare,
+                    "contactId": contact_id,
+                    "companyId": company_id or None,
+                }
+            )
+    return participants
@@ -0,0 +1,148 @@
+from collections import Counter
+from datetime import date, timedelta
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    get_owner_names,
+    load_metadata,
+)
+import tools.hubspot as hubspot
+from tools.hubspot.snapshot import DEAL_SNAPSHOT_PROPERTIES, get_snapshot
+
+# Cap long tails (cities, owners) so the summary stays readable
+MAX_GROUPS = 15
+MAX_UPCOMING = 20
+
+
+def _units(value: str | None) -> float:
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+
+def _group(
+    keys: list[str],
+    units: list[float],
+    launches: list[str],
+    today: str,
+    order: list[str] | None = None,
+) -> list[str]:
+    counts: Counter[str] = Counter(keys)
+    totals: Counter[str] = Counter()
+    next_launch: dict[str, str] = {}
+    for key, n, launch in zip(keys, units, launches):
+        totals[key] += n
+        if launch >= today and launch < next_launch.get(key, "9999"):
+            next_launch[key] = launch
+
+    if order:
+        rank = {k: i for i, k in enumerate(order)}
+        groups = sorted(counts, key=lambda k: (rank.get(k, len(rank)), k))
+    else:
+        groups = [k for k, _ in counts.most_common()]
+
+    lines = []
+    for key in groups[:MAX_GROUPS]:
+        line = f"  {key}: {counts[key]} projects, {totals[key]:,.0f} units"
+        if key in next_launch:
+            line += f", next launch {next_launch[key]}"
+        lines.append(line)
+    if len(groups) > MAX_GROUPS:
+        rest = groups[MAX_GROUPS:]
+        lines.append(
+            f"  ({len(rest)} more: {sum(counts[k] for k in rest)} projects, "
+            f"{sum(totals[k] for k in rest):,.0f} units)"
+        )
+    return lines
+
+
+def pipeline_summary(
+    upcoming_days: int = 90, include_closed: bool = False, refresh: bool = False
+) -> str:
+    """
+    Summarize the whole project pipeline: counts, units and next launch dates
+    grouped by stage, product type, city and owner, plus upcoming launches.
+
+    Computed over a local snapshot of all deals that is synced incrementally
+    from HubSpot, so it stays fast regardless of pipeline size.
+
+    Args:
+        upcoming_days: Window for the upcoming launches list (default 90)
+        include_closed: Include Closed Lost and Cancelled projects (default False)
+        refresh: Rebuild the snapshot from scratch instead of syncing changes
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+
+    load_metadata()
+    snapshot = get_snapshot("deals", DEAL_SNAPSHOT_PROPERTIES)
+    try:
+        snapshot.refresh(max_age=0 if refresh else 300, full=refresh)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+
+    cols = snapshot.columns
+    stages = [s or "" for s in cols["dealstage"]]
+    keep = [include_closed or s not in hubspot.CLOSED_DEAL_STAGES for s in stages]
+
+    def column(name: str, default: str = "") -> list[str]:
+        return [v or default for v, k in zip(cols[name], keep) if k]
+
+    stage_labels = [
+        hubspot.DEAL_STAGES_REVERSE.get(s, s or "No stage") for s in column("dealstage")
+    ]
+    units = [_units(v) for v, k in zip(cols["number_of_units"], keep) if k]
+    launches = [d[:10] for d in column("launch_date")]
+    names = column("dealname", "Unnamed Project")
+    ids = [i for i, k in zip(snapshot.ids, keep) if k]
+
+    if not ids:
+        return "No projects found"
+
+    owners = get_owner_names()
+    owner_labels = [
+        owners.get(o, f"Owner {o}") if o else "Unassigned"
+        for o in column("hubspot_owner_id")
+    ]
+
+    today = date.today().isoformat()
+    horizon = (date.today() + timedelta(days=upcoming_days)).isoformat()
+
+    output = [f"Pipeline: {len(ids)} projects, {sum(units):,.0f} units"]
+    output.append("\nBy stage:")
+    output += _group(
+        stage_labels, units, launches, today, order=list(hubspot.DEAL_STAGES)
+    )
+    output.append("\nBy product type:")
+    output += _group(column("product_type", "Unspecified"), units, launches, today)
+    output.append("\nBy city:")
+    output += _group(column("city", "Unknown"), units, launches, today)
+    output.append("\nBy owner:")
+    output += _group(owner_labels, units, launches, today)
+
+    upcoming = sorted(
+        (launch, i) for i, launch in enumerate(launches) if today <= launch <= horizon
+    )
+    output.append(f"\nUpcoming launches (next {upcoming_days} days): {len(upcoming)}")
+    for launch, i in upcoming[:MAX_UPCOMING]:
+        output.append(
+            f"  {launch} [{ids[i]}] {names[i]} - {stage_labels[i]}, {units[i]:,.0f} units"
+        )
+    if len(upcoming) > MAX_UPCOMING:
+        output.append(f"  ... and {len(upcoming) - MAX_UPCOMING} more")
+
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--upcoming-days", type=int, default=90)
+    parser.add_argument("--include-closed", action="store_true")
+    parser.add_argument(
+        "--refresh", action="store_true", help="Rebuild the snapshot from scratch"
+    )
+    args = parser.parse_args()
+    print(pipeline_summary(args.upcoming_days, args.include_closed, args.refresh))
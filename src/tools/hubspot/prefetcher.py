@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from tools.hubspot import (
+    COMPANY_PROPERTIES,
+    DEAL_PROPERTIES,
+    RATE_LIMIT,
+    batch_read,
+    get_associated_ids,
+    rate_headroom,
+)
+from tools.hubspot.cache import cache_record, get_cached_record
+from tools.hubspot.micro_batch import read_object
+
+# Requests per minute prefetching may spend; 0 turns it off
+PREFETCH_BUDGET = float(os.getenv("HUBSPOT_PREFETCH_BUDGET", "30"))
+# Warm a follow-up once at least this share of reads were followed by it
+MIN_PROBABILITY = 0.3
+# A read this long after the prediction no longer counts as following it
+PREDICTION_TTL = 300.0
+ENGAGEMENT_TYPES = ["calls", "meetings", "notes", "emails"]
+
+# Likely next reads for each read, all keyed by company ID, with the prior
+# (followed, seen) counts typical agent flows suggest. Learned counts add on.
+FOLLOW_UPS: dict[str, dict[str, tuple[int, int]]] = {
+    "company": {"company_projects": (3, 5), "company_engagements": (2, 5)},
+    "company_projects": {"company": (1, 5), "company_engagements": (1, 5)},
+    "company_engagements": {"company": (1, 5), "company_projects": (1, 5)},
+    "contact": {"company": (3, 5), "company_projects": (1, 5)},
+    "deal": {"company": (2, 5), "company_projects": (2, 5)},
+}
+
+
+def _warm_company(company_id: str) -> None:
+    if get_cached_record("companies", company_id, COMPANY_PROPERTIES):
+        return
+    company = read_object("companies", company_id, COMPANY_PROPERTIES)
+    if company:
+        cache_record("companies", company, COMPANY_PROPERTIES)
+
+
+def _warm_projects(company_id: str) -> None:
+    ids = get_associated_ids("companies", company_id, "deals")
+    missing = [i for i in ids if not get_cached_record("deals", i, DEAL_PROPERTIES)]
+    for deal in batch_read("deals", missing, DEAL_PROPERTIES) if missing else []:
+        cache_record("deals", deal, DEAL_PROPERTIES)
+
+
+def _warm_engagements(company_id: str) -> None:
+    for engagement_type in ENGAGEMENT_TYPES:
+        get_associated_ids("companies", company_id, engagement_type)
+
+
+# Follow-up -> (warm function, estimated requests)
+WARMERS: dict[str, tuple[Callable[[str], None], int]] = {
+    "company": (_warm_company, 1),
+    "company_projects": (_warm_projects, 2),
+    "company_engagements": (_warm_engagements, len(ENGAGEMENT_TYPES)),
+}
+
+
+class Prefetcher:
+    """
+    Learns which reads tend to follow which, and after each read warms the
+    cache with the likely next ones while a request budget allows.
+    """
+
+    def __init__(self, budget_per_minute: float):
+        self.budget = budget_per_minute
+        self._tokens = budget_per_minute
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        self._followed: dict[str, Counter[str]] = defaultdict(Counter)
+        self._seen: Counter[str] = Counter()
+        # (kind, company_id) -> (predicted by, predicted at, warmed)
+        self._predictions: dict[tuple[str, str], tuple[str, float, bool]] = {}
+        self.stats: Counter[str] = Counter()
+
+    def probability(self, kind: str, follow_up: str) -> float:
+        prior_followed, prior_seen = FOLLOW_UPS[kind][follow_up]
+        followed = self._followed[kind][follow_up] + prior_followed
+        return followed / (self._seen[kind] + prior_seen)
+
+    def _reserve(self, cost: int) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            self.budget, self._tokens + (now - self._refilled) * self.budget / 60
+        )
+        self._refilled = now
+        # Foreground calls always come first
+        if cost > self._tokens or rate_headroom() < RATE_LIMIT // 2:
+            return False
+        self._tokens -= cost
+        return True
+
+    def record_read(self, kind: str, company_id: str | None) -> None:
+        """Count a foreground read and start warming what usually follows it."""
+        if not company_id:
+            return
+        now = time.monotonic()
+        to_warm = []
+        with self._lock:
+            self._expire(now)
+            prediction = self._predictions.pop((kind, company_id), None)
+            if prediction:
+                source, _, warmed = prediction
+                self._followed[source][kind] += 1
+                self.stats["hits" if warmed else "unwarmed_follow_ups"] += 1
+            elif kind in WARMERS:
+                self.stats["unpredicted_reads"] += 1
+
+            self._seen[kind] += 1
+            for follow_up in FOLLOW_UPS.get(kind, {}):
+                key = (follow_up, company_id)
+                warm = self.probability(kind, follow_up) >= MIN_PROBABILITY
+                # Keep an earlier prediction unless this one would warm it
+                if key in self._predictions and (self._predictions[key][2] or not warm):
+                    continue
+                if warm and not self._reserve(WARMERS[follow_up][1]):
+                    self.stats["skipped_budget"] += 1
+                    warm = False
+                self._predictions[key] = (kind, now, False)
+                if warm:
+                    to_warm.append(follow_up)
+
+        for follow_up in to_warm:
+            self._pool.submit(self._warm, follow_up, company_id)
+
+    def _warm(self, follow_up: str, company_id: str) -> None:
+        try:
+            WARMERS[follow_up][0](company_id)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            return
+        with self._lock:
+            self.stats["prefetches"] += 1
+            key = (follow_up, company_id)
+            if key in self._predictions:
+                source, at, _ = self._predictions[key]
+                self._predictions[key] = (source, at, True)
+
+    def _expire(self, now: float) -> None:
+        for key, (_, at, warmed) in list(self._predictions.items()):
+            if now - at > PREDICTION_TTL:
+                del self._predictions[key]
+                if warmed:
+                    self.stats["wasted"] += 1
+
+    def report(self) -> str:
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self.stats)
+            lines = [
+                f"Prefetch budget: {self.budget:.0f} requests/minute",
+                f"Prefetches: {stats.get('prefetches', 0)}, "
+                f"hits: {stats.get('hits', 0)}, "
+                f"unused: {stats.get('wasted', 0)}, "
+                f"errors: {stats.get('errors', 0)}, "
+                f"skipped for budget: {stats.get('skipped_budget', 0)}",
+            ]
+            done = stats.get("hits", 0) + stats.get("wasted", 0)
+            if done:
+                lines.append(f"Hit rate: {stats.get('hits', 0) / done:.0%}")
+            follow_ups = (
+                stats.get("hits", 0)
+                + stats.get("unwarmed_follow_ups", 0)
+                + stats.get("unpredicted_reads", 0)
+            )
+            if follow_ups:
+                lines.append(
+                    f"Follow-up reads served warm: {stats.get('hits', 0) / follow_ups:.0%}"
+                )
+            lines.append("\nLearned follow-up probabilities:")
+            for kind, follow_ups_of in FOLLOW_UPS.items():
+                odds = ", ".join(
+                    f"{f} {self.probability(kind, f):.0%}" for f in follow_ups_of
+                )
+                lines.append(f"  after {kind} ({self._seen[kind]} reads): {odds}")
+        return "\n".join(lines)
+
+
+_prefetcher = Prefetcher(PREFETCH_BUDGET)
+
+
+def record_read(kind: str, company_id: str | None) -> None:
+    """Note a foreground read of `kind` for a company; may warm likely next reads."""
+    if PREFETCH_BUDGET > 0:
+        _prefetcher.record_read(kind, company_id)
+
+
+def prefetch_stats() -> str:
+    """Report prefetch hit rates and the learned follow-up probabilities."""
+    if PREFETCH_BUDGET <= 0:
+        return "Prefetching is disabled (HUBSPOT_PREFETCH_BUDGET=0)"
+    return _prefetcher.report()
+
+
+if __name__ == "__main__":
+    print(prefetch_stats())
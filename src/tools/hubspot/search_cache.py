@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import threading
+from collections import Counter
+from typing import Any
+from tools.hubspot import BASE_URL, api_request
+
+# Seconds a search result is reused; writes in this process clear it sooner
+SEARCH_CACHE_TTL = float(os.getenv("HUBSPOT_SEARCH_CACHE_TTL", "300"))
+# Fetch at least this many results so later, larger-limit queries still hit
+MIN_FETCH = 20
+MAX_ENTRIES = 500
+
+_lock = threading.Lock()
+# (object_type, normalized query) -> (stored_at, fetched limit, complete, results)
+_entries: dict[tuple[str, str], tuple[float, int, bool, list[dict]]] = {}
+# Bumped by each write so searches that started before it aren't stored
+_generations: Counter[str] = Counter()
+stats: Counter[str] = Counter()
+
+
+def _normalize_value(operator: str, value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    value = " ".join(value.split())
+    # Token matching ignores case; EQ on enum values does not
+    return value.lower() if operator == "CONTAINS_TOKEN" else value
+
+
+def normalize_query(payload: dict[str, Any]) -> str:
+    """Canonical form of a search payload, ignoring limit, paging and ordering noise."""
+    groups = []
+    for group in payload.get("filterGroups", []):
+        filters = [
+            {
+                **f,
+                "value": _normalize_value(f.get("operator", ""), f.get("value")),
+            }
+            for f in group.get("filters", [])
+        ]
+        groups.append(sorted(filters, key=lambda f: json.dumps(f, sort_keys=True)))
+    key = {
+        "filterGroups": sorted(groups, key=lambda g: json.dumps(g, sort_keys=True)),
+        "properties": sorted(payload.get("properties", [])),
+        "sorts": payload.get("sorts", []),
+        "query": _normalize_value("CONTAINS_TOKEN", payload.get("query")),
+    }
+    return json.dumps(key, sort_keys=True)
+
+
+def cached_search(object_type: str, payload: dict[str, Any]) -> list[dict]:
+    """
+    Run a CRM search, reusing a recent result for an equivalent query.
+
+    A cached result for a larger limit serves any smaller limit. Raises
+    requests.HTTPError if the search fails.
+    """
+    limit = payload.get("limit", 10)
+    key = (object_type, normalize_query(payload))
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        generation = _generations[object_type]
+    if entry:
+        stored_at, fetched, complete, results = entry
+        if now - stored_at <= SEARCH_CACHE_TTL and (complete or fetched >= limit):
+            stats["hits"] += 1
+            return results[:limit]
+
+    stats["misses"] += 1
+    fetch_limit = min(max(limit, MIN_FETCH), 200)
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{object_type}/search",
+        json={**payload, "limit": fetch_limit},
+    )
+    resp.raise_for_status()
+    results = resp.json().get("results", [])
+    with _lock:
+        if _generations[object_type] == generation:
+            if len(_entries) >= MAX_ENTRIES:
+                _entries.pop(next(iter(_entries)))
+            complete = len(results) < fetch_limit
+            _entries[key] = (time.monotonic(), fetch_limit, complete, results)
+    return results[:limit]
+
+
+def invalidate_searches(object_type: str) -> None:
+    """Forget cached searches over an object type after it was written."""
+    with _lock:
+        _generations[object_type] += 1
+        for key in [k for k in _entries if k[0] == object_type]:
+            del _entries[key]
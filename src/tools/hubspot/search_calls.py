@@ -1,6 +1,15 @@
 import sys
 import requests
-from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers, CALL_OUTCOMES
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    headers,
+    api_request,
+    get_associated_ids,
+    load_metadata,
+)
+import tools.hubspot as hubspot
+from tools.hubspot.prefetcher import record_read
 
 CALL_PROPERTIES = [
     "hs_call_title",
@@ -12,10 +21,9 @@ CALL_PROPERTIES = [
     "hs_timestamp",
 ]
 
-CALL_OUTCOMES_REVERSE = {v: k for k, v in CALL_OUTCOMES.items()}
-
 
 def format_call(c: dict) -> str:
+    load_metadata()
     props = c.get("properties", {})
     lines = [f"[{c['id']}] {props.get('hs_call_title', 'Untitled')}"]
     if props.get("hs_timestamp"):
@@ -29,7 +37,7 @@ def format_call(c: dict) -> str:
         except ValueError:
             pass
     if props.get("hs_call_disposition"):
-        outcome_label = CALL_OUTCOMES_REVERSE.get(
+        outcome_label = hubspot.CALL_OUTCOMES_REVERSE.get(
             props["hs_call_disposition"], props["hs_call_disposition"]
         )
         lines.append(f"  Outcome: {outcome_label}")
@@ -125,19 +133,20 @@ def _search_by_association(
     elif deal_id:
         obj_type, obj_id = "deals", deal_id
 
-    assoc_url = f"{BASE_URL}/crm/v4/objects/{obj_type}/{obj_id}/associations/calls"
-    resp = requests.get(assoc_url, headers=headers(), params={"limit": 500})
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    if obj_type == "companies":
+        record_read("company_engagements", obj_id)
 
-    ids = [r["toObjectId"] for r in resp.json().get("results", [])]
+    try:
+        ids = get_associated_ids(obj_type, obj_id, "calls")
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
     if not ids:
         return "No calls found"
 
     batch_url = f"{BASE_URL}/crm/v3/objects/calls/batch/read"
-    batch_resp = requests.post(
+    batch_resp = api_request(
+        "POST",
         batch_url,
-        headers=headers(),
         json={
             "inputs": [{"id": cid} for cid in ids[: limit * 2]],
             "properties": CALL_PROPERTIES,
@@ -2,12 +2,12 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     COMPANY_PROPERTIES,
-    LEAD_STATUS_VALUES,
-    headers,
+    load_metadata,
     format_company,
 )
+import tools.hubspot as hubspot
+from tools.hubspot.search_cache import cached_search
 
 
 def search_companies(
@@ -25,7 +25,7 @@ def search_companies(
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/companies/search"
+    load_metadata()
 
     filter_groups = []
 
@@ -54,8 +54,8 @@ def search_companies(
         )
 
     if lead_status:
-        if lead_status not in LEAD_STATUS_VALUES:
-            return f"Error: Invalid lead_status. Must be one of: {', '.join(LEAD_STATUS_VALUES)}"
+        if lead_status not in hubspot.LEAD_STATUS_VALUES:
+            return f"Error: Invalid lead_status. Must be one of: {', '.join(hubspot.LEAD_STATUS_VALUES)}"
         filter_groups.append(
             {
                 "filters": [
@@ -77,11 +77,11 @@ def search_companies(
         "limit": limit,
     }
 
-    resp = requests.post(url, headers=headers(), json=payload)
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    try:
+        results = cached_search("companies", payload)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
 
-    results = resp.json().get("results", [])
     if not results:
         return "No companies found"
 
@@ -2,11 +2,10 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     CONTACT_PROPERTIES,
-    headers,
     format_contact,
 )
+from tools.hubspot.search_cache import cached_search
 
 
 def search_contacts(query: str, limit: int = 10) -> str:
@@ -14,7 +13,6 @@ def search_contacts(query: str, limit: int = 10) -> str:
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/contacts/search"
     payload = {
         "filterGroups": [
             {
@@ -49,11 +47,11 @@ def search_contacts(query: str, limit: int = 10) -> str:
         "limit": limit,
     }
 
-    resp = requests.post(url, headers=headers(), json=payload)
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    try:
+        results = cached_search("contacts", payload)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
 
-    results = resp.json().get("results", [])
     if not results:
         return "No contacts found"
 
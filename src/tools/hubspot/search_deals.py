@@ -2,12 +2,12 @@ import sys
 import requests
 from tools.hubspot import (
     HUBSPOT_TOKEN,
-    BASE_URL,
     DEAL_PROPERTIES,
-    DEAL_STAGES,
-    headers,
+    load_metadata,
     format_project,
 )
+import tools.hubspot as hubspot
+from tools.hubspot.search_cache import cached_search
 
 
 def search_projects(
@@ -27,7 +27,7 @@ def search_projects(
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
 
-    url = f"{BASE_URL}/crm/v3/objects/deals/search"
+    load_metadata()
 
     filter_groups = []
 
@@ -45,17 +45,15 @@ def search_projects(
         )
 
     if stage:
-        if stage not in DEAL_STAGES:
-            return (
-                f"Error: Invalid stage. Must be one of: {', '.join(DEAL_STAGES.keys())}"
-            )
+        if stage not in hubspot.DEAL_STAGES:
+            return f"Error: Invalid stage. Must be one of: {', '.join(hubspot.DEAL_STAGES.keys())}"
         filter_groups.append(
             {
                 "filters": [
                     {
                         "propertyName": "dealstage",
                         "operator": "EQ",
-                        "value": DEAL_STAGES[stage],
+                        "value": hubspot.DEAL_STAGES[stage],
                     }
                 ]
             }
@@ -70,11 +68,11 @@ def search_projects(
         "limit": limit,
     }
 
-    resp = requests.post(url, headers=headers(), json=payload)
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    try:
+        results = cached_search("deals", payload)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
 
-    results = resp.json().get("results", [])
     if not results:
         return "No projects found"
 
@@ -1,6 +1,14 @@
 import sys
 import requests
-from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    headers,
+    api_request,
+    get_associated_ids,
+)
+from tools.hubspot.prefetcher import record_read
+from tools.email_body import BODY_MODES, reduce_body
 
 EMAIL_PROPERTIES = [
     "hs_email_subject",
@@ -13,7 +21,7 @@ EMAIL_PROPERTIES = [
 ]
 
 
-def format_email(e: dict) -> str:
+def format_email(e: dict, mode: str = "full") -> str:
     props = e.get("properties", {})
     subject = props.get("hs_email_subject", "No Subject")
     lines = [f"[{e['id']}] {subject}"]
@@ -28,8 +36,9 @@ def format_email(e: dict) -> str:
         lines.append(f"  From: {sender} → To: {to}")
     if props.get("hs_email_status"):
         lines.append(f"  Status: {props['hs_email_status']}")
-    if props.get("hs_email_text"):
-        lines.append(f"  Body: {props['hs_email_text'][:2000]}")
+    body = reduce_body(props.get("hs_email_text") or "", mode)
+    if body:
+        lines.append(f"  Body: {body[:2000]}")
     return "\n".join(lines)
 
 
@@ -40,6 +49,7 @@ def search_emails(
     after_date: str | None = None,
     before_date: str | None = None,
     limit: int = 10,
+    mode: str = "full",
 ) -> str:
     """
     Search HubSpot emails by association, subject, or date range.
@@ -51,15 +61,19 @@ def search_emails(
         after_date: Only emails after this date (YYYY-MM-DD)
         before_date: Only emails before this date (YYYY-MM-DD)
         limit: Max results (default 10)
+        mode: "full" (default) shows the whole body; "new" shows only each
+              email's own text, without quoted replies, forwards or signatures
 
     At least one filter must be provided.
     """
     if not HUBSPOT_TOKEN:
         return "Error: HUBSPOT_ACCESS_TOKEN not set"
+    if mode not in BODY_MODES:
+        return f"Error: mode must be one of: {', '.join(BODY_MODES)}"
 
     if contact_id or company_id:
         return _search_by_association(
-            contact_id, company_id, subject, after_date, before_date, limit
+            contact_id, company_id, subject, after_date, before_date, limit, mode
         )
 
     filters: list[dict] = []
@@ -108,7 +122,7 @@ def search_emails(
     if not results:
         return "No emails found"
 
-    return "\n\n".join(format_email(e) for e in results)
+    return "\n\n".join(format_email(e, mode) for e in results)
 
 
 def _search_by_association(
@@ -118,6 +132,7 @@ def _search_by_association(
     after_date: str | None,
     before_date: str | None,
     limit: int,
+    mode: str,
 ) -> str:
     obj_type, obj_id = None, None
     if contact_id:
@@ -125,19 +140,20 @@ def _search_by_association(
     elif company_id:
         obj_type, obj_id = "companies", company_id
 
-    assoc_url = f"{BASE_URL}/crm/v4/objects/{obj_type}/{obj_id}/associations/emails"
-    resp = requests.get(assoc_url, headers=headers(), params={"limit": 500})
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    if obj_type == "companies":
+        record_read("company_engagements", obj_id)
 
-    ids = [r["toObjectId"] for r in resp.json().get("results", [])]
+    try:
+        ids = get_associated_ids(obj_type, obj_id, "emails")
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
     if not ids:
         return "No emails found"
 
     batch_url = f"{BASE_URL}/crm/v3/objects/emails/batch/read"
-    batch_resp = requests.post(
+    batch_resp = api_request(
+        "POST",
         batch_url,
-        headers=headers(),
         json={
             "inputs": [{"id": eid} for eid in ids[: limit * 3]],
             "properties": EMAIL_PROPERTIES,
@@ -178,7 +194,7 @@ def _search_by_association(
     if not results:
         return "No emails found"
 
-    return "\n\n".join(format_email(e) for e in results)
+    return "\n\n".join(format_email(e, mode) for e in results)
 
 
 if __name__ == "__main__":
@@ -191,6 +207,7 @@ if __name__ == "__main__":
     parser.add_argument("--after", dest="after_date")
     parser.add_argument("--before", dest="before_date")
     parser.add_argument("--limit", "-l", type=int, default=10)
+    parser.add_argument("--mode", choices=BODY_MODES, default="full")
     args = parser.parse_args()
     print(
         search_emails(
@@ -200,5 +217,6 @@ if __name__ == "__main__":
             args.after_date,
             args.before_date,
             args.limit,
+            args.mode,
         )
     )
@@ -1,6 +1,14 @@
 import sys
 import requests
-from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers, MEETING_OUTCOMES
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    headers,
+    api_request,
+    get_associated_ids,
+    MEETING_OUTCOMES,
+)
+from tools.hubspot.prefetcher import record_read
 
 MEETING_PROPERTIES = [
     "hs_meeting_title",
@@ -133,19 +141,20 @@ def _search_by_association(
     elif deal_id:
         obj_type, obj_id = "deals", deal_id
 
-    assoc_url = f"{BASE_URL}/crm/v4/objects/{obj_type}/{obj_id}/associations/meetings"
-    resp = requests.get(assoc_url, headers=headers(), params={"limit": 500})
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    if obj_type == "companies":
+        record_read("company_engagements", obj_id)
 
-    ids = [r["toObjectId"] for r in resp.json().get("results", [])]
+    try:
+        ids = get_associated_ids(obj_type, obj_id, "meetings")
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
     if not ids:
         return "No meetings found"
 
     batch_url = f"{BASE_URL}/crm/v3/objects/meetings/batch/read"
-    batch_resp = requests.post(
+    batch_resp = api_request(
+        "POST",
         batch_url,
-        headers=headers(),
         json={
             "inputs": [{"id": mid} for mid in ids[: limit * 2]],
             "properties": MEETING_PROPERTIES,
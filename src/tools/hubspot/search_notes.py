@@ -1,6 +1,13 @@
 import sys
 import requests
-from tools.hubspot import HUBSPOT_TOKEN, BASE_URL, headers
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    headers,
+    api_request,
+    get_associated_ids,
+)
+from tools.hubspot.prefetcher import record_read
 
 NOTE_PROPERTIES = [
     "hs_note_body",
@@ -106,19 +113,20 @@ def _search_by_association(
     elif deal_id:
         obj_type, obj_id = "deals", deal_id
 
-    assoc_url = f"{BASE_URL}/crm/v4/objects/{obj_type}/{obj_id}/associations/notes"
-    resp = requests.get(assoc_url, headers=headers(), params={"limit": 500})
-    if resp.status_code != 200:
-        return f"Error: {resp.status_code}"
+    if obj_type == "companies":
+        record_read("company_engagements", obj_id)
 
-    ids = [r["toObjectId"] for r in resp.json().get("results", [])]
+    try:
+        ids = get_associated_ids(obj_type, obj_id, "notes")
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
     if not ids:
         return "No notes found"
 
     batch_url = f"{BASE_URL}/crm/v3/objects/notes/batch/read"
-    batch_resp = requests.post(
+    batch_resp = api_request(
+        "POST",
         batch_url,
-        headers=headers(),
         json={
             "inputs": [{"id": nid} for nid in ids[: limit * 2]],
             "properties": NOTE_PROPERTIES,
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any
+import requests
+from tools.hubspot import (
+    LOCAL_STORE_PATH,
+    COMPANY_PROPERTIES,
+    DEAL_PROPERTIES,
+    MODIFIED_PROPERTY,
+    iter_object_pages,
+    iter_modified_since,
+    prefetch,
+)
+
+SNAPSHOT_DIR = os.path.join(LOCAL_STORE_PATH, "snapshots")
+# Incremental syncs can't see deletions, so rebuild from scratch this often
+FULL_REFRESH_SECONDS = 24 * 3600
+# Overlap incremental syncs to cover clock skew and in-flight writes
+SYNC_OVERLAP_MS = 60_000
+
+# Property sets shared by the analytics tools so they sync one snapshot
+DEAL_SNAPSHOT_PROPERTIES = DEAL_PROPERTIES + ["hubspot_owner_id"]
+COMPANY_SNAPSHOT_PROPERTIES = COMPANY_PROPERTIES
+
+
+class Snapshot:
+    """Columnar local copy of every record of one object type, refreshed incrementally."""
+
+    def __init__(self, object_type: str, properties: list[str]):
+        self.object_type = object_type
+        self.properties = list(dict.fromkeys(properties))
+        key = hashlib.sha1(",".join(sorted(self.properties)).encode()).hexdigest()[:8]
+        self.path = os.path.join(SNAPSHOT_DIR, f"{object_type}-{key}.json")
+        self.ids: list[str] = []
+        self.columns: dict[str, list[str | None]] = {p: [] for p in self.properties}
+        self.synced_at = 0
+        self.full_synced_at = 0
+        # Bumped on every change so derived indexes know when to rebuild
+        self.version = 0
+        self._index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._background: threading.Thread | None = None
+        self._background_lock = threading.Lock()
+        # Records upserted while a sync held the lock, applied once it's done
+        self._pending: list[dict[str, Any]] = []
+        self._pending_lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if set(data["columns"]) != set(self.properties):
+            return
+        self.ids = data["ids"]
+        self.columns = data["columns"]
+        self.synced_at = data["synced_at"]
+        self.full_synced_at = data["full_synced_at"]
+        self._index = {id_: i for i, id_ in enumerate(self.ids)}
+
+    def _save(self) -> None:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "object_type": self.object_type,
+                    "synced_at": self.synced_at,
+                    "full_synced_at": self.full_synced_at,
+                    "ids": self.ids,
+                    "columns": self.columns,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp, self.path)
+
+    def _upsert(
+        self,
+        obj: dict[str, Any],
+        ids: list[str],
+        columns: dict[str, list[str | None]],
+        index: dict[str, int],
+    ) -> None:
+        props = obj.get("properties", {})
+        row = index.get(obj["id"])
+        if row is None:
+            index[obj["id"]] = len(ids)
+            ids.append(obj["id"])
+            for p in self.properties:
+                columns[p].append(props.get(p))
+        else:
+            for p in self.properties:
+                columns[p][row] = props.get(p)
+
+    def refresh(
+        self, max_age: float = 300, full: bool = False, allow_full: bool = True
+    ) -> int:
+        """
+        Bring the snapshot up to date if older than max_age seconds. Returns rows updated.
+
+        With allow_full=False a due full rebuild is put off (an incremental
+        sync runs instead) and a never-synced snapshot is left empty, so
+        latency-sensitive callers never wait on reading every record.
+        """
+        # Checked before taking the lock too, so a fresh enough snapshot is
+        # usable while a background sync holds it
+        if not full and time.time() * 1000 - self.synced_at < max_age * 1000:
+            return 0
+        try:
+            with self._lock:
+                return self._refresh(max_age, full, allow_full)
+        finally:
+            if self._pending:
+                # Upserted just as the sync finished
+                self.upsert([])
+
+    def _refresh(self, max_age: float, full: bool, allow_full: bool) -> int:
+        now_ms = int(time.time() * 1000)
+        if not full and now_ms - self.synced_at < max_age * 1000:
+            return 0
+        due = self.full_sync_due
+        if due and not full and not allow_full:
+            if not self.full_synced_at:
+                return 0
+            due = False
+        full = full or due
+        if full:
+            # Build into fresh columns so readers never see a half-loaded snapshot
+            ids: list[str] = []
+            columns: dict[str, list[str | None]] = {p: [] for p in self.properties}
+            index: dict[str, int] = {}
+            pages = iter_object_pages(self.object_type, self.properties)
+        else:
+            ids, columns, index = self.ids, self.columns, self._index
+            since = self.synced_at - SYNC_OVERLAP_MS
+            pages = iter_modified_since(self.object_type, self.properties, since)
+        updated = 0
+        for page in prefetch(pages):
+            for obj in page:
+                self._upsert(obj, ids, columns, index)
+            updated += len(page)
+        if full:
+            self.ids, self.columns, self._index = ids, columns, index
+            self.full_synced_at = now_ms
+        if full or updated:
+            self.version += 1
+        self._apply_pending()
+        self.synced_at = now_ms
+        self._save()
+        return updated
+
+    @property
+    def full_sync_due(self) -> bool:
+        return time.time() - self.full_synced_at / 1000 > FULL_REFRESH_SECONDS
+
+    @property
+    def syncing(self) -> bool:
+        """Whether a refresh_in_background sync is still running."""
+        return self._background is not None and self._background.is_alive()
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh, with any due full rebuild, unless one is running."""
+        with self._background_lock:
+            if self.syncing:
+                return
+            self._background = threading.Thread(
+                target=self._refresh_quietly, daemon=True
+            )
+            self._background.start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh(max_age=0)
+        except requests.RequestException:
+            # Left as it was; the next caller to find the sync due starts another
+            pass
+
+    def upsert(self, records: list[dict[str, Any]]) -> None:
+        """
+        Apply records just written to HubSpot; persisted with the next refresh.
+
+        Never waits on a running sync: the records are applied when it ends,
+        on top of what it read.
+        """
+        with self._pending_lock:
+            self._pending.extend(records)
+        if self._lock.acquire(blocking=False):
+            try:
+                self._apply_pending()
+            finally:
+                self._lock.release()
+
+    def _apply_pending(self) -> None:
+        with self._pending_lock:
+            records, self._pending = self._pending, []
+        for obj in records:
+            self._upsert(obj, self.ids, self.columns, self._index)
+        if records:
+            self.version += 1
+
+    def rows(self) -> list[dict[str, Any]]:
+        return [
+            {"id": id_, **{p: self.columns[p][i] for p in self.properties}}
+            for i, id_ in enumerate(self.ids)
+        ]
+
+
+_snapshots: dict[tuple[str, frozenset[str]], Snapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(object_type: str, properties: list[str]) -> Snapshot:
+    """Shared snapshot for an object type and property set, loaded from disk once."""
+    modified = MODIFIED_PROPERTY.get(object_type, "hs_lastmodifieddate")
+    properties = [*properties, modified]
+    key = (object_type, frozenset(properties))
+    with _snapshots_lock:
+        if key not in _snapshots:
+            _snapshots[key] = Snapshot(object_type, properties)
+        return _snapshots[key]
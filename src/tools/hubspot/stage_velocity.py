@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from statistics import mean, median
+from typing import Any
+import requests
+from tools.hubspot import (
+    HUBSPOT_TOKEN,
+    BASE_URL,
+    LOCAL_STORE_PATH,
+    MODIFIED_PROPERTY,
+    api_request,
+    get_owner_names,
+    load_metadata,
+)
+import tools.hubspot as hubspot
+from tools.hubspot.snapshot import (
+    COMPANY_SNAPSHOT_PROPERTIES,
+    DEAL_SNAPSHOT_PROPERTIES,
+    get_snapshot,
+)
+
+HISTORY_DIR = os.path.join(LOCAL_STORE_PATH, "history")
+# Batch reads that include property history accept at most 50 IDs
+HISTORY_BATCH_SIZE = 50
+
+# object type -> (tracked property, snapshot properties, product type property)
+TRACKED = {
+    "deals": ("dealstage", DEAL_SNAPSHOT_PROPERTIES, "product_type"),
+    "companies": ("hs_lead_status", COMPANY_SNAPSHOT_PROPERTIES, "product_types"),
+}
+GROUP_BY = ["owner", "product_type"]
+MAX_GROUPS = 10
+DAY_MS = 86_400_000
+
+_lock = threading.Lock()
+
+
+def _load_history(object_type: str) -> dict[str, Any]:
+    path = os.path.join(HISTORY_DIR, f"{object_type}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_history(object_type: str, history: dict[str, Any]) -> None:
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    path = os.path.join(HISTORY_DIR, f"{object_type}.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(history, f, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+
+
+def _to_ms(timestamp: str) -> int:
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+def _read_history(object_type: str, prop: str, ids: list[str]) -> dict[str, list]:
+    resp = api_request(
+        "POST",
+        f"{BASE_URL}/crm/v3/objects/{object_type}/batch/read",
+        json={
+            "properties": [prop],
+            "propertiesWithHistory": [prop],
+            "inputs": [{"id": i} for i in ids],
+        },
+    )
+    resp.raise_for_status()
+    histories = {}
+    for result in resp.json().get("results", []):
+        entries = result.get("propertiesWithHistory", {}).get(prop, [])
+        changes: list[list] = []
+        for entry in sorted(entries, key=lambda e: e["timestamp"]):
+            # Re-setting the same value isn't a transition
+            if entry.get("value") and (not changes or changes[-1][1] != entry["value"]):
+                changes.append([_to_ms(entry["timestamp"]), entry["value"]])
+        histories[result["id"]] = changes
+    return histories
+
+
+def sync_history(
+    object_type: str, current: dict[str, tuple[str, str]], closed: list[str]
+) -> dict[str, list]:
+    """
+    Return the tracked property's change history for every record in `current`
+    (id -> (current value, last modified)), fetching only what the cache lacks.
+
+    Records in a closed stage whose cached history already ends there never
+    change again; open records are re-read only when modified since cached.
+    """
+    prop = TRACKED[object_type][0]
+    with _lock:
+        cache = _load_history(object_type)
+        stale = []
+        for id_, (value, modified) in current.items():
+            entry = cache.get(id_)
+            if entry and (
+                entry["modified"] == modified
+                or (
+                    value in closed
+                    and entry["changes"][-1:]
+                    and entry["changes"][-1][1] == value
+                )
+            ):
+                continue
+            stale.append(id_)
+
+        chunks = [
+            stale[i : i + HISTORY_BATCH_SIZE]
+            for i in range(0, len(stale), HISTORY_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for histories in pool.map(
+                lambda chunk: _read_history(object_type, prop, chunk), chunks
+            ):
+                for id_, changes in histories.items():
+                    cache[id_] = {"modified": current[id_][1], "changes": changes}
+
+        removed = set(cache) - set(current)
+        for id_ in removed:
+            del cache[id_]
+        if stale or removed:
+            _save_history(object_type, cache)
+    return {id_: cache[id_]["changes"] for id_ in current if id_ in cache}
+
+
+def _stage_line(label: str, durations: list[float], ages: list[float]) -> str:
+    parts = []
+    if durations:
+        parts.append(
+            f"median {median(durations):.1f} days, mean {mean(durations):.1f} "
+            f"(n={len(durations)})"
+        )
+    if ages:
+        parts.append(
+            f"{len(ages)} currently in stage, median age {median(ages):.1f} days"
+        )
+    return f"  {label}: {'; '.join(parts)}"
+
+
+def _record_timeline(
+    object_type: str, record_id: str, labels: dict[str, str], closed: list[str]
+) -> str:
+    """Every stage one record has been in, when it entered and for how long."""
+    prop = TRACKED[object_type][0]
+    noun = "deal" if object_type == "deals" else "company"
+    changes = _read_history(object_type, prop, [record_id]).get(record_id)
+    if changes is None:
+        return f"Error: {noun.capitalize()} not found"
+    if not changes:
+        return f"No stage history found for {noun} {record_id}"
+
+    now = int(time.time() * 1000)
+    output = [f"Stage timeline for {noun} {record_id}"]
+    for i, (start, stage) in enumerate(changes):
+        entered = datetime.fromtimestamp(start / 1000).strftime("%Y-%m-%d")
+        line = f"  {entered} {labels.get(stage, stage)}"
+        if i + 1 < len(changes):
+            line += f": {(changes[i + 1][0] - start) / DAY_MS:.1f} days"
+        elif stage in closed:
+            line += " (closed)"
+        else:
+            line += f": {(now - start) / DAY_MS:.1f} days so far (current)"
+        output.append(line)
+    return "\n".join(output)
+
+
+def stage_velocity(
+    object_type: str = "deals",
+    group_by: str | None = None,
+    days: int = 365,
+    refresh: bool = False,
+    record_id: str | None = None,
+) -> str:
+    """
+    Report time-in-stage and stage-transition rates from property history.
+
+    Deals use dealstage; companies use hs_lead_status. History is cached on
+    disk and only re-read for records modified since the last run.
+
+    Args:
+        object_type: deals or companies (default deals)
+        group_by: Optional breakdown by owner or product_type
+        days: Only count stays and transitions ending in this many days (default 365)
+        refresh: Rebuild the local snapshot of records from scratch
+        record_id: Show this one deal's (or company's) stage timeline instead
+    """
+    if not HUBSPOT_TOKEN:
+        return "Error: HUBSPOT_ACCESS_TOKEN not set"
+    if object_type not in TRACKED:
+        return f"Error: object_type must be one of: {', '.join(TRACKED)}"
+    if group_by and group_by not in GROUP_BY:
+        return f"Error: group_by must be one of: {', '.join(GROUP_BY)}"
+
+    load_metadata()
+    prop, properties, product_prop = TRACKED[object_type]
+    if object_type == "deals":
+        labels, order, closed = (
+            hubspot.DEAL_STAGES_REVERSE,
+            list(hubspot.DEAL_STAGES.values()),
+            hubspot.CLOSED_DEAL_STAGES,
+        )
+    else:
+        labels, order, closed = {}, list(hubspot.LEAD_STATUS_VALUES), []
+
+    if record_id:
+        try:
+            return _record_timeline(object_type, record_id, labels, closed)
+        except requests.HTTPError as err:
+            return f"Error: {err.response.status_code}"
+
+    snapshot = get_snapshot(object_type, properties)
+    try:
+        snapshot.refresh(max_age=0 if refresh else 300, full=refresh)
+        modified = snapshot.columns[
+            MODIFIED_PROPERTY.get(object_type, "hs_lastmodifieddate")
+        ]
+        current = {
+            id_: (value or "", modified[i] or "")
+            for i, (id_, value) in enumerate(zip(snapshot.ids, snapshot.columns[prop]))
+        }
+        histories = sync_history(object_type, current, closed)
+    except requests.HTTPError as err:
+        return f"Error: {err.response.status_code}"
+
+    if group_by == "owner":
+        owners = get_owner_names()
+        raw = snapshot.columns["hubspot_owner_id"]
+        groups = [owners.get(o, f"Owner {o}") if o else "Unassigned" for o in raw]
+    elif group_by == "product_type":
+        groups = [v or "Unspecified" for v in snapshot.columns[product_prop]]
+    else:
+        groups = ["All"] * len(snapshot.ids)
+    group_of = dict(zip(snapshot.ids, groups))
+
+    now = int(time.time() * 1000)
+    cutoff = now - days * DAY_MS
+    durations: dict[str, dict[str, list[float]]] = defaultdict(
+        lambda: defaultdict(list)
+    )
+    ages: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+    transitions: dict[str, Counter[tuple[str, str]]] = defaultdict(Counter)
+    for id_, changes in histories.items():
+        group = group_of.get(id_, "All")
+        for (start, stage), (end, next_stage) in zip(changes, changes[1:]):
+            if end >= cutoff:
+                durations[group][stage].append((end - start) / DAY_MS)
+                transitions[group][(stage, next_stage)] += 1
+        if changes and changes[-1][1] not in closed:
+            start, stage = changes[-1]
+            ages[group][stage].append((now - start) / DAY_MS)
+
+    if not durations and not ages:
+        return "No stage history found"
+
+    rank = {stage: i for i, stage in enumerate(order)}
+
+    def stage_key(stage: str) -> tuple[int, str]:
+        return rank.get(stage, len(rank)), stage
+
+    output = [f"Stage velocity for {object_type} (last {days} days)"]
+    group_names = sorted(
+        set(durations) | set(ages),
+        key=lambda g: -sum(len(v) for v in durations[g].values()),
+    )
+    for group in group_names[:MAX_GROUPS]:
+        if group_by:
+            output.append(f"\n== {group} ==")
+        output.append("\nTime in stage:")
+        for stage in sorted(set(durations[group]) | set(ages[group]), key=stage_key):
+            output.append(
+                _stage_line(
+                    labels.get(stage, stage),
+                    durations[group][stage],
+                    ages[group][stage],
+                )
+            )
+
+        exits = Counter[str]()
+        for (stage, _), n in transitions[group].items():
+            exits[stage] += n
+        if exits:
+            output.append("\nTransitions:")
+        for (stage, next_stage), n in sorted(
+            transitions[group].items(), key=lambda t: (stage_key(t[0][0]), -t[1])
+        ):
+            output.append(
+                f"  {labels.get(stage, stage)} -> {labels.get(next_stage, next_stage)}: "
+                f"{n} ({n / exits[stage]:.0%})"
+            )
+    if len(group_names) > MAX_GROUPS:
+        output.append(f"\n... and {len(group_names) - MAX_GROUPS} more groups")
+
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("object_type", nargs="?", default="deals", choices=TRACKED)
+    parser.add_argument("--group-by", choices=GROUP_BY)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument(
+        "--refresh", action="store_true", help="Rebuild the snapshot from scratch"
+    )
+    parser.add_argument("--record-id", help="Show one record's stage timeline")
+    args = parser.parse_args()
+    print(
+        stage_velocity(
+            args.object_type, args.group_by, args.days, args.refresh, args.record_id
+        )
+    )
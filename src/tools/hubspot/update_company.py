@@ -1,16 +1,18 @@
 import sys
-import requests
 from typing import Any
 from tools.hubspot import (
     HUBSPOT_TOKEN,
     BASE_URL,
     COMPANY_PROPERTIES,
-    headers,
+    api_request,
     format_company,
     validate_lead_status,
     validate_product_types,
     validate_icp_tier,
 )
+from tools.hubspot.cache import cache_record, get_cached_record, merge_cached_record
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def update_company(
@@ -87,20 +89,42 @@ def update_company(
     if not properties:
         return "Error: No properties to update"
 
+    cached = get_cached_record("companies", company_id, COMPANY_PROPERTIES)
+    if cached:
+        properties = {
+            k: v for k, v in properties.items() if cached["properties"].get(k) != v
+        }
+        if not properties:
+            return format_company(cached)
+
     url = f"{BASE_URL}/crm/v3/objects/companies/{company_id}"
     payload: dict[str, Any] = {"properties": properties}
 
-    resp = requests.patch(url, headers=headers(), json=payload)
+    if WRITE_BEHIND:
+        handle = queue_write("companies", payload, company_id)
+        merged = merge_cached_record("companies", company_id, properties)
+        record = merged or {"id": company_id, "properties": properties}
+        return f"{format_company(record)}\n  Status: queued [handle: {handle}]"
+
+    resp = api_request("PATCH", url, json=payload)
     if resp.status_code == 404:
         return "Error: Company not found"
     if resp.status_code != 200:
         return f"Error: {resp.status_code}"
+    invalidate_searches("companies")
+
+    # PATCH only returns updated properties, so merge into the cached record
+    merged = merge_cached_record(
+        "companies", company_id, resp.json().get("properties", {})
+    )
+    if cached and merged:
+        return format_company(merged)
 
-    # Fetch full company to get all properties (PATCH only returns updated ones)
-    get_resp = requests.get(
-        url, headers=headers(), params={"properties": ",".join(COMPANY_PROPERTIES)}
+    get_resp = api_request(
+        "GET", url, params={"properties": ",".join(COMPANY_PROPERTIES)}
     )
     if get_resp.status_code == 200:
+        cache_record("companies", get_resp.json(), COMPANY_PROPERTIES)
         return format_company(get_resp.json())
     return format_company(resp.json())
 
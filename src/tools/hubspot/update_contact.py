@@ -1,13 +1,15 @@
 import sys
-import requests
 from typing import Any
 from tools.hubspot import (
     HUBSPOT_TOKEN,
     BASE_URL,
     CONTACT_PROPERTIES,
-    headers,
+    api_request,
     format_contact,
 )
+from tools.hubspot.cache import cache_record, get_cached_record, merge_cached_record
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def update_contact(
@@ -47,20 +49,42 @@ def update_contact(
     if not properties:
         return "Error: No properties to update"
 
+    cached = get_cached_record("contacts", contact_id, CONTACT_PROPERTIES)
+    if cached:
+        properties = {
+            k: v for k, v in properties.items() if cached["properties"].get(k) != v
+        }
+        if not properties:
+            return format_contact(cached)
+
     url = f"{BASE_URL}/crm/v3/objects/contacts/{contact_id}"
     payload: dict[str, Any] = {"properties": properties}
 
-    resp = requests.patch(url, headers=headers(), json=payload)
+    if WRITE_BEHIND:
+        handle = queue_write("contacts", payload, contact_id)
+        merged = merge_cached_record("contacts", contact_id, properties)
+        record = merged or {"id": contact_id, "properties": properties}
+        return f"{format_contact(record)}\n  Status: queued [handle: {handle}]"
+
+    resp = api_request("PATCH", url, json=payload)
     if resp.status_code == 404:
         return "Error: Contact not found"
     if resp.status_code != 200:
         return f"Error: {resp.status_code}"
+    invalidate_searches("contacts")
+
+    # PATCH only returns updated properties, so merge into the cached record
+    merged = merge_cached_record(
+        "contacts", contact_id, resp.json().get("properties", {})
+    )
+    if cached and merged:
+        return format_contact(merged)
 
-    # Fetch full contact to get all properties (PATCH only returns updated ones)
-    get_resp = requests.get(
-        url, headers=headers(), params={"properties": ",".join(CONTACT_PROPERTIES)}
+    get_resp = api_request(
+        "GET", url, params={"properties": ",".join(CONTACT_PROPERTIES)}
     )
     if get_resp.status_code == 200:
+        cache_record("contacts", get_resp.json(), CONTACT_PROPERTIES)
         return format_contact(get_resp.json())
     return format_contact(resp.json())
 
@@ -1,15 +1,17 @@
 import sys
-import requests
 from typing import Any
 from tools.hubspot import (
     HUBSPOT_TOKEN,
     BASE_URL,
     DEAL_PROPERTIES,
-    headers,
+    api_request,
     format_project,
     validate_deal_stage,
     validate_product_type,
 )
+from tools.hubspot.cache import cache_record, get_cached_record, merge_cached_record
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.write_queue import WRITE_BEHIND, queue_write
 
 
 def update_project(
@@ -70,20 +72,38 @@ def update_project(
     if not properties:
         return "Error: No properties to update"
 
+    cached = get_cached_record("deals", deal_id, DEAL_PROPERTIES)
+    if cached:
+        properties = {
+            k: v for k, v in properties.items() if cached["properties"].get(k) != v
+        }
+        if not properties:
+            return format_project(cached)
+
     url = f"{BASE_URL}/crm/v3/objects/deals/{deal_id}"
     payload: dict[str, Any] = {"properties": properties}
 
-    resp = requests.patch(url, headers=headers(), json=payload)
+    if WRITE_BEHIND:
+        handle = queue_write("deals", payload, deal_id)
+        merged = merge_cached_record("deals", deal_id, properties)
+        record = merged or {"id": deal_id, "properties": properties}
+        return f"{format_project(record)}\n  Status: queued [handle: {handle}]"
+
+    resp = api_request("PATCH", url, json=payload)
     if resp.status_code == 404:
         return "Error: Project not found"
     if resp.status_code != 200:
         return f"Error: {resp.status_code}"
+    invalidate_searches("deals")
 
-    # Fetch full deal to get all properties (PATCH only returns updated ones)
-    get_resp = requests.get(
-        url, headers=headers(), params={"properties": ",".join(DEAL_PROPERTIES)}
-    )
+    # PATCH only returns updated properties, so merge into the cached record
+    merged = merge_cached_record("deals", deal_id, resp.json().get("properties", {}))
+    if cached and merged:
+        return format_project(merged)
+
+    get_resp = api_request("GET", url, params={"properties": ",".join(DEAL_PROPERTIES)})
     if get_resp.status_code == 200:
+        cache_record("deals", get_resp.json(), DEAL_PROPERTIES)
         return format_project(get_resp.json())
     return format_project(resp.json())
 
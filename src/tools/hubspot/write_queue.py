@@ -0,0 +1,495 @@
+import os
+import json
+import time
+import uuid
+import threading
+from typing import Any
+import requests
+from tools.hubspot import (
+    BASE_URL,
+    LOCAL_STORE_PATH,
+    BATCH_SIZE,
+    api_request,
+    batch_error_messages,
+    find_by_property,
+    trace_property,
+)
+from tools.hubspot.cache import cache_record, invalidate_linked, invalidate_record
+from tools.hubspot.search_cache import invalidate_searches
+from tools.hubspot.snapshot import COMPANY_SNAPSHOT_PROPERTIES, get_snapshot
+
+# Opt-in: queue creates/updates locally and send them in the background
+WRITE_BEHIND = os.getenv("HUBSPOT_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+JOURNAL_PATH = os.path.join(LOCAL_STORE_PATH, "write_queue.jsonl")
+# How long to gather writes before flushing, so bursts go out as one batch
+FLUSH_INTERVAL = 2.0
+MAX_BACKOFF = 300
+# Completed handles kept so later writes can still refer to them
+MAX_DONE = 1000
+HANDLE_PREFIX = "local-"
+
+
+class WriteQueue:
+    """
+    Durable queue of HubSpot creates and updates, flushed in batches by a
+    background thread. Every state change is appended to a journal file
+    first, so queued writes survive restarts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._worker: threading.Thread | None = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                op = event.pop("op")
+                if op == "enqueue":
+                    self._entries[event["handle"]] = {**event, "status": "pending"}
+                elif op == "sent" and event["handle"] in self._entries:
+                    self._entries[event["handle"]].update(event)
+                elif event["handle"] in self._entries or op == "done":
+                    entry = self._entries.setdefault(event["handle"], {})
+                    entry.update(event, status=op)
+        self._compact()
+
+    def _append(self, events: list[dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only live entries and recent handle mappings."""
+        done = [h for h, e in self._entries.items() if e["status"] == "done"]
+        for handle in done[:-MAX_DONE]:
+            del self._entries[handle]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for handle, entry in self._entries.items():
+                if entry["status"] == "done":
+                    event = {"op": "done", "handle": handle, "id": entry["id"]}
+                else:
+                    event = {
+                        "op": "enqueue",
+                        **{k: v for k, v in entry.items() if k != "status"},
+                    }
+                f.write(json.dumps(event) + "\n")
+                if entry["status"] == "failed":
+                    event = {"op": "failed", "handle": handle, "error": entry["error"]}
+                    f.write(json.dumps(event) + "\n")
+        os.replace(tmp, self.path)
+
+    def enqueue(
+        self,
+        object_type: str,
+        payload: dict[str, Any],
+        object_id: str | None = None,
+        linked: dict[str, str | None] | None = None,
+    ) -> str:
+        """
+        Journal a create (no object_id) or update and return its local handle.
+
+        linked holds the contact_id, company_id and deal_id a create is
+        associated with; their cached association lists are dropped once the
+        create lands.
+        """
+        handle = f"{HANDLE_PREFIX}{uuid.uuid4().hex[:12]}"
+        entry = {
+            "handle": handle,
+            "object_type": object_type,
+            "object_id": object_id,
+            "payload": payload,
+            "queued_at": time.time(),
+        }
+        if linked:
+            entry["linked"] = linked
+        with self._lock:
+            self._append([{"op": "enqueue", **entry}])
+            self._entries[handle] = {**entry, "status": "pending"}
+        self.start()
+        self._wake.set()
+        return handle
+
+    def start(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            # Let a burst of writes accumulate before sending
+            time.sleep(FLUSH_INTERVAL if self._wake.is_set() else 0)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Never let one bad flush stop the worker; entries stay pending
+                pass
+
+    def _resolve(self, value: str | None) -> tuple[str | None, str]:
+        """Map a handle to its HubSpot ID. Returns (id, status of the handle)."""
+        if not value or not value.startswith(HANDLE_PREFIX):
+            return value, "done"
+        entry = self._entries.get(value)
+        if entry is None:
+            return None, "failed"
+        return entry.get("id"), entry["status"]
+
+    def _prepare(self, entry: dict[str, Any]) -> tuple[dict | None, str | None, str]:
+        """Swap handles for real IDs; returns (payload, object_id, readiness)."""
+        payload = json.loads(json.dumps(entry["payload"]))
+        object_id, status = self._resolve(entry["object_id"])
+        statuses = [status]
+        for association in payload.get("associations", []):
+            association["to"]["id"], status = self._resolve(association["to"]["id"])
+            statuses.append(status)
+        if "failed" in statuses:
+            return None, None, "failed"
+        if "pending" in statuses:
+            return None, None, "pending"
+        return payload, object_id, "ready"
+
+    def flush(self) -> None:
+        """Send every ready write: creates batched per type, updates merged per record."""
+        now = time.time()
+        creates: dict[str, list[tuple[dict, dict]]] = {}
+        updates: dict[tuple[str, str], list[tuple[dict, dict]]] = {}
+        # Records with an earlier update still waiting, so later values can't overtake it
+        blocked: set[tuple[str, str]] = set()
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["status"] != "pending":
+                    continue
+                target = (entry["object_type"], entry["object_id"])
+                if entry.get("retry_at", 0) > now or target in blocked:
+                    if entry["object_id"]:
+                        blocked.add(target)
+                    continue
+                payload, object_id, readiness = self._prepare(entry)
+                if readiness == "pending" and entry["object_id"]:
+                    blocked.add(target)
+                if readiness == "failed":
+                    self._fail([entry], "Depends on a write that failed")
+                elif readiness == "ready" and object_id:
+                    key = (entry["object_type"], object_id)
+                    updates.setdefault(key, []).append((entry, payload))
+                elif readiness == "ready":
+                    creates.setdefault(entry["object_type"], []).append(
+                        (entry, payload)
+                    )
+
+        for object_type, items in creates.items():
+            for i in range(0, len(items), BATCH_SIZE):
+                self._send_creates(object_type, items[i : i + BATCH_SIZE])
+
+        merged: dict[str, list[tuple[list[dict], dict]]] = {}
+        for (object_type, object_id), items in updates.items():
+            properties: dict[str, Any] = {}
+            for _, payload in items:
+                properties.update(payload["properties"])
+            merged.setdefault(object_type, []).append(
+                ([e for e, _ in items], {"id": object_id, "properties": properties})
+            )
+        for object_type, groups in merged.items():
+            for i in range(0, len(groups), BATCH_SIZE):
+                self._send_updates(object_type, groups[i : i + BATCH_SIZE])
+
+        if creates or updates:
+            # Drop the finished writes' events so the journal stays small
+            with self._lock:
+                self._compact()
+
+    def _post(
+        self, object_type: str, action: str, inputs: list[dict]
+    ) -> tuple[int, dict[str, Any]]:
+        """
+        POST a batch; returns (status, response body), or raises with whether a
+        retry may help. A 207 means only some inputs were written.
+        """
+        resp = api_request(
+            "POST",
+            f"{BASE_URL}/crm/v3/objects/{object_type}/batch/{action}",
+            json={"inputs": inputs},
+        )
+        if resp.status_code in (200, 201, 207):
+            return resp.status_code, resp.json()
+        raise _BatchError(resp.status_code, resp.text[:300])
+
+    def _send_creates(self, object_type: str, items: list[tuple[dict, dict]]) -> None:
+        try:
+            prop = trace_property(object_type)
+        except requests.RequestException as err:
+            self._defer([e for e, _ in items], err)
+            return
+        sent = [e["handle"] for e, _ in items if e.get("sent_at")]
+        if sent and prop:
+            # An earlier attempt may have landed even though its response was lost
+            try:
+                found = find_by_property(object_type, prop, sent)
+            except requests.RequestException as err:
+                self._defer([e for e, _ in items], err)
+                return
+            for entry, _ in items:
+                if entry["handle"] in found:
+                    self._complete([entry], found[entry["handle"]])
+            items = [item for item in items if item[0]["handle"] not in found]
+            if not items:
+                return
+
+        inputs = []
+        for entry, payload in items:
+            if prop:
+                properties = {**payload["properties"], prop: entry["handle"]}
+                payload = {**payload, "properties": properties}
+            inputs.append({**payload, "objectWriteTraceId": entry["handle"]})
+        try:
+            status, data = self._post(object_type, "create", inputs)
+        except (_BatchError, requests.RequestException) as err:
+            if isinstance(err, requests.RequestException):
+                self._mark_sent([e for e, _ in items])
+            if _retryable(err):
+                self._defer([e for e, _ in items], err)
+            elif len(items) > 1:
+                # One invalid input fails the whole batch, so find it by sending singly
+                for item in items:
+                    self._send_creates(object_type, [item])
+            else:
+                self._fail([items[0][0]], str(err))
+            return
+        results = data.get("results", [])
+        by_trace = {r.get("objectWriteTraceId"): r for r in results}
+        messages = batch_error_messages(data)
+        unmatched = []
+        for i, (entry, payload) in enumerate(items):
+            result = by_trace.get(entry["handle"])
+            if result is None and status != 207 and len(results) == len(items):
+                result = results[i]
+            if result is not None:
+                cache_record(object_type, result)
+                if object_type == "companies":
+                    # Pre-create duplicate checks see it from now on
+                    get_snapshot("companies", COMPANY_SNAPSHOT_PROPERTIES).upsert(
+                        [result]
+                    )
+                self._complete([entry], result["id"])
+            elif entry["handle"] in messages:
+                self._fail([entry], messages[entry["handle"]] or "Not written")
+            else:
+                unmatched.append((entry, payload))
+        if len(unmatched) > 1:
+            # A 207 error without trace IDs; find the invalid input by sending singly
+            for item in unmatched:
+                self._send_creates(object_type, [item])
+        elif unmatched:
+            detail = "; ".join(
+                e.get("message", "")
+                for e in data.get("errors", [])
+                if not e.get("context", {}).get("objectWriteTraceId")
+            )
+            self._fail(
+                [unmatched[0][0]], detail or "HubSpot returned no result for this write"
+            )
+
+    def _send_updates(
+        self, object_type: str, groups: list[tuple[list[dict], dict]]
+    ) -> None:
+        try:
+            status, data = self._post(
+                object_type, "update", [update for _, update in groups]
+            )
+        except (_BatchError, requests.RequestException) as err:
+            if _retryable(err):
+                self._defer([e for entries, _ in groups for e in entries], err)
+            elif len(groups) > 1:
+                for group in groups:
+                    self._send_updates(object_type, [group])
+            else:
+                entries, update = groups[0]
+                # The cache was updated optimistically when the write was queued
+                invalidate_record(object_type, update["id"])
+                self._fail(entries, str(err))
+            return
+        updated = {str(r["id"]) for r in data.get("results", [])}
+        missing = []
+        for entries, update in groups:
+            if status != 207 or str(update["id"]) in updated:
+                self._complete(entries, update["id"])
+            else:
+                missing.append((entries, update))
+        if len(missing) > 1:
+            for group in missing:
+                self._send_updates(object_type, [group])
+        elif missing:
+            entries, update = missing[0]
+            invalidate_record(object_type, update["id"])
+            detail = "; ".join(e.get("message", "") for e in data.get("errors", []))
+            self._fail(entries, detail or "HubSpot returned no result for this write")
+
+    def _mark_sent(self, entries: list[dict]) -> None:
+        """Journal creates whose outcome is unknown, so they're looked up before a resend."""
+        sent_at = time.time()
+        with self._lock:
+            self._append(
+                [
+                    {"op": "sent", "handle": e["handle"], "sent_at": sent_at}
+                    for e in entries
+                ]
+            )
+            for entry in entries:
+                entry["sent_at"] = sent_at
+
+    def _defer(self, entries: list[dict], err: Exception) -> None:
+        with self._lock:
+            for entry in entries:
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                entry["retry_at"] = time.time() + min(
+                    2 ** entry["attempts"], MAX_BACKOFF
+                )
+                entry["error"] = str(err)
+
+    def _complete(self, entries: list[dict], object_id: str) -> None:
+        with self._lock:
+            self._append(
+                [
+                    {"op": "done", "handle": e["handle"], "id": object_id}
+                    for e in entries
+                ]
+            )
+            for entry in entries:
+                entry.update(status="done", id=object_id)
+        for object_type in {e["object_type"] for e in entries}:
+            invalidate_searches(object_type)
+        for entry in entries:
+            if entry.get("linked"):
+                # Handles among the linked IDs have landed by now; see _prepare
+                ids = {k: self._resolve(v)[0] for k, v in entry["linked"].items()}
+                invalidate_linked(entry["object_type"], **ids)
+
+    def _fail(self, entries: list[dict], error: str) -> None:
+        with self._lock:
+            self._append(
+                [
+                    {"op": "failed", "handle": e["handle"], "error": error}
+                    for e in entries
+                ]
+            )
+            for entry in entries:
+                entry.update(status="failed", error=error)
+
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(e) for e in self._entries.values()]
+
+
+class _BatchError(Exception):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"HubSpot returned {status}: {body}")
+        self.status = status
+
+
+def _retryable(err: Exception) -> bool:
+    if isinstance(err, _BatchError):
+        return err.status == 429 or err.status >= 500
+    return True
+
+
+_queue: WriteQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteQueue:
+    """The process-wide queue; resumes flushing anything left from a previous run."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteQueue(JOURNAL_PATH)
+            if any(e["status"] == "pending" for e in _queue.entries()):
+                _queue.start()
+        return _queue
+
+
+def queue_write(
+    object_type: str,
+    payload: dict[str, Any],
+    object_id: str | None = None,
+    linked: dict[str, str | None] | None = None,
+) -> str:
+    """Queue a create (no object_id) or update for background sending; returns a handle."""
+    return get_write_queue().enqueue(object_type, payload, object_id, linked)
+
+
+def _describe(entry: dict[str, Any]) -> str:
+    action = f"update {entry['object_id']}" if entry.get("object_id") else "create"
+    return f"[{entry['handle']}] {entry.get('object_type', '')} {action}".rstrip()
+
+
+def write_status(handle: str | None = None) -> str:
+    """
+    Report queued HubSpot writes: pending, failed, or the state of one handle.
+
+    Args:
+        handle: Local handle returned when a write was queued
+    """
+    entries = get_write_queue().entries()
+    now = time.time()
+
+    if handle:
+        entry = next((e for e in entries if e["handle"] == handle), None)
+        if entry is None:
+            return "Error: Unknown handle"
+        if entry["status"] == "done":
+            return f"[{handle}] Written to HubSpot [ID: {entry['id']}]"
+        if entry["status"] == "failed":
+            return f"{_describe(entry)}: failed - {entry.get('error', 'unknown error')}"
+        line = f"{_describe(entry)}: pending for {now - entry['queued_at']:.0f}s"
+        if entry.get("error"):
+            line += f", retry {entry['attempts']} after: {entry['error']}"
+        return line
+
+    pending = [e for e in entries if e["status"] == "pending"]
+    failed = [e for e in entries if e["status"] == "failed"]
+    output = [
+        f"Write-behind {'enabled' if WRITE_BEHIND else 'disabled'}: "
+        f"{len(pending)} pending, {len(failed)} failed"
+    ]
+    if pending:
+        oldest = min(e["queued_at"] for e in pending)
+        output.append(f"Oldest pending write queued {now - oldest:.0f}s ago")
+        retrying = [e for e in pending if e.get("error")]
+        for entry in retrying[:10]:
+            output.append(f"  {_describe(entry)}: retrying after {entry['error']}")
+    if failed:
+        output.append("\nFailed:")
+        for entry in failed[-20:]:
+            output.append(
+                f"  {_describe(entry)}: {entry.get('error', 'unknown error')}"
+            )
+    return "\n".join(output)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("handle", nargs="?")
+    parser.add_argument(
+        "--flush", action="store_true", help="Send pending writes before reporting"
+    )
+    args = parser.parse_args()
+    if args.flush:
+        get_write_queue().flush()
+    print(write_status(args.handle))
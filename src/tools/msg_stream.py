@@ -0,0 +1,114 @@
+import io
+import mimetypes
+import olefile
+from extract_msg.attachments import Attachment, AttachmentBase, initStandardAttachment
+from extract_msg.enums import PropertiesType
+from extract_msg.properties import PropertiesStore
+
+DATA_STREAM = "__substg1.0_37010102"
+# Largest run of contiguous sectors read at once
+MAX_READ_BYTES = 1024 * 1024
+
+
+class LazyAttachment(Attachment):
+    """A data attachment whose bytes are read only when asked for."""
+
+    def __init__(self, msg, dir_: str, propStore: PropertiesStore):
+        # Skip Attachment.__init__, which reads the whole data stream
+        AttachmentBase.__init__(self, msg, dir_, propStore)
+
+    @property
+    def data(self) -> bytes | None:
+        return self.getStream(DATA_STREAM)
+
+    @property
+    def mimetype(self) -> str | None:
+        # extract_msg may sniff the whole data with python-magic; use the name
+        return (
+            self.getStringStream("__substg1.0_370E")
+            or mimetypes.guess_type(self.name or "")[0]
+        )
+
+    @property
+    def stream_path(self) -> list[str]:
+        """Full path of the data stream inside the file, for OleSectorReader."""
+        return [*self.msg.prefixList, self.dir, DATA_STREAM]
+
+
+def lazy_init_attachment(msg, dir_: str) -> AttachmentBase:
+    """extract_msg initAttachment hook that defers reading attachment data."""
+    if msg.exists([dir_, DATA_STREAM]):
+        props = msg.getStream([dir_, "__properties_version1.0"])
+        return LazyAttachment(
+            msg, dir_, PropertiesStore(props, PropertiesType.ATTACHMENT)
+        )
+    return initStandardAttachment(msg, dir_)
+
+
+def _entry(
+    ole: olefile.OleFileIO, path: list[str]
+) -> olefile.olefile.OleDirectoryEntry:
+    entry = ole.root
+    for part in path:
+        entry = entry.kids_dict[part.lower()]
+    return entry
+
+
+class OleSectorReader(io.RawIOBase):
+    """
+    Reads one stream of an OLE file straight from its sector chain.
+
+    olefile's openstream copies the whole stream into memory first; this
+    reads runs of contiguous sectors on demand, so memory stays bounded by
+    MAX_READ_BYTES however large the stream is. Reads return whole sectors,
+    so a read may return more than the size asked for.
+    """
+
+    def __init__(self, ole: olefile.OleFileIO, path: list[str]):
+        super().__init__()
+        entry = _entry(ole, path)
+        self.size = entry.size
+        self._ole = ole
+        self._sector = entry.isectStart
+        self._remaining = entry.size
+        # Small streams live in the mini stream, which olefile already holds
+        self._small = (
+            io.BytesIO(ole.openstream(path).read())
+            if entry.size < ole.minisectorcutoff
+            else None
+        )
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self._small is not None:
+            return self._small.read(size)
+        if self._remaining <= 0 or self._sector > olefile.MAXREGSECT:
+            return b""
+
+        sector_size = self._ole.sectorsize
+        fat = self._ole.fat
+        wanted = self._remaining if size < 0 else min(size, self._remaining)
+        max_sectors = max(1, min(wanted, MAX_READ_BYTES) // sector_size)
+        run = 1
+        while run < max_sectors and fat[self._sector + run - 1] == self._sector + run:
+            run += 1
+
+        self._ole.fp.seek((self._sector + 1) * sector_size)
+        data = self._ole.fp.read(min(run * sector_size, self._remaining))
+        self._sector = fat[self._sector + run - 1]
+        self._remaining -= len(data)
+        return data
+
+
+def storage_size(ole: olefile.OleFileIO, path: list[str]) -> int:
+    """Total bytes of every stream under a storage, without reading any."""
+    pending = [_entry(ole, path)]
+    total = 0
+    while pending:
+        entry = pending.pop()
+        if entry.entry_type == olefile.STGTY_STREAM:
+            total += entry.size
+        pending.extend(entry.kids)
+    return total
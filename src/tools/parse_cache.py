@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from typing import Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PARSE_CACHE_DIR = os.path.join(os.getenv("LOCAL_STORE_PATH", ".local"), "parse_cache")
+PATHS_DIR = os.path.join(PARSE_CACHE_DIR, "paths")
+# Total size of cached results before the least recently used are evicted
+PARSE_CACHE_BYTES = int(float(os.getenv("EMAIL_PARSE_CACHE_MB", "200")) * 1024 * 1024)
+# Bump when parse output changes so older cached results are not served
+CACHE_VERSION = "3"
+CHUNK_SIZE = 1024 * 1024
+
+_lock = threading.Lock()
+_total_bytes: int | None = None
+
+
+def _write_json(path: str, data: Any) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"), default=str)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _file_hash(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _entry_path(digest: str) -> str:
+    key = hashlib.sha1(f"{CACHE_VERSION}|{digest}".encode()).hexdigest()
+    return os.path.join(PARSE_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _path_record(file_path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+    return os.path.join(PATHS_DIR, f"{key}.json")
+
+
+def load_cached(file_path: str) -> tuple[Any, str]:
+    """
+    Look up a cached parse result for a file.
+
+    A file whose path, size and mtime match the last time it was seen is found
+    without reading it; otherwise its content hash is computed, so a copied or
+    touched file still hits. Returns (result or None, content hash).
+    """
+    stat = os.stat(file_path)
+    record = _read_json(_path_record(file_path)) or {}
+    if record.get("size") == stat.st_size and record.get("mtime") == stat.st_mtime_ns:
+        digest = record["hash"]
+    else:
+        digest = _file_hash(file_path)
+        _write_json(
+            _path_record(file_path),
+            {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest},
+        )
+
+    entry_path = _entry_path(digest)
+    result = _read_json(entry_path)
+    if result is not None:
+        # Entry mtime is its last use, which eviction orders by
+        os.utime(entry_path)
+    return result, digest
+
+
+def save_cached(digest: str, result: Any) -> None:
+    """Cache a parse result under its file's content hash, evicting old entries over budget."""
+    global _total_bytes
+    size = _write_json(_entry_path(digest), result)
+    with _lock:
+        if _total_bytes is None:
+            _total_bytes = sum(size for _, _, size in _entries())
+        else:
+            _total_bytes += size
+        if _total_bytes > PARSE_CACHE_BYTES:
+            _total_bytes = _evict(int(PARSE_CACHE_BYTES * 0.9))
+
+
+def _entries() -> list[tuple[float, str, int]]:
+    found = []
+    if not os.path.isdir(PARSE_CACHE_DIR):
+        return found
+    for shard in os.scandir(PARSE_CACHE_DIR):
+        if not shard.is_dir() or shard.path == PATHS_DIR:
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.path, stat.st_size))
+    return found
+
+
+def _evict(target_bytes: int) -> int:
+    """Delete least recently used entries until the cache fits target_bytes."""
+    entries = sorted(_entries())
+    total = sum(size for _, _, size in entries)
+    for _, path, size in entries:
+        if total <= target_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+    return total
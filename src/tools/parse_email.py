@@ -1,12 +1,48 @@
-import sys
 import os
 import re
+import io
 import json
-import base64
-from typing import Any
+from typing import Any, Callable
+from concurrent.futures import Future
+from html import unescape
 from datetime import datetime, timezone
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
 
 import extract_msg
+import olefile
+from dotenv import load_dotenv
+from extract_msg.attachments import EmbeddedMsgAttachment
+from tools.attachment_store import is_convertible, start_conversion, store_attachment
+from tools.email_body import BODY_MODES, reduce_body
+from tools.email_threads import index_email
+from tools.eml_stream import EmlParts, decoded_size, strip_parts
+from tools.msg_stream import (
+    LazyAttachment,
+    OleSectorReader,
+    lazy_init_attachment,
+    storage_size,
+)
+from tools.parse_cache import load_cached, save_cached
+
+load_dotenv()
+
+# Extensions parsed as RFC 822 messages with the stdlib email parser
+EML_EXTENSIONS = (".eml", "")
+EMAIL_EXTENSIONS = (".msg",) + EML_EXTENSIONS
+# First line of an extensionless RFC 822 file: a header or an mbox "From " line
+_RFC822_START = re.compile(rb"^(?:From |[!-9;-~]+:)")
+# Attachment bytes stored per attachment and per email file (including
+# forwarded messages); anything over is listed with a "skipped" reason
+MAX_ATTACHMENT_BYTES = int(
+    float(os.getenv("EMAIL_MAX_ATTACHMENT_MB", "100")) * 1024 * 1024
+)
+MAX_MESSAGE_BYTES = int(float(os.getenv("EMAIL_MAX_MESSAGE_MB", "250")) * 1024 * 1024)
+# Levels of attached (forwarded) emails parsed into an "embedded" result
+MAX_EMBED_DEPTH = int(os.getenv("EMAIL_MAX_EMBED_DEPTH", "3"))
+# Longer bodies are cut before cleaning
+MAX_BODY_CHARS = 500_000
 
 
 def sanitize(s: str | None) -> str:
@@ -23,24 +59,273 @@ def format_address(name: str | None, email: str | None) -> str:
     return email or name or ""
 
 
-def parse_email(file_path: str) -> dict[str, Any]:
+def clean_body(body: str) -> str:
+    """Collapse blank lines and runs of spaces, and replace long URLs with [LINK]."""
+    body = body.strip()
+    body = re.sub(r"\s*[\r\n]+\s*", "\n\n", body)
+    body = re.sub(r"[ \t]+", " ", body)
+    return re.sub(
+        r"https?://[^\s]+",
+        lambda m: "[LINK]" if len(m.group(0).encode("utf-8")) > 100 else m.group(0),
+        body,
+    )
+
+
+def _clip_body(body: str) -> str:
+    if len(body) > MAX_BODY_CHARS:
+        return body[:MAX_BODY_CHARS] + "\n[truncated]"
+    return body
+
+
+def message_ids(field: str | None) -> list[str]:
+    """The <...> message IDs in a Message-ID, In-Reply-To or References header."""
+    return re.findall(r"<[^<>\s]+>", field or "")
+
+
+def _now_ms() -> int:
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def _error_result(kind: str, err: Exception) -> dict[str, Any]:
+    return {
+        "sentOn": _now_ms(),
+        "from": "",
+        "to": [],
+        "cc": [],
+        "bcc": [],
+        "subject": "(parsing error)",
+        "body": f"Failed to parse {kind} file: {err}",
+        "attachments": [],
+        "messageId": "",
+        "inReplyTo": "",
+        "references": [],
+        "error": str(err),
+    }
+
+
+class _Budget:
+    """Attachment bytes one email file may still store."""
+
+    def __init__(self) -> None:
+        self.remaining = MAX_MESSAGE_BYTES
+
+    def reserve(self, size: int) -> str | None:
+        """Take size bytes from the budget, or return why they can't be stored."""
+        if size > MAX_ATTACHMENT_BYTES:
+            return (
+                f"over the {MAX_ATTACHMENT_BYTES // (1024 * 1024)} MB attachment limit"
+            )
+        if size > self.remaining:
+            return f"over the {MAX_MESSAGE_BYTES // (1024 * 1024)} MB per-email limit"
+        self.remaining -= size
+        return None
+
+
+def _extension(name: str) -> str:
+    return name.rsplit(".", 1)[-1] if "." in name else ""
+
+
+def _skipped(name: str, mime_type: str, size: int, reason: str) -> dict[str, Any]:
+    return {
+        "name": name,
+        "extension": _extension(name),
+        "size": size,
+        "mimeType": mime_type,
+        "hash": "",
+        "skipped": reason,
+    }
+
+
+def _embedded(name: str, size: int, result: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "name": name,
+        "extension": _extension(name),
+        "size": size,
+        "mimeType": "message/rfc822",
+        "hash": "",
+        "embedded": result,
+    }
+
+
+def is_email_file(file_path: str) -> bool:
+    """
+    Whether parse_email accepts the file. Extensionless files count only if
+    they start like an RFC 822 message, so stray files in a folder are skipped.
+    """
     ext = os.path.splitext(file_path)[1].lower()
-    if ext != ".msg":
-        raise ValueError("Only .msg email files are supported currently")
+    if ext not in EMAIL_EXTENSIONS:
+        return False
+    if ext:
+        return True
+    with open(file_path, "rb") as f:
+        return bool(_RFC822_START.match(f.readline(1000)))
+
+
+def parse_email(
+    file_path: str,
+    use_cache: bool = True,
+    mode: str = "full",
+    convert_attachments: bool = False,
+    match_crm: bool = False,
+) -> dict[str, Any]:
+    """
+    Parse a .msg (Outlook) or .eml / extensionless RFC 822 email file.
+
+    Both formats return the same keys: sentOn (epoch ms), from, to, cc, bcc,
+    subject, body and attachment handles. Attached emails are parsed into an
+    "embedded" result up to MAX_EMBED_DEPTH levels; attachments over the
+    byte budgets are listed with a "skipped" reason instead of stored.
+    mode "new" reduces the body to what the sender wrote in this message
+    (see email_body.reduce_body). With
+    convert_attachments, PDF, Word and other convertible attachments are
+    converted to Markdown on worker threads while the email is parsed, and
+    each gets a "markdown" entry with an excerpt and the full text's path.
+    With match_crm, a "participants" list gives each sender and recipient's
+    HubSpot contact and company ID (see hubspot.participants).
+    """
+    if mode not in BODY_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(BODY_MODES)}")
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".msg":
+        parse = _parse_msg
+    elif ext in EML_EXTENSIONS:
+        parse = _parse_eml
+    else:
+        raise ValueError("Only .msg and .eml email files are supported")
+
+    conversions: dict[str, Future] = {}
+
+    def on_attachment(handle: dict[str, Any]) -> None:
+        # Skipped and embedded entries have no stored content ("hash" is "")
+        if not handle["hash"]:
+            return
+        if is_convertible(handle) and handle["hash"] not in conversions:
+            conversions[handle["hash"]] = start_conversion(handle)
+
+    on_stored = on_attachment if convert_attachments else None
+    if not use_cache:
+        result = parse(file_path, on_stored)
+    else:
+        result, digest = load_cached(file_path)
+        if result is None:
+            result = parse(file_path, on_stored)
+            if "error" not in result:
+                save_cached(digest, result)
+        elif on_stored:
+            for handle in _stored_handles(result["attachments"]):
+                on_stored(handle)
+    if "error" not in result:
+        index_email(file_path, result)
+        if mode != "full":
+            result = {**result, "body": reduce_body(result["body"], mode)}
+    if match_crm and "error" not in result:
+        # Imported here so plain parsing never loads the HubSpot tools
+        from tools.hubspot.participants import match_participants
 
+        result = {**result, "participants": match_participants(result)}
+    if conversions:
+        result = _with_markdown(result, conversions)
+    return result
+
+
+def _stored_handles(attachments: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Stored attachment handles, including those of embedded emails."""
+    handles = []
+    for a in attachments:
+        if "embedded" in a:
+            handles += _stored_handles(a["embedded"]["attachments"])
+        elif a["hash"]:
+            handles.append(a)
+    return handles
+
+
+def _with_markdown(
+    result: dict[str, Any], conversions: dict[str, Future]
+) -> dict[str, Any]:
+    """Copy of a result with each converted attachment's "markdown" entry added."""
+    attachments = []
+    for a in result["attachments"]:
+        if "embedded" in a:
+            a = {**a, "embedded": _with_markdown(a["embedded"], conversions)}
+        elif a["hash"] in conversions:
+            a = {**a, "markdown": conversions[a["hash"]].result()}
+        attachments.append(a)
+    return {**result, "attachments": attachments}
+
+
+def _parse_msg(
+    file_path: str, on_attachment: Callable[[dict], None] | None = None
+) -> dict[str, Any]:
     try:
-        msg = extract_msg.Message(file_path)
+        # Attachment data is streamed from the file's sectors when stored,
+        # never loaded whole (see msg_stream)
+        msg = extract_msg.Message(
+            file_path, initAttachment=lazy_init_attachment, delayAttachments=True
+        )
     except Exception as err:
-        return {
-            "sentOn": int(datetime.now(timezone.utc).timestamp() * 1000),
-            "from": "",
-            "to": [],
-            "cc": [],
-            "bcc": [],
-            "subject": "(parsing error)",
-            "body": f"Failed to parse .msg file: {err}",
-            "attachments": [],
-        }
+        return _error_result(".msg", err)
+    try:
+        with olefile.OleFileIO(file_path) as ole:
+            return _msg_result(msg, ole, on_attachment, 0, _Budget())
+    finally:
+        msg.close()
+
+
+def _msg_result(
+    msg: extract_msg.MSGFile,
+    ole: olefile.OleFileIO,
+    on_attachment: Callable[[dict], None] | None,
+    depth: int,
+    budget: _Budget,
+) -> dict[str, Any]:
+    # Attachments first, so conversions run while the rest is parsed
+    attachments: list[dict[str, Any]] = []
+    for attach in msg.attachments:
+        if getattr(attach, "hidden", False):
+            continue
+
+        if isinstance(attach, EmbeddedMsgAttachment):
+            path = [*msg.prefixList, attach.dir]
+            name = attach.name or f"{sanitize(attach.data.subject) or 'message'}.msg"
+            size = storage_size(ole, path)
+            if depth >= MAX_EMBED_DEPTH:
+                attachments.append(
+                    _skipped(
+                        name,
+                        "message/rfc822",
+                        size,
+                        f"embedded deeper than {MAX_EMBED_DEPTH} levels",
+                    )
+                )
+                continue
+            nested = _msg_result(attach.data, ole, on_attachment, depth + 1, budget)
+            attachments.append(_embedded(name, size, nested))
+            continue
+
+        if not attach.name:
+            continue
+        mime_type = (
+            getattr(attach, "mimetype", "application/octet-stream")
+            or "application/octet-stream"
+        )
+        if isinstance(attach, LazyAttachment):
+            stream = OleSectorReader(ole, attach.stream_path)
+            size = stream.size
+        else:
+            content = attach.data if hasattr(attach, "data") else None
+            if not isinstance(content, bytes):
+                continue
+            stream = io.BytesIO(content)
+            size = len(content)
+
+        reason = budget.reserve(size)
+        if reason:
+            attachments.append(_skipped(attach.name, mime_type, size, reason))
+            continue
+        handle = store_attachment(attach.name, mime_type, stream)
+        attachments.append(handle)
+        if on_attachment:
+            on_attachment(handle)
 
     sent_on = msg.date
     if isinstance(sent_on, str):
@@ -48,11 +333,7 @@ def parse_email(file_path: str) -> dict[str, Any]:
             sent_on = datetime.fromisoformat(sent_on)
         except ValueError:
             sent_on = None
-    sent_timestamp = (
-        int(sent_on.timestamp() * 1000)
-        if sent_on
-        else int(datetime.now(timezone.utc).timestamp() * 1000)
-    )
+    sent_timestamp = int(sent_on.timestamp() * 1000) if sent_on else _now_ms()
 
     sender_name = msg.sender or ""
     sender_email = (
@@ -73,62 +354,170 @@ def parse_email(file_path: str) -> dict[str, Any]:
 
     subject = sanitize(msg.subject) or ""
 
-    body = (msg.body or "").strip()
-    body = re.sub(r"\s*[\r\n]+\s*", "\n\n", body)
-    body = re.sub(r"[ \t]+", " ", body)
-    body = re.sub(
-        r"https?://[^\s]+",
-        lambda m: "[LINK]" if len(m.group(0).encode("utf-8")) > 100 else m.group(0),
-        body,
+    body = clean_body(_clip_body(msg.body or ""))
+
+    message_id = message_ids(msg.messageId)
+    in_reply_to = message_ids(msg.inReplyTo)
+    references = message_ids(
+        msg.header.get("references") or msg.getStringStream("__substg1.0_1039")
     )
 
+    return {
+        "sentOn": sent_timestamp,
+        "from": from_address,
+        "to": to,
+        "cc": cc,
+        "bcc": bcc,
+        "subject": subject,
+        "body": body,
+        "attachments": attachments,
+        "messageId": message_id[0] if message_id else "",
+        "inReplyTo": in_reply_to[0] if in_reply_to else "",
+        "references": references,
+    }
+
+
+def _html_to_text(html: str) -> str:
+    html = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", html)
+    html = re.sub(r"(?i)<br\s*/?>|</(p|div|tr|li|h[1-6])>", "\n", html)
+    return unescape(re.sub(r"<[^>]+>", " ", html))
+
+
+def _parse_eml(
+    file_path: str, on_attachment: Callable[[dict], None] | None = None
+) -> dict[str, Any]:
+    parts = EmlParts(file_path)
+    try:
+        # Attachment bodies are cut out here and streamed from the file when
+        # stored, never parsed or decoded whole (see eml_stream)
+        with open(file_path, "rb") as f:
+            msg = BytesParser(policy=policy.default).parse(strip_parts(f, parts))
+    except Exception as err:
+        return _error_result(".eml", err)
+    return _eml_result(msg, parts, on_attachment, 0, _Budget())
+
+
+def _eml_result(
+    msg: EmailMessage,
+    parts: EmlParts,
+    on_attachment: Callable[[dict], None] | None,
+    depth: int,
+    budget: _Budget,
+) -> dict[str, Any]:
+    def addresses(field: str) -> list[str]:
+        try:
+            header = msg[field]
+            found = header.addresses if header is not None else ()
+        except Exception:
+            # Malformed header: fall back to the raw text
+            return [
+                sanitize(a) for a in str(msg.get(field, "")).split(",") if a.strip()
+            ]
+        return [format_address(a.display_name, a.addr_spec) for a in found]
+
+    try:
+        sent_on = msg["date"].datetime if msg["date"] else None
+    except Exception:
+        sent_on = None
+    sent_timestamp = int(sent_on.timestamp() * 1000) if sent_on else _now_ms()
+
+    from_addresses = addresses("from")
+    message_id = message_ids(str(msg["message-id"] or ""))
+    in_reply_to = message_ids(str(msg["in-reply-to"] or ""))
+    references = message_ids(str(msg["references"] or ""))
+    subject = sanitize(str(msg["subject"] or ""))
+
     attachments: list[dict[str, Any]] = []
-    for attach in msg.attachments:
-        if not attach.name:
+    for part in msg.iter_attachments():
+        name = part.get_filename()
+        span = parts.span(part)
+        if part.get_content_type() == "message/rfc822":
+            nested = part.get_payload(0)
+            name = name or f"{sanitize(str(nested['subject'] or '')) or 'message'}.eml"
+            size = span[1] - span[0] if span else len(nested.as_bytes())
+            if depth >= MAX_EMBED_DEPTH:
+                attachments.append(
+                    _skipped(
+                        name,
+                        "message/rfc822",
+                        size,
+                        f"embedded deeper than {MAX_EMBED_DEPTH} levels",
+                    )
+                )
+                continue
+            result = _eml_result(nested, parts, on_attachment, depth + 1, budget)
+            attachments.append(_embedded(name, size, result))
             continue
-        if getattr(attach, "hidden", False):
+        if not name:
             continue
+        mime_type = part.get_content_type()
+        encoding = str(part.get("content-transfer-encoding", "")).strip().lower()
+        if span:
+            raw_size = span[1] - span[0]
+        else:
+            payload = part.get_payload()
+            if not isinstance(payload, str):
+                continue
+            raw_size = len(payload)
+        # Sized from the encoded body, so nothing over budget is decoded
+        size = decoded_size(encoding, raw_size)
+        reason = budget.reserve(size)
+        if reason:
+            attachments.append(_skipped(name, mime_type, size, reason))
+            continue
+        if span:
+            with parts.reader(part) as stream:
+                handle = store_attachment(name, mime_type, stream)
+        else:
+            content = part.get_payload(decode=True) or b""
+            handle = store_attachment(name, mime_type, io.BytesIO(content))
+        attachments.append(handle)
+        if on_attachment:
+            on_attachment(handle)
 
-        name = attach.name
-        ext_part = name.rsplit(".", 1)[-1] if "." in name else ""
-        content = attach.data if hasattr(attach, "data") else b""
-        attachments.append(
-            {
-                "name": name,
-                "extension": ext_part,
-                "size": len(content) if content else 0,
-                "mimeType": getattr(attach, "mimetype", "application/octet-stream")
-                or "application/octet-stream",
-                "content": base64.b64encode(content).decode("utf-8") if content else "",
-            }
-        )
-
-    msg.close()
+    # Only the chosen body part and the attachments are ever decoded
+    body = ""
+    body_part = msg.get_body(preferencelist=("plain", "html"))
+    if body_part is not None:
+        try:
+            body = body_part.get_content()
+        except (LookupError, UnicodeError):
+            payload = body_part.get_payload(decode=True) or b""
+            body = payload.decode("utf-8", errors="replace")
+        if body_part.get_content_type() == "text/html":
+            body = _html_to_text(body)
+    body = clean_body(_clip_body(body))
 
     return {
         "sentOn": sent_timestamp,
-        "from": from_address,
-        "to": to,
-        "cc": cc,
-        "bcc": bcc,
+        "from": from_addresses[0] if from_addresses else "",
+        "to": addresses("to"),
+        "cc": addresses("cc"),
+        "bcc": addresses("bcc"),
         "subject": subject,
         "body": body,
         "attachments": attachments,
+        "messageId": message_id[0] if message_id else "",
+        "inReplyTo": in_reply_to[0] if in_reply_to else "",
+        "references": references,
     }
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python parse_email.py <MSG_FILE_PATH>")
-        sys.exit(1)
-
-    result = parse_email(sys.argv[1])
-    # Print without attachment content for readability
-    display = {
-        **result,
-        "attachments": [
-            {k: v for k, v in a.items() if k != "content"}
-            for a in result["attachments"]
-        ],
-    }
-    print(json.dumps(display, indent=2, default=str))
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file_path")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--mode", choices=BODY_MODES, default="full")
+    parser.add_argument("--convert-attachments", action="store_true")
+    parser.add_argument("--match-crm", action="store_true")
+    args = parser.parse_args()
+    result = parse_email(
+        args.file_path,
+        not args.no_cache,
+        args.mode,
+        args.convert_attachments,
+        args.match_crm,
+    )
+    print(json.dumps(result, indent=2, default=str))
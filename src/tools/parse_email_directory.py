@@ -0,0 +1,115 @@
+import os
+import json
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterator
+
+from tools.parse_email import is_email_file, parse_email
+
+# Files queued per worker, so the walk never runs far ahead of parsing
+QUEUE_PER_WORKER = 4
+
+
+def iter_email_files(dir_path: str, recursive: bool = False) -> Iterator[str]:
+    """Email files in a directory, in sorted order, optionally including subfolders."""
+    if recursive:
+        for root, dirs, files in os.walk(dir_path):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if is_email_file(path):
+                    yield path
+        return
+    for name in sorted(os.listdir(dir_path)):
+        path = os.path.join(dir_path, name)
+        if os.path.isfile(path) and is_email_file(path):
+            yield path
+
+
+def _parse_one(file_path: str, use_cache: bool) -> dict[str, Any]:
+    try:
+        return {"file": file_path, **parse_email(file_path, use_cache)}
+    except Exception as err:
+        return {"file": file_path, "error": f"{type(err).__name__}: {err}"}
+
+
+def parse_email_directory(
+    dir_path: str,
+    output_path: str | None = None,
+    recursive: bool = False,
+    workers: int | None = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Parse every email file in a directory in parallel worker processes.
+
+    Each result is written as one JSON line (parse_email's schema plus "file")
+    as soon as it finishes; files that fail get a {"file", "error"} line.
+
+    Args:
+        dir_path: Folder of .msg, .eml or extensionless RFC 822 email files
+        output_path: JSONL file to write (default: parsed_emails.jsonl in dir_path)
+        recursive: Include subfolders
+        workers: Worker processes (default: CPU count)
+        use_cache: Reuse cached results for files parsed before
+    """
+    if not os.path.isdir(dir_path):
+        return f"Error: Directory not found: {dir_path}"
+
+    output_path = output_path or os.path.join(dir_path, "parsed_emails.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    parsed = 0
+    failed = 0
+    in_flight: deque[Future] = deque()
+    with (
+        ProcessPoolExecutor(max_workers=workers) as pool,
+        open(output_path, "w", encoding="utf-8") as out,
+    ):
+
+        def drain(max_pending: int) -> None:
+            nonlocal parsed, failed
+            while len(in_flight) > max_pending:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    result = future.result()
+                    out.write(json.dumps(result, default=str) + "\n")
+                    if "error" in result:
+                        failed += 1
+                    else:
+                        parsed += 1
+
+        for file_path in iter_email_files(dir_path, recursive):
+            in_flight.append(pool.submit(_parse_one, file_path, use_cache))
+            drain(workers * QUEUE_PER_WORKER)
+        drain(0)
+
+    if not parsed and not failed:
+        return f"No email files found in {dir_path}"
+    summary = f"Parsed {parsed} emails to {output_path}"
+    if failed:
+        summary += f' ({failed} failed; see lines with an "error" key)'
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dir_path")
+    parser.add_argument("--output", "-o")
+    parser.add_argument("--recursive", "-r", action="store_true")
+    parser.add_argument("--workers", "-w", type=int)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    print(
+        parse_email_directory(
+            args.dir_path,
+            args.output,
+            args.recursive,
+            args.workers,
+            not args.no_cache,
+        )
+    )
@@ -0,0 +1,36 @@
+import json
+from unittest import mock
+
+import requests
+
+import tools.hubspot as hubspot
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data=None):
+        self.status_code = status_code
+        self._data = {} if data is None else data
+        self.text = json.dumps(self._data)
+        self.headers = {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+
+def stub_send(test, handler) -> None:
+    """
+    Route HubSpot requests made through api_request to
+    handler(method, url, **kwargs) -> (status, data) for one test.
+    """
+
+    def send(method, url, retries, **kwargs):
+        status, data = handler(method, url, **kwargs)
+        return FakeResponse(status, data)
+
+    patcher = mock.patch.object(hubspot, "_send", send)
+    patcher.start()
+    test.addCleanup(patcher.stop)
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import tools.hubspot as hubspot
+import tools.hubspot.bulk_import as bulk_import
+from hubspot_stub import stub_send
+
+
+class Crash(Exception):
+    pass
+
+
+class FakePortal:
+    """Companies in a fake HubSpot, created and searched by trace property."""
+
+    def __init__(self):
+        self.created: list[dict] = []
+        self.fail_rows: dict[str, int] = {}
+        self.crash_rows: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, **kwargs):
+        if "/crm/v3/properties/" in url:
+            return 200, {"modificationMetadata": {"readOnlyValue": False}}
+        body = kwargs["json"]
+        if url.endswith("/search"):
+            values = set(body["filterGroups"][0]["filters"][0]["values"])
+            prop = hubspot.TRACE_PROPERTY
+            with self._lock:
+                found = [r for r in self.created if r["properties"][prop] in values]
+            return 200, {"results": found}
+        first = body["inputs"][0]["objectWriteTraceId"]
+        if first in self.fail_rows:
+            return self.fail_rows.pop(first), {}
+        with self._lock:
+            results = []
+            for record in body["inputs"]:
+                results.append(
+                    {
+                        "id": str(len(self.created) + 1),
+                        "properties": record["properties"],
+                        "objectWriteTraceId": record["objectWriteTraceId"],
+                    }
+                )
+                self.created.append(results[-1])
+        if first in self.crash_rows:
+            # HubSpot wrote the batch but the importer died before hearing back
+            self.crash_rows.discard(first)
+            raise Crash()
+        return 201, {"results": results}
+
+    def names(self) -> list[str]:
+        return sorted(r["properties"]["name"] for r in self.created)
+
+
+class BulkImportTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "companies.csv")
+        self.names = [f"Builder {i}" for i in range(6)]
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("name\n" + "\n".join(self.names) + "\n")
+        self.portal = FakePortal()
+        stub_send(self, self.portal)
+        for patcher in [
+            mock.patch.object(bulk_import, "CHECKPOINT_DIR", folder.name),
+            mock.patch.object(bulk_import, "HUBSPOT_TOKEN", "x"),
+            mock.patch.object(bulk_import, "BATCH_SIZE", 2),
+            mock.patch.object(bulk_import, "MAX_IN_FLIGHT", 1),
+            mock.patch.object(bulk_import, "load_metadata", lambda: None),
+            mock.patch.object(bulk_import, "invalidate_searches", lambda t: None),
+            mock.patch.dict(hubspot._trace_properties, clear=True),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_resume_after_outage_writes_every_row_once(self):
+        self.portal.fail_rows["2"] = 503
+        result = bulk_import.bulk_import(self.path, "companies")
+        self.assertTrue(result.startswith("Error: HubSpot unavailable (503)"))
+        self.assertEqual(self.portal.names(), self.names[:2])
+
+        result = bulk_import.bulk_import(self.path, "companies")
+        self.assertIn("6 written, 0 failed", result)
+        self.assertIn("resumed at row 2", result)
+        self.assertEqual(self.portal.names(), self.names)
+
+    def test_batch_written_before_a_crash_is_not_created_again(self):
+        self.portal.crash_rows.add("2")
+        with self.assertRaises(Crash):
+            bulk_import.bulk_import(self.path, "companies")
+        self.assertEqual(self.portal.names(), self.names[:4])
+
+        result = bulk_import.bulk_import(self.path, "companies")
+        self.assertIn("6 written, 0 failed", result)
+        self.assertEqual(self.portal.names(), self.names)
+
+    def test_batches_sent_after_a_failed_one_are_skipped_on_resume(self):
+        self.portal.fail_rows["0"] = 503
+        with mock.patch.object(bulk_import, "MAX_IN_FLIGHT", 2):
+            bulk_import.bulk_import(self.path, "companies")
+        self.assertEqual(self.portal.names(), self.names[2:4])
+        checkpoint_path = bulk_import._checkpoint_path(self.path, "companies")
+        with open(checkpoint_path) as f:
+            self.assertEqual(json.load(f)["sent"], [[2, 3]])
+
+        result = bulk_import.bulk_import(self.path, "companies")
+        self.assertIn("6 written, 0 failed", result)
+        self.assertEqual(self.portal.names(), self.names)
+
+    def test_trim_errors_keeps_rows_a_resume_skips(self):
+        errors_path = os.path.join(os.path.dirname(self.path), "errors.jsonl")
+        with open(errors_path, "w", encoding="utf-8") as f:
+            for row in (1, 4, 5, 8):
+                f.write(json.dumps({"row": row, "error": "x"}) + "\n")
+        kept = bulk_import._trim_errors(errors_path, {"rows_done": 3, "sent": [[5, 6]]})
+        self.assertEqual(kept, 2)
+        with open(errors_path, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["row"] for line in f], [1, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+
+import tools.hubspot.cache as cache
+
+
+class RecordCacheTest(unittest.TestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(cache, "_records", cache.OrderedDict()),
+            mock.patch.object(cache, "_associations", cache.OrderedDict()),
+            mock.patch.object(cache, "CACHE_MAX_ENTRIES", 2),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.now = 1000.0
+        patcher = mock.patch.object(cache.time, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cache(self, record_id: str, name: str = "Acme") -> None:
+        cache.cache_record("companies", {"id": record_id, "properties": {"name": name}})
+
+    def test_least_recently_used_record_is_evicted(self):
+        self._cache("1")
+        self._cache("2")
+        self.assertIsNotNone(cache.get_cached_record("companies", "1", ["name"]))
+        self._cache("3")
+        self.assertIsNone(cache.get_cached_record("companies", "2", ["name"]))
+        self.assertIsNotNone(cache.get_cached_record("companies", "1", ["name"]))
+        self.assertEqual(len(cache._records), 2)
+
+    def test_expired_record_is_not_merged(self):
+        self._cache("1")
+        self.now += cache.CACHE_TTL + 1
+        self.assertIsNone(cache.merge_cached_record("companies", "1", {"city": "X"}))
+        self.assertNotIn(("companies", "1"), cache._records)
+
+    def test_fresh_record_is_merged(self):
+        self._cache("1")
+        merged = cache.merge_cached_record("companies", "1", {"city": "X"})
+        self.assertEqual(merged["properties"], {"name": "Acme", "city": "X"})
+        cached = cache.get_cached_record("companies", "1", ["name", "city"])
+        self.assertEqual(cached["properties"]["city"], "X")
+
+    def test_association_lists_are_capped(self):
+        for company_id in ("1", "2", "3"):
+            cache.cache_associations("companies", company_id, "deals", ["9"])
+        self.assertIsNone(cache.get_cached_associations("companies", "1", "deals"))
+        self.assertEqual(
+            cache.get_cached_associations("companies", "3", "deals"), ["9"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
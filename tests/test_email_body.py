@@ -0,0 +1,59 @@
+import unittest
+
+from tools.email_body import reduce_body
+
+
+class ReduceBodyTest(unittest.TestCase):
+    def test_signature_after_sign_off_is_cut(self):
+        body = (
+            "Lot 12 passed inspection this morning.\n\n"
+            "Thanks,\nJane Doe\nProject Manager\nAcme Homes Inc.\n"
+            "Cell: (555) 123-4567\njane@acme.com\nwww.acmehomes.com"
+        )
+        self.assertEqual(
+            reduce_body(body), "Lot 12 passed inspection this morning.\n\nThanks,"
+        )
+
+    def test_thanks_before_the_message_is_kept(self):
+        body = (
+            "Hi Bob,\n\nThanks!\n\n"
+            "Could you send the updated contract by Friday?\n\nJane"
+        )
+        self.assertEqual(reduce_body(body), body)
+
+    def test_regards_before_a_list_is_kept(self):
+        body = (
+            "Regards\n\nAttached are the numbers:\n- 120 units\n- launch Q3\n\n"
+            "John Smith\nVP Sales"
+        )
+        self.assertEqual(reduce_body(body), body)
+
+    def test_quoted_reply_is_cut(self):
+        body = (
+            "Sounds good, see you then.\n\n"
+            "On Mon, Jan 1, 2024 at 9:00 AM Bob <bob@example.com> wrote:\n"
+            "> Can we meet Tuesday?"
+        )
+        self.assertEqual(reduce_body(body), "Sounds good, see you then.")
+
+    def test_history_markers_must_fill_the_line(self):
+        bodies = [
+            "Hi Bob,\n\n--- Schedule ---\nLot 12 framing Monday\nLot 14 Tuesday",
+            "Numbers:\n-- 120 units\n-- launch Q3",
+            "On site visit Tuesday, Mark wrote: the slab is poured.\nMore soon.",
+            "Sent from my desk today: the permit is approved.",
+            "Get outlook for the lots by Friday please.",
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(reduce_body(body), body)
+
+    def test_signature_delimiter_and_mobile_footer_are_cut(self):
+        self.assertEqual(reduce_body("See you at 9.\n\n-- \nJane"), "See you at 9.")
+        self.assertEqual(
+            reduce_body("See you at 9.\n\nSent from my iPhone"), "See you at 9."
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
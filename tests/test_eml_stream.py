@@ -0,0 +1,109 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+
+import tools.eml_stream as eml_stream
+from tools.eml_stream import EmlParts, strip_parts
+
+
+def _message(cte: str) -> EmailMessage:
+    rng = random.Random(cte)
+    msg = EmailMessage()
+    msg["Subject"] = "Lot 12"
+    msg.set_content("Framing starts Monday.\n-- \nJane")
+    msg.add_attachment(
+        rng.randbytes(20_000), maintype="application", subtype="pdf", filename="a.pdf"
+    )
+    msg.add_attachment(
+        "lot,units\n--12,40 \n" * 40, subtype="csv", filename="lots.csv", cte=cte
+    )
+    inner = EmailMessage()
+    inner["Subject"] = "Fwd: plans"
+    inner.set_content("See attached.")
+    inner.add_attachment(
+        rng.randbytes(3_000), maintype="image", subtype="png", filename="plan.png"
+    )
+    msg.add_attachment(inner, filename="fwd.eml")
+    return msg
+
+
+def _decoded(msg, parts: EmlParts | None = None) -> list:
+    found = []
+    for part in msg.iter_attachments():
+        if part.get_content_type() == "message/rfc822":
+            found.append(_decoded(part.get_payload(0), parts))
+        elif parts is None:
+            found.append(part.get_payload(decode=True))
+        else:
+            with parts.reader(part) as stream:
+                found.append(b"".join(iter(lambda: stream.read(), b"")))
+    return found
+
+
+class StripPartsTest(unittest.TestCase):
+    def setUp(self):
+        self.read_bytes = eml_stream.READ_BYTES
+        # Small reads so matches and base64 quanta straddle chunks
+        eml_stream.READ_BYTES = 7
+
+    def tearDown(self):
+        eml_stream.READ_BYTES = self.read_bytes
+
+    def _check(self, data: bytes) -> None:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "message.eml")
+            with open(path, "wb") as f:
+                f.write(data)
+            parts = EmlParts(path)
+            with open(path, "rb") as f:
+                stripped = strip_parts(f, parts)
+            parser = BytesParser(policy=policy.default)
+            msg = parser.parse(stripped)
+            full = parser.parse(io.BytesIO(data))
+            self.assertEqual(_decoded(msg, parts), _decoded(full))
+            self.assertEqual(
+                msg.get_body(("plain",)).get_content(),
+                full.get_body(("plain",)).get_content(),
+            )
+            self.assertLess(len(stripped.getvalue()), len(data) // 4)
+
+    def test_attachments_match_the_stdlib_decode(self):
+        for cte in ("base64", "quoted-printable", "8bit"):
+            for linesep in (policy.default, policy.SMTP):
+                with self.subTest(cte=cte, crlf=linesep is policy.SMTP):
+                    self._check(_message(cte).as_bytes(policy=linesep))
+
+    def test_attached_message_span_covers_its_raw_text(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "message.eml")
+            with open(path, "wb") as f:
+                f.write(_message("base64").as_bytes())
+            parts = EmlParts(path)
+            with open(path, "rb") as f:
+                msg = BytesParser(policy=policy.default).parse(strip_parts(f, parts))
+            nested = [
+                p
+                for p in msg.iter_attachments()
+                if p.get_content_type() == "message/rfc822"
+            ]
+            start, end = parts.span(nested[0])
+            with open(path, "rb") as f:
+                f.seek(start)
+                raw = f.read(end - start)
+            self.assertIn(b"Subject: Fwd: plans", raw)
+            self.assertIn(b'filename="plan.png"', raw)
+
+    def test_forged_part_header_is_ignored(self):
+        parts = EmlParts("unused.eml")
+        part = EmailMessage()
+        part[eml_stream.PART_HEADER] = "0123456789abcdef:0"
+        self.assertIsNone(parts.span(part))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+import tools.hubspot as hubspot
+from tools.hubspot.metadata import apply_metadata
+
+TABLES = [
+    "PRODUCT_TYPE_VALUES",
+    "DEAL_PRODUCT_TYPE_VALUES",
+    "DEAL_STAGES",
+    "DEAL_STAGES_REVERSE",
+]
+
+
+class ApplyMetadataTest(unittest.TestCase):
+    def setUp(self):
+        for name in TABLES:
+            patcher = mock.patch.object(hubspot, name, getattr(hubspot, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(hubspot, "load_metadata", lambda: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tables_are_swapped_not_mutated(self):
+        old = hubspot.DEAL_STAGES
+        snapshot = dict(old)
+        apply_metadata({"deal_pipeline": {"stages": {"Won": "won"}, "closed": []}})
+        self.assertEqual(old, snapshot)
+        self.assertEqual(hubspot.DEAL_STAGES, {"Won": "won"})
+        self.assertEqual(hubspot.DEAL_STAGES_REVERSE, {"won": "Won"})
+        self.assertEqual(hubspot.validate_deal_stage("Won"), ("won", None))
+
+    def test_deal_and_company_product_types_load_separately(self):
+        apply_metadata(
+            {
+                "product_types": {"Single Family": "Single Family"},
+                "deal_product_type": {"Townhome": "Townhome"},
+            }
+        )
+        self.assertIsNone(hubspot.validate_product_type("Townhome"))
+        self.assertIsNotNone(hubspot.validate_product_type("Single Family"))
+        self.assertIsNone(hubspot.validate_product_types(["Single Family"]))
+        self.assertIsNotNone(hubspot.validate_product_types(["Townhome"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
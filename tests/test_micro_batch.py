@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+import requests
+
+import tools.hubspot.micro_batch as micro_batch
+from tools.hubspot.micro_batch import associated_ids, submit_read
+from hubspot_stub import stub_send
+
+
+class FakeDeals:
+    """Deals in a fake HubSpot, read singly or in batches."""
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.calls: list[tuple[str, list[str]]] = []
+
+    def __call__(self, method, url, **kwargs):
+        if method == "GET":
+            deal_id = url.rsplit("/", 1)[-1]
+            self.calls.append(("get", [deal_id]))
+            return 200, {
+                "id": deal_id,
+                "properties": {},
+                "associations": {"companies": {"results": [{"id": "7"}, {"id": "7"}]}},
+            }
+        ids = [i["id"] for i in kwargs["json"]["inputs"]]
+        if "/associations/" in url:
+            self.calls.append(("associations", ids))
+            results = [{"from": {"id": i}, "to": [{"toObjectId": 7}]} for i in ids]
+            return 200, {"results": results}
+        self.calls.append(("read", ids))
+        if self.status != 200:
+            return self.status, {}
+        if "bad" in ids:
+            return 400, {"message": "invalid id"}
+        found = [{"id": i, "properties": {"dealname": f"Lot {i}"}} for i in ids]
+        return 200, {"results": [r for r in found if r["id"] != "404"]}
+
+
+class MicroBatchTest(unittest.TestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(micro_batch, "BATCH_WINDOW", 0.05),
+            mock.patch.dict(micro_batch._batchers, clear=True),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _read(self, ids: list[str], associations: str | None = None) -> list:
+        futures = [submit_read("deals", i, ["dealname"], associations) for i in ids]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=5))
+            except requests.HTTPError as err:
+                results.append(err.response.status_code)
+        return results
+
+    def test_reads_in_one_window_share_a_batch(self):
+        deals = FakeDeals()
+        stub_send(self, deals)
+        results = self._read(["1", "2", "2", "404"])
+        self.assertEqual(deals.calls, [("read", ["1", "2", "404"])])
+        self.assertEqual(results[0]["properties"]["dealname"], "Lot 1")
+        self.assertIs(results[1], results[2])
+        self.assertIsNone(results[3])
+
+    def test_rejected_batch_is_split_so_only_the_bad_read_fails(self):
+        deals = FakeDeals()
+        stub_send(self, deals)
+        results = self._read(["1", "bad", "3"])
+        self.assertEqual(results[1], 400)
+        self.assertEqual(results[0]["id"], "1")
+        self.assertEqual(results[2]["id"], "3")
+        self.assertEqual(len(deals.calls), 4)
+
+    def test_outage_fails_every_waiter_without_splitting(self):
+        deals = FakeDeals(status=503)
+        stub_send(self, deals)
+        self.assertEqual(self._read(["1", "2", "3"]), [503, 503, 503])
+        self.assertEqual(len(deals.calls), 1)
+
+    def test_single_read_gets_associations_inline(self):
+        deals = FakeDeals()
+        stub_send(self, deals)
+        [deal] = self._read(["1"], "companies")
+        self.assertEqual(deals.calls, [("get", ["1"])])
+        self.assertEqual(associated_ids(deal, "companies"), ["7"])
+
+    def test_batched_reads_attach_associations(self):
+        deals = FakeDeals()
+        stub_send(self, deals)
+        first, second = self._read(["1", "2"], "companies")
+        self.assertEqual(
+            deals.calls, [("read", ["1", "2"]), ("associations", ["1", "2"])]
+        )
+        self.assertEqual(associated_ids(second, "companies"), ["7"])
+
+
+if __name__ == "__main__":
+    unittest.main()
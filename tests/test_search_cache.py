@@ -0,0 +1,92 @@
+import unittest
+from collections import Counter
+from unittest import mock
+
+import tools.hubspot.search_cache as search_cache
+from tools.hubspot.search_cache import (
+    cached_search,
+    invalidate_searches,
+    normalize_query,
+)
+from hubspot_stub import stub_send
+
+
+def _query(value: str, operator: str = "CONTAINS_TOKEN", **extra) -> dict:
+    return {
+        "filterGroups": [
+            {
+                "filters": [
+                    {"propertyName": "dealstage", "operator": "EQ", "value": "won"},
+                    {"propertyName": "dealname", "operator": operator, "value": value},
+                ]
+            }
+        ],
+        "properties": ["dealname", "city"],
+        **extra,
+    }
+
+
+class NormalizeQueryTest(unittest.TestCase):
+    def test_equivalent_queries_share_a_key(self):
+        query = _query("Lot  12", limit=5)
+        reordered = _query("lot 12", limit=50, after="100")
+        reordered["filterGroups"][0]["filters"].reverse()
+        reordered["properties"].reverse()
+        self.assertEqual(normalize_query(query), normalize_query(reordered))
+
+    def test_exact_matches_keep_their_case(self):
+        self.assertNotEqual(
+            normalize_query(_query("Lot 12", "EQ")),
+            normalize_query(_query("lot 12", "EQ")),
+        )
+
+    def test_sort_order_is_part_of_the_key(self):
+        sorted_query = _query("lot", sorts=[{"propertyName": "city"}])
+        self.assertNotEqual(
+            normalize_query(_query("lot")), normalize_query(sorted_query)
+        )
+
+
+class CachedSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.results = [{"id": str(i)} for i in range(30)]
+        stub_send(self, self._search)
+        for patcher in [
+            mock.patch.object(search_cache, "_entries", {}),
+            mock.patch.object(search_cache, "_generations", Counter()),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _search(self, method, url, **kwargs):
+        self.calls.append(kwargs["json"]["limit"])
+        return 200, {"results": self.results[: kwargs["json"]["limit"]]}
+
+    def test_smaller_limit_is_served_from_a_larger_fetch(self):
+        self.assertEqual(len(cached_search("deals", _query("lot", limit=5))), 5)
+        self.assertEqual(len(cached_search("deals", _query("LOT", limit=20))), 20)
+        self.assertEqual(self.calls, [search_cache.MIN_FETCH])
+        self.assertEqual(len(cached_search("deals", _query("lot", limit=25))), 25)
+        self.assertEqual(self.calls, [search_cache.MIN_FETCH, 25])
+
+    def test_write_clears_searches_over_its_type_only(self):
+        cached_search("deals", _query("lot"))
+        cached_search("contacts", _query("lot"))
+        invalidate_searches("deals")
+        cached_search("deals", _query("lot"))
+        cached_search("contacts", _query("lot"))
+        self.assertEqual(len(self.calls), 3)
+
+    def test_result_of_a_search_overtaken_by_a_write_is_not_stored(self):
+        def search(method, url, **kwargs):
+            invalidate_searches("deals")
+            return self._search(method, url, **kwargs)
+
+        stub_send(self, search)
+        cached_search("deals", _query("lot"))
+        self.assertEqual(search_cache._entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
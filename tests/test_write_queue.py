@@ -0,0 +1,157 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import tools.hubspot as hubspot
+import tools.hubspot.cache as cache
+import tools.hubspot.write_queue as write_queue
+from tools.hubspot.write_queue import WriteQueue
+from hubspot_stub import stub_send
+
+
+class FakeContacts:
+    """Contacts in a fake HubSpot, written through the batch endpoints."""
+
+    def __init__(self):
+        self.records: dict[str, dict] = {}
+        self.calls: list[str] = []
+        self.down = False
+
+    def __call__(self, method, url, **kwargs):
+        action = url.rsplit("/", 1)[-1]
+        self.calls.append(action)
+        if "/crm/v3/properties/" in url:
+            return 200, {"modificationMetadata": {"readOnlyValue": False}}
+        body = kwargs["json"]
+        if action == "search":
+            values = body["filterGroups"][0]["filters"][0]["values"]
+            prop = hubspot.TRACE_PROPERTY
+            found = [
+                r for r in self.records.values() if r["properties"].get(prop) in values
+            ]
+            return 200, {"results": found}
+        if action == "create":
+            results, errors = [], []
+            for record in body["inputs"]:
+                trace = record["objectWriteTraceId"]
+                if "email" not in record["properties"]:
+                    errors.append(
+                        {
+                            "message": "email required",
+                            "context": {"objectWriteTraceId": [trace]},
+                        }
+                    )
+                    continue
+                id_ = str(len(self.records) + 1)
+                self.records[id_] = {
+                    "id": id_,
+                    "properties": dict(record["properties"]),
+                }
+                results.append({**self.records[id_], "objectWriteTraceId": trace})
+            if self.down:
+                # Written, but the response never arrives
+                raise requests.ConnectionError("connection reset")
+            return (207 if errors else 201), {"results": results, "errors": errors}
+        if action == "update":
+            if any(r["id"] not in self.records for r in body["inputs"]):
+                return 400, {"message": "unknown id"}
+            for record in body["inputs"]:
+                self.records[record["id"]]["properties"].update(record["properties"])
+            return 200, {"results": [{"id": r["id"]} for r in body["inputs"]]}
+        return 404, {}
+
+
+class WriteQueueTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "write_queue.jsonl")
+        self.hubspot = FakeContacts()
+        stub_send(self, self.hubspot)
+        for patcher in [
+            # Flushed by the tests, not a background thread
+            mock.patch.object(WriteQueue, "start", lambda self: None),
+            mock.patch.dict(hubspot._trace_properties, clear=True),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _statuses(self, queue: WriteQueue) -> dict[str, str]:
+        return {e["handle"]: e["status"] for e in queue.entries()}
+
+    def test_journal_replays_pending_writes_after_a_restart(self):
+        queue = WriteQueue(self.path)
+        create = queue.enqueue("contacts", {"properties": {"email": "a@x.com"}})
+        update = queue.enqueue("contacts", {"properties": {"phone": "1"}}, create)
+
+        queue = WriteQueue(self.path)
+        self.assertEqual(self._statuses(queue), {create: "pending", update: "pending"})
+        queue.flush()
+        # The update waits for the create's ID, then goes out on the next flush
+        queue.flush()
+        self.assertEqual(self._statuses(queue), {create: "done", update: "done"})
+        self.assertEqual(self.hubspot.records["1"]["properties"]["phone"], "1")
+
+        queue = WriteQueue(self.path)
+        self.assertEqual(self._statuses(queue), {create: "done", update: "done"})
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_create_sent_before_a_lost_response_is_not_sent_again(self):
+        queue = WriteQueue(self.path)
+        handle = queue.enqueue("contacts", {"properties": {"email": "a@x.com"}})
+        self.hubspot.down = True
+        queue.flush()
+        self.assertEqual(self._statuses(queue), {handle: "pending"})
+
+        self.hubspot.down = False
+        queue = WriteQueue(self.path)
+        # The retry backoff is journaled too, so wait it out
+        later = time.time() + write_queue.MAX_BACKOFF
+        with mock.patch.object(write_queue.time, "time", lambda: later):
+            queue.flush()
+        self.assertEqual(self._statuses(queue), {handle: "done"})
+        self.assertEqual(len(self.hubspot.records), 1)
+        self.assertEqual(self.hubspot.calls.count("create"), 1)
+
+    def test_partial_batch_fails_only_the_rejected_create(self):
+        queue = WriteQueue(self.path)
+        good = queue.enqueue("contacts", {"properties": {"email": "a@x.com"}})
+        bad = queue.enqueue("contacts", {"properties": {"firstname": "No email"}})
+        queue.flush()
+        self.assertEqual(self._statuses(queue), {good: "done", bad: "failed"})
+        self.assertEqual(self.hubspot.calls.count("create"), 1)
+        failed = next(e for e in queue.entries() if e["handle"] == bad)
+        self.assertEqual(failed["error"], "email required")
+
+    def test_landed_create_drops_the_linked_association_lists(self):
+        cache.cache_associations("companies", "9", "contacts", ["5"])
+        self.addCleanup(cache.invalidate_associations, "companies", "9", "contacts")
+        queue = WriteQueue(self.path)
+        queue.enqueue(
+            "contacts", {"properties": {"email": "a@x.com"}}, linked={"company_id": "9"}
+        )
+        self.assertEqual(
+            cache.get_cached_associations("companies", "9", "contacts"), ["5"]
+        )
+        queue.flush()
+        self.assertIsNone(cache.get_cached_associations("companies", "9", "contacts"))
+
+    def test_rejected_update_drops_the_optimistically_cached_record(self):
+        cache.cache_record("contacts", {"id": "42", "properties": {"phone": "0"}})
+        self.addCleanup(cache.invalidate_record, "contacts", "42")
+        # What update_contact does when it queues the write
+        cache.merge_cached_record("contacts", "42", {"phone": "1"})
+        queue = WriteQueue(self.path)
+        handle = queue.enqueue("contacts", {"properties": {"phone": "1"}}, "42")
+        queue.flush()
+        self.assertEqual(self._statuses(queue), {handle: "failed"})
+        self.assertIsNone(cache.get_cached_record("contacts", "42", ["phone"]))
+
+
+if __name__ == "__main__":
+    unittest.main()